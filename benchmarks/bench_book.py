@@ -0,0 +1,136 @@
+"""Update-throughput benchmark for the level2 order book.
+
+Usage:
+    python benchmarks/bench_book.py [RECORDING] [--updates N] [--levels N] [--repeat N]
+
+RECORDING is a .gz recording made with --record --book, or a file with one
+raw frame per line; its first snapshot and the l2update frames for the same
+product are replayed. Without it, a synthetic book from the bundled feed
+server is used. Three rates are reported, all best of --repeat:
+
+- book: OrderBook.apply_changes on already decoded frames
+- pipeline: decoding plus the engine's routing, i.e. FeedEngine.process_batch
+- naive: a dict book that sorts its levels to answer best/depth after every frame
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from bench_decoder import load_frames
+from decoder import BookSnapshot, BookUpdate, Decoder
+from engine import FeedEngine
+from feed_server import FeedProfile, FrameGenerator
+from order_book import BOOK_DEPTH_LEVELS, OrderBook
+
+
+def synthetic_frames(updates: int, levels: int, seed: int = 42) -> tuple[str, list[str]]:
+    gen = FrameGenerator(FeedProfile(book_levels=levels, book_updates=1, ticker_every=0, seed=seed), book=True)
+    snapshot = gen.book_snapshot_frame()
+    frames = []
+    while len(frames) < updates:
+        gen.price = max(0.01, gen.price * (1 + gen._rng.gauss(0, 0.0002)))
+        frames.append(gen.book_update_frame())
+    return snapshot, frames
+
+
+def recorded_frames(path: str) -> tuple[str, list[str]]:
+    decoder = Decoder()
+    snapshot, product_id, frames = None, None, []
+    for frame in load_frames(path):
+        record = decoder.decode(frame)
+        if snapshot is None and isinstance(record, BookSnapshot):
+            snapshot, product_id = frame, record.product_id
+        elif snapshot is not None and isinstance(record, BookUpdate) and record.product_id == product_id:
+            frames.append(frame)
+    if snapshot is None:
+        sys.exit(f"{path}: no level2 snapshot found (record with --book)")
+    return snapshot, frames
+
+
+class NaiveBook:
+    """Dict of levels per side, sorted on every read."""
+
+    def __init__(self, snapshot: dict, depth_levels: int):
+        self.depth_levels = depth_levels
+        self.sides = {
+            "buy": {float(p): float(s) for p, s in snapshot["bids"] if float(s) > 0},
+            "sell": {float(p): float(s) for p, s in snapshot["asks"] if float(s) > 0},
+        }
+
+    def apply_changes(self, changes) -> None:
+        for side, price, size in changes:
+            levels = self.sides[side]
+            if float(size) > 0:
+                levels[float(price)] = float(size)
+            else:
+                levels.pop(float(price), None)
+
+    def read(self) -> tuple:
+        bids = sorted(self.sides["buy"].items(), reverse=True)[: self.depth_levels]
+        asks = sorted(self.sides["sell"].items())[: self.depth_levels]
+        return bids[0], asks[0], sum(s for _, s in bids), sum(s for _, s in asks)
+
+
+def bench(run, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        best = min(best, run())
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", nargs="?", help=".gz recording or file with one raw frame per line")
+    parser.add_argument("--updates", type=int, default=100_000, help="synthetic l2update frames")
+    parser.add_argument("--levels", type=int, default=5_000, help="synthetic snapshot levels per side")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    snapshot_frame, frames = (recorded_frames(args.recording) if args.recording
+                              else synthetic_frames(args.updates, args.levels))
+    snapshot = json.loads(snapshot_frame)
+    product_id = snapshot["product_id"]
+    decoded = [json.loads(frame)["changes"] for frame in frames]
+    changes = sum(len(c) for c in decoded)
+    print(f"{len(snapshot['bids'])}/{len(snapshot['asks'])} levels, {len(frames)} l2update frames, "
+          f"{changes} changes, best of {args.repeat}")
+
+    def run_book() -> float:
+        book = OrderBook(product_id)
+        book.apply_snapshot(snapshot["bids"], snapshot["asks"])
+        start = time.perf_counter()
+        for frame_changes in decoded:
+            book.apply_changes(frame_changes)
+            book.best_bid(), book.best_ask(), book.bids.depth, book.asks.depth
+        return time.perf_counter() - start
+
+    def run_pipeline() -> float:
+        engine = FeedEngine(products=[product_id], book=OrderBook(product_id))
+        engine.process_message(snapshot_frame)
+        start = time.perf_counter()
+        engine.process_batch(frames)
+        return time.perf_counter() - start
+
+    naive_frames = decoded[: max(len(decoded) // 50, 1)]
+
+    def run_naive() -> float:
+        book = NaiveBook(snapshot, BOOK_DEPTH_LEVELS)
+        start = time.perf_counter()
+        for frame_changes in naive_frames:
+            book.apply_changes(frame_changes)
+            book.read()
+        return (time.perf_counter() - start) * len(decoded) / len(naive_frames)
+
+    book_secs = bench(run_book, args.repeat)
+    for name, secs in (("book", book_secs), ("pipeline", bench(run_pipeline, args.repeat)),
+                       ("naive (sampled)", bench(run_naive, args.repeat))):
+        print(f"{name:<16} {len(frames) / secs:>12,.0f} frames/s  {changes / secs:>12,.0f} changes/s"
+              f"  ({book_secs / secs:.2f}x book)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Decode-throughput micro-benchmark for the feed decoder backends.
+
+Usage:
+    python benchmarks/bench_decoder.py [FRAMES_FILE] [--repeat N]
+
+FRAMES_FILE holds one raw feed frame per line, or is a .gz recording made
+with --record. Without it a synthetic mix shaped like the live BTC-USD feed
+(matches, tickers, heartbeats) is used.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from decoder import Decoder, InvalidTrade, available_backends
+from recorder import read_frames
+
+
+def synthetic_frames(count: int = 20_000, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    frames = []
+    price = 65000.0
+    for i in range(count):
+        roll = rng.random()
+        price += rng.uniform(-5, 5)
+        if roll < 0.6:
+            frames.append(json.dumps({
+                "type": "match", "trade_id": i, "sequence": 50_000_000 + i,
+                "maker_order_id": "ac928c66-ca53-498f-9c13-a110027a60e8",
+                "taker_order_id": "132fb6ae-456b-4654-b4e0-d681ac05cea1",
+                "time": "2024-01-15T12:00:00.000000Z", "product_id": "BTC-USD",
+                "size": f"{rng.lognormvariate(-5, 2):.8f}", "price": f"{price:.2f}",
+                "side": rng.choice(["buy", "sell"]),
+            }))
+        elif roll < 0.85:
+            frames.append(json.dumps({
+                "type": "ticker", "sequence": 50_000_000 + i, "product_id": "BTC-USD",
+                "price": f"{price:.2f}", "open_24h": "64000.00", "volume_24h": "12345.678",
+                "best_bid": f"{price - 0.01:.2f}", "best_ask": f"{price + 0.01:.2f}",
+            }))
+        else:
+            frames.append(json.dumps({"type": "heartbeat", "sequence": 90, "last_trade_id": i,
+                                      "product_id": "BTC-USD", "time": "2024-01-15T12:00:00.000000Z"}))
+    return frames
+
+
+def load_frames(path: str) -> list[str]:
+    if path.endswith(".gz"):
+        return [frame for _, frame in read_frames(path)]
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def legacy_decode(frame: str) -> None:
+    # The pre-decoder path: full json.loads, then float() and a 7-key trade dict per match
+    data = json.loads(frame)
+    msg_type = data.get("type", "")
+    if msg_type in ["match", "last_match"]:
+        {
+            "price": float(data["price"]),
+            "size": float(data["size"]),
+            "side": data.get("side", "unknown"),
+            "trade_id": data.get("trade_id", ""),
+            "maker_order_id": data.get("maker_order_id", ""),
+            "taker_order_id": data.get("taker_order_id", ""),
+            "time": data.get("time", ""),
+        }
+    elif msg_type == "ticker":
+        float(data.get("price", 0))
+
+
+def bench(decode, frames: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            try:
+                decode(frame)
+            except InvalidTrade:
+                pass
+        best = min(best, time.perf_counter() - start)
+    return len(frames) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("frames_file", nargs="?", help="file with one raw frame per line, or a .gz recording")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_file) if args.frames_file else synthetic_frames()
+    print(f"{len(frames)} frames, best of {args.repeat}")
+    baseline = bench(legacy_decode, frames, args.repeat)
+    print(f"{'legacy json.loads':<20} {baseline:>12,.0f} frames/s")
+    for backend in available_backends():
+        rate = bench(Decoder(backend).decode, frames, args.repeat)
+        print(f"{'decoder/' + backend:<20} {rate:>12,.0f} frames/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Latency/throughput benchmarks for the trade pipeline hot paths.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--trades 10000,100000,1000000]
+                                        [--save-baseline] [--threshold 0.2]
+
+Each run feeds a deterministic synthetic stream (the seeded generator from
+feed_server) through FeedEngine.process_message and FeedEngine.handle_trade,
+timing every call. The UI-side paths (refresh_stats, the trades table,
+heatmap buckets, bot detection) are timed on the real app's widgets,
+mounted in a headless App.run_test session, at evenly spaced points in
+the stream, so they see realistic state.
+
+Results are compared against benchmarks/baseline.json when it exists; the
+script exits with status 1 if any p50 or mean latency is more than
+`--threshold` (fractional) slower. Baselines are machine specific: record
+one with --save-baseline on the box you compare on.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import cli
+from decoder import Decoder, Trade
+from engine import FeedEngine
+from feed_server import FeedProfile, FrameGenerator
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_SIZES = "10000,100000"
+CHUNK = 10_000
+UI_SAMPLES = 200
+SEED = 1234
+# Slowdowns smaller than this are timer noise on sub-microsecond paths, whatever the percentage
+MIN_REGRESSION_US = 1.0
+
+
+def stream(total: int, seed: int = SEED):
+    """Yield chunks of raw match frames (with tickers mixed in) totalling `total` trades."""
+    gen = FrameGenerator(FeedProfile(sizes="bot", seed=seed))
+    while gen.trades < total:
+        yield gen.frames(min(CHUNK, total - gen.trades))
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._chunks: list[np.ndarray] = []
+
+    def add(self, samples: list[int]) -> None:
+        self._chunks.append(np.asarray(samples, dtype=np.int64))
+
+    def summary(self) -> dict:
+        ns = np.concatenate(self._chunks) if self._chunks else np.zeros(1, dtype=np.int64)
+        p50, p90, p99 = np.percentile(ns, [50, 90, 99]) / 1000
+        mean_us = float(ns.mean()) / 1000
+        return {
+            "calls": int(ns.size),
+            "p50_us": float(p50),
+            "p90_us": float(p90),
+            "p99_us": float(p99),
+            "max_us": float(ns.max()) / 1000,
+            "mean_us": mean_us,
+            "per_sec": 1e6 / mean_us if mean_us else 0.0,
+        }
+
+
+def bench_process_message(total: int) -> dict:
+    engine = FeedEngine()
+    process = engine.process_message
+    clock = time.perf_counter_ns
+    latencies = LatencyRecorder()
+    for frames in stream(total):
+        samples = []
+        for frame in frames:
+            start = clock()
+            process(frame)
+            samples.append(clock() - start)
+        latencies.add(samples)
+    return latencies.summary()
+
+
+def bench_handle_trade(total: int) -> dict:
+    engine = FeedEngine()
+    decoder = Decoder()
+    handle = engine.handle_trade
+    clock = time.perf_counter_ns
+    latencies = LatencyRecorder()
+    for frames in stream(total):
+        trades = [record for record in map(decoder.decode, frames) if isinstance(record, Trade)]
+        samples = []
+        for trade in trades:
+            start = clock()
+            handle(trade)
+            samples.append(clock() - start)
+        latencies.add(samples)
+    return latencies.summary()
+
+
+async def _no_feed() -> None:
+    # The benchmark feeds the engine itself
+    pass
+
+
+async def bench_ui_paths(total: int) -> dict[str, dict]:
+    app = cli.BTCBeeperApp()
+    app.engine.run = _no_feed
+    async with app.run_test():
+        return _time_ui_paths(app, total)
+
+
+def _time_ui_paths(app: cli.BTCBeeperApp, total: int) -> dict[str, dict]:
+    # Runs without yielding to the event loop, so the app's own timers and repaints never land inside a sample
+    engine = app.engine
+    # UI callbacks would touch widgets on every trade; the UI paths are timed separately
+    engine.on_trade = engine.on_price = engine.on_status = None
+    every = max(total // UI_SAMPLES, 1)
+    clock = time.perf_counter_ns
+    paths = {
+        "refresh_stats": app.refresh_stats,
+        "update_trades_table": lambda: app._update_trades_table(engine.recent_filtered(cli.TRADES_TABLE_SIZE)),
+        "heatmap_buckets": engine.heatmap_buckets,
+        "check_bot_activity": lambda: app._check_bot_activity(engine.bot_activity()),
+    }
+    latencies = {name: LatencyRecorder() for name in paths}
+    seen = 0
+    for frames in stream(total):
+        for frame in frames:
+            engine.process_message(frame)
+            seen += 1
+            if seen % every:
+                continue
+            for name, call in paths.items():
+                engine.trades_dirty = True
+                start = clock()
+                call()
+                latencies[name].add([clock() - start])
+    return {name: rec.summary() for name, rec in latencies.items()}
+
+
+def run(sizes: list[int]) -> dict:
+    results = {}
+    for total in sizes:
+        results[f"process_message/{total}"] = bench_process_message(total)
+        results[f"handle_trade/{total}"] = bench_handle_trade(total)
+        for name, summary in asyncio.run(bench_ui_paths(total)).items():
+            results[f"{name}/{total}"] = summary
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("p50_us", "mean_us"):
+            slower = current[metric] - base[metric]
+            if base[metric] and slower > MIN_REGRESSION_US and current[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{key} {metric}: {current[metric]:.2f}us vs baseline {base[metric]:.2f}us "
+                    f"(+{current[metric] / base[metric] - 1:.0%})"
+                )
+    return regressions
+
+
+def print_table(results: dict) -> None:
+    print(f"{'benchmark':<32} {'calls':>9} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>10} {'per sec':>12}")
+    for key, r in results.items():
+        print(
+            f"{key:<32} {r['calls']:>9,} {r['p50_us']:>9.2f} {r['p90_us']:>9.2f} "
+            f"{r['p99_us']:>9.2f} {r['max_us']:>10.1f} {r['per_sec']:>12,.0f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", default=DEFAULT_SIZES,
+                        help="comma separated stream sizes (default %(default)s; up to 1000000)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed fractional slowdown before failing (default %(default)s)")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.trades.split(",") if n]
+    results = run(sizes)
+    print_table(results)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(
+            {"machine": platform.platform(), "python": platform.python_version(), "results": results}, indent=2
+        ) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import logging
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CHANNELS = int(os.getenv("BTCBEEPER_AUDIO_CHANNELS", "16"))
+AUDIO_TICK = float(os.getenv("BTCBEEPER_AUDIO_TICK", "0.02"))
+AUDIO_QUEUE_SIZE = int(os.getenv("BTCBEEPER_AUDIO_QUEUE_SIZE", "4096"))
+# Above this many clicks/sec individual clicks merge into one texture click per side per tick
+AUDIO_AGGREGATE_TPS = float(os.getenv("BTCBEEPER_AUDIO_AGGREGATE_TPS", "40"))
+RATE_SMOOTHING = 0.2
+BASE_VOLUME = 0.35
+# Texture pitch rises with density, one step per doubling of clicks in a tick
+PITCH_STEPS = (1.0, 1.12, 1.26, 1.41, 1.59)
+
+
+def pitch_shift(sound, factor: float):
+    """Return `sound` resampled to play `factor` times higher, or `sound` itself if that isn't possible."""
+    if factor == 1.0:
+        return sound
+    import pygame
+
+    try:
+        samples = pygame.sndarray.array(sound)
+        length = max(int(len(samples) / factor), 1)
+        positions = np.linspace(0, len(samples) - 1, length)
+        index = np.arange(len(samples))
+        if samples.ndim == 1:
+            shifted = np.interp(positions, index, samples)
+        else:
+            shifted = np.column_stack([np.interp(positions, index, samples[:, c]) for c in range(samples.shape[1])])
+        return pygame.sndarray.make_sound(np.ascontiguousarray(shifted.astype(samples.dtype)))
+    except Exception as e:
+        logger.debug("Pitch shift unavailable, using original sound: %s", e)
+        return sound
+
+
+def texture_volume(total_size: float) -> float:
+    """Volume for an aggregated click: grows with log of the BTC it stands for."""
+    return min(1.0, BASE_VOLUME + 0.15 * math.log1p(total_size * 10))
+
+
+class AudioEngine:
+    """Plays trade clicks from its own thread over a fixed pool of mixer channels.
+
+    `submit` only appends to a bounded deque (atomic in CPython, no lock), so
+    it is cheap enough to call for every trade from the UI or ingest thread.
+    Every `tick` the thread drains the deque. While the smoothed click rate is
+    below `aggregate_tps` each click plays on the next free pool channel (or
+    is dropped and counted when all are busy); above it, the clicks of a tick
+    collapse into one texture click per side whose volume follows the summed
+    size and whose pitch follows the number of clicks merged. A click pushed
+    out of a full deque is counted as dropped too.
+    """
+
+    def __init__(
+        self,
+        sounds: dict,
+        channels: int = AUDIO_CHANNELS,
+        tick: float = AUDIO_TICK,
+        aggregate_tps: float = AUDIO_AGGREGATE_TPS,
+        queue_size: int = AUDIO_QUEUE_SIZE,
+        timbre=None,
+    ):
+        self.sounds = {side: sound for side, sound in sounds.items() if sound is not None}
+        # Optional sound_bank.TimbreCache: individual clicks then vary with trade size
+        self.timbre = timbre
+        self.tick_interval = tick
+        self.aggregate_tps = aggregate_tps
+        self._events: deque = deque(maxlen=queue_size)
+        self._channels: list = []
+        self._channel_count = channels
+        self._next_channel = 0
+        self._pitched: dict[tuple[str, int], object] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.rate = 0.0
+        self.submitted = 0
+        self.played = 0
+        self.aggregated = 0
+        # Clicks that never played, for a busy pool or a full queue; `overflowed` counts the latter
+        self.dropped = 0
+        self.overflowed = 0
+
+    def _open_channels(self) -> None:
+        import pygame
+
+        if pygame.mixer.get_num_channels() < self._channel_count:
+            pygame.mixer.set_num_channels(self._channel_count)
+        self._channels = [pygame.mixer.Channel(i) for i in range(self._channel_count)]
+
+    def start(self) -> None:
+        self._open_channels()
+        # Render the texture pitches up front so the audio thread never synthesises
+        for side in self.sounds:
+            for step in range(len(PITCH_STEPS)):
+                self._sound(side, step)
+        self._thread = threading.Thread(target=self._run, name="btcbeeper-audio", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def set_sound(self, side: str, sound) -> None:
+        """Swap the click for `side` while running; its pitch variants are rendered here, not on the audio thread."""
+        pitched = {step: pitch_shift(sound, factor) for step, factor in enumerate(PITCH_STEPS)}
+        self.sounds[side] = sound
+        for step, variant in pitched.items():
+            self._pitched[(side, step)] = variant
+
+    def submit(self, side: str, size: float) -> None:
+        self.submitted += 1
+        events = self._events
+        if len(events) == events.maxlen:
+            # The append below pushes out the oldest queued click
+            self.overflowed += 1
+            self.dropped += 1
+        events.append((side, size))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick_interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error("Audio tick failed: %s", e)
+
+    def _sound(self, side: str, step: int = 0):
+        key = (side, step)
+        sound = self._pitched.get(key)
+        if sound is None:
+            base = self.sounds.get("sell" if side == "sell" else "buy")
+            if base is None:
+                return None
+            sound = self._pitched[key] = pitch_shift(base, PITCH_STEPS[step])
+        return sound
+
+    def _free_channel(self):
+        count = len(self._channels)
+        for offset in range(count):
+            channel = self._channels[(self._next_channel + offset) % count]
+            if not channel.get_busy():
+                self._next_channel = (self._next_channel + offset + 1) % count
+                return channel
+        return None
+
+    def _play(self, sound, volume: float) -> bool:
+        channel = self._free_channel()
+        if channel is None or sound is None:
+            self.dropped += 1
+            return False
+        channel.set_volume(volume)
+        channel.play(sound)
+        self.played += 1
+        return True
+
+    def tick(self) -> None:
+        events = []
+        pop = self._events.popleft
+        while self._events:
+            events.append(pop())
+        self.rate += RATE_SMOOTHING * (len(events) / self.tick_interval - self.rate)
+        if not events:
+            return
+        if self.rate < self.aggregate_tps:
+            timbre = self.timbre
+            for side, size in events:
+                self._play(timbre.get(side, size) if timbre else self._sound(side), BASE_VOLUME * 2)
+            return
+        totals: dict[str, list] = {}
+        for side, size in events:
+            side = "sell" if side == "sell" else "buy"
+            bucket = totals.setdefault(side, [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += size
+        for side, (count, size) in totals.items():
+            step = min(int(math.log2(count)), len(PITCH_STEPS) - 1)
+            if self._play(self._sound(side, step), texture_volume(size)):
+                self.aggregated += count
+
+    @property
+    def mode(self) -> str:
+        return "texture" if self.rate >= self.aggregate_tps else "clicks"
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "mode": self.mode,
+            "rate": round(self.rate, 1),
+            "submitted": self.submitted,
+            "played": self.played,
+            "aggregated": self.aggregated,
+            "dropped": self.dropped,
+            "overflowed": self.overflowed,
+            "queued": len(self._events),
+        }
+        if self.timbre:
+            snapshot["timbre"] = self.timbre.snapshot()
+        return snapshot
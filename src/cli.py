@@ -1,13 +1,10 @@
 import asyncio
-import bisect
-import json
 import logging
 import os
+import threading
 import time
-from collections import deque
+from concurrent.futures import Future
 
-import pygame
-import websockets
 from rich.text import Text
 from textual.app import App, ComposeResult
 from textual.binding import Binding
@@ -15,6 +12,35 @@ from textual.containers import Horizontal, Vertical
 from textual.timer import Timer
 from textual.widgets import DataTable, Footer, Static
 
+if __package__:
+    from .audio import AudioEngine
+    from .decoder import Trade
+    from .depth_heatmap import DEPTH_SLICE, DepthHistory
+    from .engine import PRODUCT_ID, FeedEngine, FeedView
+    from .ingest import HandoffQueue, IngestThread
+    from .order_book import OrderBook
+    from .recorder import FrameRecorder, ReplaySource
+    from .render import RenderScheduler
+    from .sound_bank import (
+        BUY_SOUND, CLICK_SOUND_PATH, SELL_SOUND, SELL_SOUND_PATH, SoundBank, TimbreCache, variation_names,
+    )
+    from .startup import StartupProfile
+    from .tape import TapeWriter
+else:
+    from audio import AudioEngine
+    from decoder import Trade
+    from depth_heatmap import DEPTH_SLICE, DepthHistory
+    from engine import PRODUCT_ID, FeedEngine, FeedView
+    from ingest import HandoffQueue, IngestThread
+    from order_book import OrderBook
+    from recorder import FrameRecorder, ReplaySource
+    from render import RenderScheduler
+    from sound_bank import (
+        BUY_SOUND, CLICK_SOUND_PATH, SELL_SOUND, SELL_SOUND_PATH, SoundBank, TimbreCache, variation_names,
+    )
+    from startup import StartupProfile
+    from tape import TapeWriter
+
 logging.basicConfig(
     filename=os.getenv("BTCBEEPER_LOG_PATH", "btcbeeper.log"),
     level=logging.INFO,
@@ -22,21 +48,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-CLICK_SOUND_PATH = os.getenv("BTCBEEPER_SOUND_PATH", "data/sounds/geiger_click7.wav")
-SELL_SOUND_PATH = os.getenv("BTCBEEPER_SELL_SOUND_PATH", "data/sounds/geiger_click4.wav")
-COINBASE_WS_URL = os.getenv("COINBASE_WS_URL", "wss://ws-feed.exchange.coinbase.com")
-PRODUCT_ID = "BTC-USD"
-
-TPS_WINDOW = 10
-MAX_RECENT_TRADES = 1000
-MAX_RECONNECT_ATTEMPTS = 5
-RECONNECT_DELAY = 2
-BOT_DETECTION_THRESHOLD = 5
 BOT_BANNER_DURATION = 5
-BOT_DETECTION_WINDOW = 50
 TRADES_TABLE_SIZE = 16
 STATS_REFRESH_INTERVAL = 0.5
+# Trade ID gaps are logged per gap at DEBUG only; a summary goes to INFO this often when they change
+GAP_SUMMARY_INTERVAL = float(os.getenv("BTCBEEPER_GAP_SUMMARY_INTERVAL", "60"))
+INGEST_THREAD = os.getenv("BTCBEEPER_INGEST_THREAD", "0") == "1"
+UI_QUEUE_SIZE = int(os.getenv("BTCBEEPER_UI_QUEUE_SIZE", "64"))
+UI_QUEUE_OVERFLOW = os.getenv("BTCBEEPER_UI_QUEUE_OVERFLOW", "drop_oldest")
+UI_DRAIN_INTERVAL = 1 / 30
 ANIMATION_DURATION = 0.5
+PRICE_FPS = float(os.getenv("BTCBEEPER_PRICE_FPS", "30"))
+AUDIO_ENGINE = os.getenv("BTCBEEPER_AUDIO_ENGINE", "1") == "1"
+SIZE_TIMBRE = os.getenv("BTCBEEPER_SIZE_TIMBRE", "1") == "1"
+
+# Stats fields each panel reads; a panel is redrawn only when one of these (or its other inputs) changes
+SESSION_FIELDS = ("session_high", "session_low", "volume_usd", "session_volume", "total_trades", "last_price")
+TRADE_STATS_FIELDS = ("total_trades", "buy_volume", "sell_volume", "volume_usd", "avg_trade_size", "largest_trade")
+ACTIVITY_FIELDS = (
+    "tps", "highest_tps", "parse_errors", "invalid_trades", "ui_queue_depth", "ui_dropped",
+    "seq_gaps", "seq_missing", "seq_last_gap", "seq_largest_gap", "seq_late", "seq_duplicates",
+)
 
 
 class StatusHeader(Static):
@@ -44,6 +76,7 @@ class StatusHeader(Static):
         super().__init__("", *args, **kwargs)
         self._feed_status = "--"
         self._audio_status = "ON"
+        self._product = PRODUCT_ID
 
     @property
     def feed_status(self) -> str:
@@ -51,6 +84,8 @@ class StatusHeader(Static):
 
     @feed_status.setter
     def feed_status(self, value: str) -> None:
+        if value == self._feed_status:
+            return
         self._feed_status = value
         self._refresh_display()
 
@@ -60,9 +95,22 @@ class StatusHeader(Static):
 
     @audio_status.setter
     def audio_status(self, value: str) -> None:
+        if value == self._audio_status:
+            return
         self._audio_status = value
         self._refresh_display()
 
+    @property
+    def product(self) -> str:
+        return self._product
+
+    @product.setter
+    def product(self, value: str) -> None:
+        if value == self._product:
+            return
+        self._product = value
+        self._refresh_display()
+
     def on_mount(self) -> None:
         self._refresh_display()
 
@@ -71,7 +119,7 @@ class StatusHeader(Static):
             f"[bold bright_cyan]₿ BTCBeeper[/]"
             f"  [dim]Feed:[/] {self._feed_status}"
             f"  [dim]Audio:[/] {self._audio_status}"
-            f"  [dim]BTC-USD[/]"
+            f"  [dim]{self._product}[/]"
         )
 
 
@@ -151,6 +199,55 @@ class ActivityWidget(Static):
         errors_i = stats.get("invalid_trades", 0)
         if errors_p or errors_i:
             lines.append(f"[dim]Errors[/] [bright_red]{errors_p} parse  {errors_i} invalid[/]")
+        if stats.get("seq_gaps"):
+            lines.append(
+                f"[dim]Gaps  [/] [bright_yellow]{stats['seq_gaps']}  {stats['seq_missing']} missing[/]"
+                f"  [dim]last[/] {stats['seq_last_gap']}  [dim]max[/] {stats['seq_largest_gap']}"
+            )
+        if stats.get("seq_late") or stats.get("seq_duplicates"):
+            lines.append(f"[dim]Order [/] {stats['seq_late']} late  {stats['seq_duplicates']} dup")
+        if "ui_queue_depth" in stats:
+            lines.append(f"[dim]Queue [/] {stats['ui_queue_depth']}  [dim]dropped[/] {stats['ui_dropped']}")
+        self.update("\n".join(lines))
+
+
+class ProductsWidget(Static):
+    def on_mount(self) -> None:
+        self.border_title = "PRODUCTS"
+
+    def update_products(self, summaries: list[dict], active: str) -> None:
+        lines = []
+        for summary in summaries:
+            marker = "[bold bright_cyan]▸[/]" if summary["product_id"] == active else " "
+            price = f"${summary['last_price']:,.2f}" if summary["last_price"] else "--"
+            lines.append(f"{marker}{summary['product_id']:<9} {price:>12} [dim]{summary['tps']:>4.1f}/s[/]")
+        self.update("\n".join(lines))
+
+
+class BookWidget(Static):
+    def on_mount(self) -> None:
+        self.border_title = "BOOK"
+
+    def update_book(self, book: dict) -> None:
+        """Draw from an OrderBook.snapshot()."""
+        if not book["ready"]:
+            self.update("[dim]waiting for snapshot[/]")
+            return
+        bid, ask, spread, imbalance = book["best_bid"], book["best_ask"], book["spread"], book["imbalance"]
+        lines = [
+            f"[dim]Bid   [/] [bright_green]${bid[0]:,.2f}[/]  {_fmt_btc(bid[1])}" if bid else "[dim]Bid    --[/]",
+            f"[dim]Ask   [/] [bright_red]${ask[0]:,.2f}[/]  {_fmt_btc(ask[1])}" if ask else "[dim]Ask    --[/]",
+        ]
+        if book["stale"]:
+            lines.append("[bright_red]CROSSED - stale until snapshot[/]")
+        elif spread is not None:
+            lines.append(f"[dim]Spread[/] ${spread:,.2f}")
+        lines.append(
+            f"[dim]Top {book['depth_levels']:<2}[/] [bright_green]{book['bid_depth']:.3f}[/] / [bright_red]{book['ask_depth']:.3f}[/]"
+        )
+        if imbalance is not None:
+            color = "bright_green" if imbalance >= 0 else "bright_red"
+            lines.append(f"[dim]Imbal [/] [{color}]{imbalance:+.0%}[/]")
         self.update("\n".join(lines))
 
 
@@ -168,14 +265,69 @@ class PriceWidget(Static):
         self.update(f"\n[bold bright_yellow on black]${price:,.2f}[/]")
 
     def animate(self, direction: str) -> None:
+        if self._anim_direction and self._anim_direction != direction:
+            self.remove_class(f"price-{self._anim_direction}")
         self.add_class(f"price-{direction}")
-        if self.anim_timer:
-            self.anim_timer.stop()
         self._anim_direction = direction
-        self.anim_timer = self.set_timer(ANIMATION_DURATION, self._reset_animation)
+        # One paused interval is reset on every move rather than a new timer per move
+        if self.anim_timer is None:
+            self.anim_timer = self.set_interval(ANIMATION_DURATION, self._reset_animation)
+        else:
+            self.anim_timer.reset()
 
     def _reset_animation(self) -> None:
         self.remove_class(f"price-{self._anim_direction}")
+        self._anim_direction = ""
+        if self.anim_timer:
+            self.anim_timer.pause()
+
+
+class PricePresenter:
+    """Coalesces price updates into at most one PriceWidget update per frame.
+
+    `submit` can be called from any thread and per trade; it only records the
+    latest price and the net move since the last frame. `present`, driven by a
+    single frame timer, applies that to the widget once: one animation for
+    the net direction and one update if the shown price changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._price: float | None = None
+        self._move_from: float | None = None
+        self._move_to: float | None = None
+        self._shown: float | None = None
+        self.submitted = 0
+        self.frames = 0
+
+    def submit(self, move_from: float | None, move_to: float | None, last_price: float) -> None:
+        with self._lock:
+            self.submitted += 1
+            self._price = last_price
+            if move_to is not None:
+                if self._move_to is None:
+                    self._move_from = move_from
+                self._move_to = move_to
+
+    def present(self, widget: "PriceWidget") -> None:
+        with self._lock:
+            price, move_from, move_to = self._price, self._move_from, self._move_to
+            self._price = self._move_from = self._move_to = None
+        if price is None:
+            return
+        self.frames += 1
+        if move_from and move_to is not None:
+            if move_to > move_from:
+                widget.animate("up")
+            elif move_to < move_from:
+                widget.animate("down")
+        if price != self._shown:
+            widget.update_price(price)
+            self._shown = price
+
+    def snapshot(self) -> dict:
+        return {"submitted": self.submitted, "frames": self.frames}
+
 
 class HeatmapWidget(Static):
     LABELS = ["< 0.0001", "0.0001–0.001", "0.001–0.01", "0.01–0.1", "0.1–1.0", "≥ 1.0"]
@@ -205,51 +357,236 @@ class HeatmapWidget(Static):
         self.update("\n".join(lines))
 
 
+class DepthHeatmapWidget(Static):
+    """Resting bid/ask size per price bucket over time, newest column on the right."""
+
+    def __init__(self, buckets: int, **kwargs):
+        super().__init__(**kwargs)
+        self.history = DepthHistory(buckets)
+
+    def on_mount(self) -> None:
+        self.border_title = "DEPTH"
+
+    def update_depth(self, mid: float, bucket_size: float) -> None:
+        self.update("\n".join(self.history.render(mid, bucket_size)))
+
+
 def _fmt_btc(value: float) -> str:
     return f"{value:.6f}".rstrip("0").rstrip(".")
 
 
+class TradesTableUpdater:
+    """Keeps the trades DataTable in sync with the newest trades, newest first.
+
+    Each trade on screen is one row keyed by its sequence number. An update
+    removes the rows of trades that dropped out and adds rows for new ones,
+    so a new trade costs one add_row and one remove_row however many rows
+    are shown. add_row appends at the bottom, so when a newer trade lands
+    there a single sort puts it back on top. Styled cells are built once per
+    trade. The expanded trade's detail rows break that layout, so while one
+    is shown the table is rebuilt instead.
+    """
+
+    def __init__(self, table: DataTable):
+        self.table = table
+        self.row_map: dict = {}
+        self.detail_keys: list = []
+        # seq -> row key of each trade on screen; None after a rebuild, until the table is cleared again
+        self._rows: dict[int, str] | None = {}
+        self._cells: dict[int, tuple[Text, Text, Text]] = {}
+        # id of a row's first cell -> its trade's seq; DataTable.sort only passes the key function cell values
+        self._order: dict[int, int] = {}
+        self.cells_built = 0
+        self.rows_added = 0
+        self.rows_removed = 0
+        self.rebuilds = 0
+
+    def _cells_for(self, trade: dict) -> tuple[Text, Text, Text]:
+        cells = self._cells.get(trade["seq"])
+        if cells is None:
+            color = "bright_green" if trade["side"] == "buy" else "bright_red"
+            cells = (
+                Text(trade["side"].capitalize(), style=color),
+                Text(f"${trade['price']:.2f}", style=color),
+                Text(f"{trade['size']:.6f}", style=color),
+            )
+            self.cells_built += 1
+        return cells
+
+    def _newest_first(self, cells: tuple) -> int:
+        return -self._order[id(cells[0])]
+
+    def update(self, trades: list[dict], expanded_seq: int | None = None) -> None:
+        """Show `trades` (oldest first, as returned by recent_filtered)."""
+        shown = trades[::-1]
+        if expanded_seq is not None and any(t["seq"] == expanded_seq for t in shown):
+            self.rebuild(shown, expanded_seq)
+            return
+        wanted = {t["seq"]: t for t in shown}
+        if self._rows is None:
+            self._clear()
+            self._cells = {seq: cells for seq, cells in self._cells.items() if seq in wanted}
+        rows = self._rows
+        if wanted.keys() == rows.keys():
+            return
+        table = self.table
+        for seq in [seq for seq in rows if seq not in wanted]:
+            key = rows.pop(seq)
+            table.remove_row(key)
+            del self.row_map[key]
+            del self._order[id(self._cells.pop(seq)[0])]
+            self.rows_removed += 1
+        # Rows are appended in `shown` order, newest first; only one newer than the bottom row needs a sort
+        bottom = min(rows) if rows else None
+        unsorted = False
+        for seq, trade in wanted.items():
+            if seq in rows:
+                continue
+            cells = self._cells[seq] = self._cells_for(trade)
+            self._order[id(cells[0])] = seq
+            key = rows[seq] = str(seq)
+            table.add_row(*cells, key=key)
+            # RowKey hashes and compares like its string, so selection events find the trade
+            self.row_map[key] = trade
+            self.rows_added += 1
+            if bottom is not None and seq > bottom:
+                unsorted = True
+            bottom = seq
+        if unsorted:
+            table.sort(key=self._newest_first)
+
+    def rebuild(self, shown: list[dict], expanded_seq: int | None = None) -> None:
+        """Clear and re-add every row, with detail rows under the expanded trade."""
+        self._clear()
+        self.rebuilds += 1
+        table = self.table
+        cells = {}
+        for i, trade in enumerate(shown):
+            row = cells[trade["seq"]] = self._cells_for(trade)
+            rk = table.add_row(*row, key=str(trade["seq"]))
+            self.row_map[rk] = trade
+            if trade["seq"] == expanded_seq:
+                self._add_detail_rows(trade, i)
+        self._cells = cells
+        # Detail rows sit among the trade rows; the next update clears the table and starts again
+        self._rows = None
+
+    def reset(self) -> None:
+        """Forget the trades on screen, e.g. after switching product; the next update redraws every row."""
+        self._cells.clear()
+        self._rows = None
+
+    def collapse(self) -> None:
+        for dk in self.detail_keys:
+            self.table.remove_row(dk)
+        self.detail_keys.clear()
+
+    def _clear(self) -> None:
+        self.table.clear()
+        self.row_map.clear()
+        self.detail_keys.clear()
+        self._rows = {}
+        self._order.clear()
+
+    def _add_detail_rows(self, trade: dict, trade_index: int) -> None:
+        detail_data = [
+            ("", "", f"  Trade ID:  {trade.get('trade_id', 'N/A')}"),
+            ("", "", f"  Time:      {trade.get('time', 'N/A')}"),
+            ("", "", f"  Maker ID:  {trade.get('maker_order_id', 'N/A')}"),
+            ("", "", f"  Taker ID:  {trade.get('taker_order_id', 'N/A')}"),
+        ]
+        for j, row in enumerate(detail_data):
+            dk = self.table.add_row(*row, key=f"detail-{trade_index}-{j}")
+            self.detail_keys.append(dk)
+
+
 class BTCBeeperApp(App):
     CSS_PATH = "btcbeeper.tcss"
-    FILTER_SIZES = [0.0001, 0.001, 0.01, 0.1, 1]
+    FILTER_SIZES = FeedEngine.FILTER_SIZES
     BINDINGS = [
         Binding("q", "quit",         "Quit"),
         Binding("a", "toggle_audio", "Audio on/off"),
+        Binding("s", "next_sound('buy')", "Buy click"),
+        Binding("S", "next_sound('sell')", "Sell click"),
         Binding("[", "filter_down",  "Filter ←", priority=True),
         Binding("]", "filter_up",    "Filter →", priority=True),
+        Binding("p", "next_product(1)", "Product"),
+        Binding("P", "next_product(-1)", "Prev product", show=False),
     ]
 
-    def __init__(self, click_sound=None, click_sound_sell=None, **kwargs):
+    # Built in compose; the feed can report status before that
+    status_header: StatusHeader | None = None
+    # Only shown when following more than one product
+    products_widget: ProductsWidget | None = None
+    # Only shown with an order book
+    book_widget: BookWidget | None = None
+    # Only shown with an order book that keeps a depth ladder
+    depth_widget: DepthHeatmapWidget | None = None
+
+    def __init__(
+        self,
+        click_sound=None,
+        click_sound_sell=None,
+        recorder: FrameRecorder | None = None,
+        replay: ReplaySource | None = None,
+        sound_bank: SoundBank | None = None,
+        audio_init: "Future[tuple] | None" = None,
+        startup: StartupProfile | None = None,
+        products: list[str] | None = None,
+        book: OrderBook | None = None,
+        tape: TapeWriter | None = None,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
         self._click_sound = click_sound
         self._click_sound_sell = click_sound_sell
+        self.sound_bank = sound_bank
+        self.sound_names = {"buy": BUY_SOUND, "sell": SELL_SOUND}
+        # (click_sound, click_sound_sell, sound_bank) still being built on another thread
+        self._audio_init = audio_init
+        self.startup = startup
+        self._first_trade_pending = False
+        self.engine = FeedEngine(
+            recorder=recorder,
+            replay=replay,
+            on_trade=self._on_trade,
+            on_price=self._on_price_move,
+            on_status=self._set_feed_status,
+            on_connect=self._on_feed_connect,
+            products=products,
+            book=book,
+            tape=tape,
+        )
         self.bot_banner_timer: Timer | None = None
-        self.filter_index = 0
         self.audio_enabled = True
-        self.stats = {
-            "total_trades": 0,
-            "last_price": 0.0,
-            "session_volume": 0.0,
-            "avg_trade_size": 0.0,
-            "largest_trade": None,
-            "tps": 0.0,
-            "highest_tps": 0.0,
-            "parse_errors": 0,
-            "invalid_trades": 0,
-            "session_start": time.time(),
-            "session_high": None,
-            "session_low": None,
-            "volume_usd": 0.0,
-            "buy_volume": 0.0,
-            "sell_volume": 0.0,
-        }
-        self.recent_trades: deque[dict] = deque(maxlen=MAX_RECENT_TRADES)
-        self.trade_timestamps: deque[float] = deque()
-        self._expanded_trade: dict | None = None
-        self._trade_row_map: dict = {}
-        self._detail_row_keys: list = []
-        self._last_msg_time: float = 0.0
-        self._trades_dirty: bool = False
+        self._expanded_seq: int | None = None
+        self._table_updater: TradesTableUpdater | None = None
+        self.render_scheduler = RenderScheduler()
+        self.price_presenter = PricePresenter()
+        self._ingest_thread: IngestThread | None = None
+        self.ui_updates = HandoffQueue(UI_QUEUE_SIZE, UI_QUEUE_OVERFLOW)
+        # Last FeedView drawn; with the ingest thread, the newest one drained from ui_updates
+        self._view: FeedView | None = None
+        # Filter level last asked for, when that change runs on the ingest loop
+        self._filter_index: int | None = None
+        self.audio_engine: AudioEngine | None = None
+
+    @property
+    def stats(self) -> dict:
+        return self.engine.stats
+
+    @stats.setter
+    def stats(self, value: dict) -> None:
+        self.engine.stats = value
+
+    @property
+    def filter_index(self) -> int:
+        # While a change is queued for the ingest loop, the engine has not caught up yet
+        return self._filter_index if self._filter_index is not None else self.engine.filter_index
+
+    @filter_index.setter
+    def filter_index(self, value: int) -> None:
+        self._filter_index = value if self._change_engine(self.engine.set_filter, value) else None
 
     def compose(self) -> ComposeResult:
         self.status_header = StatusHeader(id="status-header")
@@ -264,151 +601,225 @@ class BTCBeeperApp(App):
                 yield self.trade_stats_widget
                 self.activity_widget = ActivityWidget()
                 yield self.activity_widget
+                if len(self.engine.products) > 1:
+                    self.products_widget = ProductsWidget()
+                    yield self.products_widget
+                if self.engine.book is not None:
+                    self.book_widget = BookWidget()
+                    yield self.book_widget
             with Vertical(id="right-panel"):
                 self.trades_table = DataTable(id="trades-table", cursor_type="row")
                 self.trades_table.add_columns("Side", "Price", "Size (BTC)")
                 yield self.trades_table
         self.heatmap_widget = HeatmapWidget(id="heatmap")
-        yield self.heatmap_widget
+        book = self.engine.book
+        if book is not None and book.ladder is not None:
+            self.depth_widget = DepthHeatmapWidget(book.ladder.buckets, id="depth")
+            with Horizontal(id="bottom-row"):
+                yield self.heatmap_widget
+                yield self.depth_widget
+        else:
+            yield self.heatmap_widget
         self.bot_banner = BotBanner("", id="bot-banner")
         yield self.bot_banner
         yield Footer()
 
+    async def on_load(self) -> None:
+        self._mark("app loaded")
+        # Connect and subscribe while the UI is still being composed
+        if INGEST_THREAD:
+            # Socket reads, decoding and stats run off the UI loop; the UI only drains updates
+            self._ingest_thread = IngestThread(self._run_ingest, on_error=self._on_ingest_error)
+            self._ingest_thread.start()
+        else:
+            self.run_worker(self.engine.run, exclusive=True)
+
     async def on_mount(self) -> None:
+        self._mark("ui mounted")
+        if self._audio_init is not None:
+            loop = asyncio.get_running_loop()
+            self._audio_init.add_done_callback(lambda future: loop.call_soon_threadsafe(self._on_audio_ready, future))
+        elif AUDIO_ENGINE and (self._click_sound or self._click_sound_sell):
+            self._start_audio_engine()
         self.set_interval(STATS_REFRESH_INTERVAL, self.refresh_stats)
-        self.run_worker(self._ws_loop, exclusive=True)
-
-    async def _ws_loop(self) -> None:
-        reconnect_attempts = 0
-        subscribe_msg = json.dumps({
-            "type": "subscribe",
-            "product_ids": [PRODUCT_ID],
-            "channels": ["matches", "ticker", "heartbeat"],
-        })
-
-        while reconnect_attempts < MAX_RECONNECT_ATTEMPTS:
-            try:
-                async with websockets.connect(COINBASE_WS_URL, ping_interval=10, ping_timeout=5) as ws:
-                    await ws.send(subscribe_msg)
-                    reconnect_attempts = 0
-                    self._last_msg_time = time.time()
-                    logger.info("Connected to %s", COINBASE_WS_URL)
-                    async for message in ws:
-                        now = time.time()
-                        if self._last_msg_time and now - self._last_msg_time > 2:
-                            logger.info("Message gap of %.1fs", now - self._last_msg_time)
-                        self._last_msg_time = now
-                        self._process_message(message)
-            except (websockets.exceptions.WebSocketException, ConnectionError, OSError) as e:
-                reconnect_attempts += 1
-                logger.warning("Connection error: %s (attempt %d/%d)", e, reconnect_attempts, MAX_RECONNECT_ATTEMPTS)
-                self.status_header.feed_status = f"[bright_red]ERR {reconnect_attempts}/{MAX_RECONNECT_ATTEMPTS}[/]"
-                if reconnect_attempts < MAX_RECONNECT_ATTEMPTS:
-                    delay = min(RECONNECT_DELAY * 2 ** reconnect_attempts, 60)
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error("Max reconnection attempts reached, giving up")
-                    self.status_header.feed_status = "[bright_red]DISCONNECTED[/]"
-
-    def _process_message(self, message: str) -> None:
+        self.set_interval(1 / PRICE_FPS, self._present_price)
+        self.set_interval(GAP_SUMMARY_INTERVAL, self.engine.log_gap_summary)
+        if self._ingest_thread:
+            # Views and depth columns are built on the ingest thread and arrive with the other updates
+            self.set_interval(UI_DRAIN_INTERVAL, self._drain_ui_updates)
+        elif self.depth_widget is not None:
+            self.set_interval(DEPTH_SLICE, self.capture_depth)
+
+    async def on_unmount(self) -> None:
+        if self._ingest_thread:
+            self._ingest_thread.stop()
+            logger.info("UI handoff queue: %s", self.ui_updates.snapshot())
+        if self.audio_engine:
+            self.audio_engine.stop()
+            logger.info("Audio engine: %s", self.audio_engine.snapshot())
+        logger.info("Widget renders: %s", self.render_scheduler.snapshot())
+        logger.info("Price presenter: %s", self.price_presenter.snapshot())
+        recorder = self.engine.recorder
+        if recorder:
+            recorder.close()
+            logger.info("Recorded %d frames to %s", recorder.frames_written, recorder.path)
+        tape = self.engine.tape
+        if tape:
+            tape.close()
+            logger.info("Trade tape: %s", tape.snapshot())
+
+    def _mark(self, milestone: str) -> bool:
+        return self.startup.mark(milestone) if self.startup else False
+
+    def _on_feed_connect(self) -> None:
+        self._mark("feed subscribed")
+
+    def _on_audio_ready(self, future: "Future[tuple]") -> None:
         try:
-            data = json.loads(message)
-        except json.JSONDecodeError as e:
-            self.stats["parse_errors"] += 1
-            logger.debug("JSON parse error: %s", e)
-            return
-
-        if data.get("product_id") not in [PRODUCT_ID, None]:
-            return
-
-        msg_type = data.get("type", "")
-
-        if msg_type in ["match", "last_match"]:
-            self._handle_trade(data)
-        elif msg_type == "ticker":
-            price = float(data.get("price", 0))
-            if price > 0:
-                self.stats["last_price"] = price
-        elif msg_type == "error":
-            self.status_header.feed_status = f"[Error]: {data.get('message', 'Unknown error')}"
-
-    def _handle_trade(self, data: dict) -> None:
-        if "price" not in data or "size" not in data:
-            self.stats["invalid_trades"] += 1
-            logger.debug("Invalid trade: missing price or size field")
+            self._click_sound, self._click_sound_sell, self.sound_bank = future.result()
+        except Exception as e:
+            logger.warning("Audio init failed: %s", e)
             return
+        self._mark("audio ready")
+        if AUDIO_ENGINE and (self._click_sound or self._click_sound_sell):
+            self._start_audio_engine()
+
+    def _on_price_move(self, move_from: float | None, move_to: float | None, last_price: float) -> None:
+        # Safe from the ingest thread too; the widget is only touched by _present_price
+        self.price_presenter.submit(move_from, move_to, last_price)
+        if self.startup and not self._first_trade_pending and self._mark("first trade received"):
+            self._first_trade_pending = True
+
+    def _present_price(self) -> None:
+        self.price_presenter.present(self.price_widget)
+        if self._first_trade_pending:
+            self._first_trade_pending = False
+            self._mark("first trade on screen")
+
+    def _start_audio_engine(self) -> None:
+        timbre = None
+        # Size-mapped clicks are synthesised, so they replace the stock sounds only when no WAV was asked for
+        if SIZE_TIMBRE and self.sound_bank and not (CLICK_SOUND_PATH or SELL_SOUND_PATH):
+            timbre = TimbreCache(self.sound_names, sample_rate=self.sound_bank.sample_rate)
+        engine = AudioEngine({"buy": self._click_sound, "sell": self._click_sound_sell}, timbre=timbre)
+        import pygame
 
         try:
-            trade_size = float(data["size"])
-            trade_price = float(data["price"])
-        except (ValueError, TypeError) as e:
-            self.stats["invalid_trades"] += 1
-            logger.debug("Invalid trade: %s", e)
+            engine.start()
+        except pygame.error as e:
+            logger.warning("Audio engine unavailable, playing clicks directly: %s", e)
             return
-
-        trade = {
-            "price": trade_price,
-            "size": trade_size,
-            "side": data.get("side", "unknown"),
-            "trade_id": data.get("trade_id", ""),
-            "maker_order_id": data.get("maker_order_id", ""),
-            "taker_order_id": data.get("taker_order_id", ""),
-            "time": data.get("time", ""),
-        }
-
-        # All trades feed the heatmap via recent_trades
-        self.recent_trades.append(trade)
-        self._trades_dirty = True
-
-        # Stats, audio, and price animation are gated by the size filter
-        if trade_size >= self.get_min_trade_size():
-            prev_price = self.stats["last_price"]
-            self.stats["total_trades"] += 1
-            self.stats["last_price"] = trade["price"]
-            self.stats["session_volume"] += trade["size"]
-
-            self.trade_timestamps.append(time.time())
-            self._update_tps()
-            self.stats["avg_trade_size"] = self.stats["session_volume"] / self.stats["total_trades"]
-
-            largest = self.stats["largest_trade"]
-            if not largest or trade["size"] > largest["size"]:
-                self.stats["largest_trade"] = trade.copy()
-
-            if self.stats["session_high"] is None or trade_price > self.stats["session_high"]:
-                self.stats["session_high"] = trade_price
-            if self.stats["session_low"] is None or trade_price < self.stats["session_low"]:
-                self.stats["session_low"] = trade_price
-            self.stats["volume_usd"] += trade_size * trade_price
-            if trade["side"] == "buy":
-                self.stats["buy_volume"] += trade_size
-            else:
-                self.stats["sell_volume"] += trade_size
-
-            self._play_click(trade["side"])
-
-            if prev_price:
-                if trade["price"] > prev_price:
-                    self.price_widget.animate("up")
-                elif trade["price"] < prev_price:
-                    self.price_widget.animate("down")
-
-        self.price_widget.update_price(self.stats["last_price"])
-
-    def _update_tps(self) -> None:
-        now = time.time()
-        while self.trade_timestamps and now - self.trade_timestamps[0] > TPS_WINDOW:
-            self.trade_timestamps.popleft()
-        self.stats["tps"] = len(self.trade_timestamps) / TPS_WINDOW
-        self.stats["highest_tps"] = max(self.stats["highest_tps"], self.stats["tps"])
-
-    def _play_click(self, side: str = "buy") -> None:
+        self.audio_engine = engine
+
+    def _on_trade(self, trade: Trade) -> None:
+        self._play_click(trade.side, trade.size)
+
+    def _set_feed_status(self, text: str) -> None:
+        if self._ingest_thread:
+            self.ui_updates.put(("status", text))
+        elif self.status_header:
+            self.status_header.feed_status = text
+
+    def _drain_ui_updates(self) -> None:
+        view = depth = None
+        for kind, *args in self.ui_updates.drain():
+            if kind == "status" and self.status_header:
+                self.status_header.feed_status = args[0]
+            elif kind == "view":
+                # Only the newest is drawn
+                view = args[0]
+            elif kind == "depth" and self.depth_widget is not None:
+                depth = args[0]
+                self.depth_widget.history.add(*depth[1:])
+        if view is not None:
+            self._view = view
+            self._render_view(view)
+        if depth is not None:
+            self._draw_depth(depth[0])
+
+    async def _run_ingest(self) -> None:
+        """The feed loop plus the views the UI draws from, all on the ingest thread."""
+        publishers = [asyncio.create_task(self._publish_every(STATS_REFRESH_INTERVAL, self._publish_view))]
+        book = self.engine.book
+        if book is not None and book.ladder is not None:
+            publishers.append(asyncio.create_task(self._publish_every(DEPTH_SLICE, self._publish_depth)))
+        try:
+            await self.engine.run()
+        finally:
+            for task in publishers:
+                task.cancel()
+            self._publish_view()
+
+    @staticmethod
+    async def _publish_every(interval: float, publish) -> None:
+        while True:
+            publish()
+            await asyncio.sleep(interval)
+
+    def _publish_view(self) -> None:
+        self.ui_updates.put(("view", self.engine.view(TRADES_TABLE_SIZE)))
+
+    def _publish_depth(self) -> None:
+        with self.engine.lock:
+            column = self.engine.book.depth_column()
+        if column is not None:
+            self.ui_updates.put(("depth", column))
+
+    def _change_engine(self, change, *args) -> bool:
+        """Apply `change(*args)` on whichever thread runs the engine; True if it was queued for the ingest loop.
+
+        A queued change is followed by a fresh view. Once the ingest loop has
+        exited (replay end, gave up reconnecting, crashed) nothing else touches
+        the engine, so the change is applied here and the view built at once.
+        """
+        thread = self._ingest_thread
+        if thread and thread.call_soon(change, *args):
+            thread.call_soon(self._publish_view)
+            return True
+        change(*args)
+        if thread:
+            self._view = self.engine.view(TRADES_TABLE_SIZE)
+        return False
+
+    def _on_ingest_error(self, error: BaseException) -> None:
+        # Called on the ingest thread, which has already logged the traceback
+        self._set_feed_status(f"[bright_red]FEED ERROR: {type(error).__name__}[/]")
+
+    def _play_click(self, side: str = "buy", size: float = 0.0) -> None:
         if not self.audio_enabled:
             return
+        if self.audio_engine:
+            self.audio_engine.submit(side, size)
+            return
         sound = self._click_sound_sell if side == "sell" else self._click_sound
         if sound:
             sound.play()
 
+    def action_next_sound(self, side: str) -> None:
+        """Switch `side` to the next click variation from the in-memory sound bank."""
+        if self.sound_bank is None:
+            return
+        names = variation_names()
+        current = self.sound_names[side]
+        name = names[(names.index(current) + 1) % len(names)] if current in names else names[0]
+        import pygame
+
+        try:
+            sound = self.sound_bank.sound(name)
+        except pygame.error as e:
+            logger.warning("Could not switch %s sound: %s", side, e)
+            return
+        self.sound_names[side] = name
+        if side == "sell":
+            self._click_sound_sell = sound
+        else:
+            self._click_sound = sound
+        if self.audio_engine:
+            self.audio_engine.set_sound(side, sound)
+            if self.audio_engine.timbre:
+                self.audio_engine.timbre.set_variation(side, name)
+        logger.info("%s click: %s", side.capitalize(), name)
+
     def action_toggle_audio(self) -> None:
         self.audio_enabled = not self.audio_enabled
         self.refresh_stats()
@@ -416,93 +827,143 @@ class BTCBeeperApp(App):
     def action_filter_down(self) -> None:
         if self.filter_index > 0:
             self.filter_index -= 1
-            self._trades_dirty = True
             self.refresh_stats()
 
     def action_filter_up(self) -> None:
         if self.filter_index < len(self.FILTER_SIZES) - 1:
             self.filter_index += 1
-            self._trades_dirty = True
             self.refresh_stats()
 
-    def get_min_trade_size(self) -> float:
-        return self.FILTER_SIZES[self.filter_index]
+    def action_next_product(self, step: int) -> None:
+        products = self.engine.products
+        if len(products) < 2:
+            return
+        index = products.index(self.engine.product_id)
+        product_id = products[(index + step) % len(products)]
+        self._expanded_seq = None
+        self.table_updater.reset()
+        # Widgets keyed only by values could skip a redraw when two products happen to match
+        self.render_scheduler.invalidate()
+        self._change_engine(self.engine.set_product, product_id)
+        self.refresh_stats()
+        logger.info("Showing %s", product_id)
 
     def refresh_stats(self) -> None:
-        s = self.stats
-        min_size = self.get_min_trade_size()
+        """Redraw the panels. With the ingest thread this redraws the last view it sent and never takes the engine lock."""
+        if self._ingest_thread:
+            view = self._view
+        else:
+            view = self._view = self.engine.view(TRADES_TABLE_SIZE)
+        if view is not None:
+            self._render_view(view)
+
+    def _render_view(self, view: FeedView) -> None:
+        s = view.stats
+        min_size = view.min_size
+        render = self.render_scheduler.render
 
-        self.price_widget.update_price(s["last_price"])
+        # Tickers move last_price without a trade; the presenter skips the update if nothing changed
+        self.price_presenter.submit(None, None, s["last_price"])
 
         elapsed = int(time.time() - s.get("session_start", time.time()))
-        filtered = [t for t in list(self.recent_trades)[-100:] if t["size"] >= min_size]
-        self.session_widget.update_session(s, elapsed)
-        self.trade_stats_widget.update_trade_stats(s)
-        self.activity_widget.update_activity(s, min_size, self.audio_enabled, filtered[-TRADES_TABLE_SIZE:])
+        filtered = list(view.trades)
+        render(
+            "session",
+            (elapsed, *map(s.get, SESSION_FIELDS)),
+            lambda: self.session_widget.update_session(s, elapsed),
+        )
+        render(
+            "trade_stats",
+            tuple(map(s.get, TRADE_STATS_FIELDS)),
+            lambda: self.trade_stats_widget.update_trade_stats(s),
+        )
+
+        if self._ingest_thread:
+            queue_stats = self.ui_updates.snapshot()
+            s = {**s, "ui_queue_depth": queue_stats["depth"], "ui_dropped": queue_stats["dropped"]}
+        render(
+            "activity",
+            (min_size, self.audio_enabled, [t["seq"] for t in filtered], *map(s.get, ACTIVITY_FIELDS)),
+            lambda: self.activity_widget.update_activity(s, min_size, self.audio_enabled, filtered),
+        )
 
-        msg_age = time.time() - self._last_msg_time if self._last_msg_time else None
+        last_msg_time = view.last_msg_time
+        msg_age = time.time() - last_msg_time if last_msg_time else None
         if msg_age is None:
             conn_status = "[dim]--[/]"
         elif msg_age < 2:
             conn_status = "[bright_green]live[/]"
         else:
             conn_status = f"[bright_yellow]{msg_age:.0f}s ago[/]"
+        audio_status = "[bright_green]ON[/]" if self.audio_enabled else "[bright_red]OFF[/]"
+        header = self.status_header
 
-        self.status_header.feed_status = conn_status
-        self.status_header.audio_status = "[bright_green]ON[/]" if self.audio_enabled else "[bright_red]OFF[/]"
+        product_id = view.product_id
 
-        self._update_trades_table(filtered[-TRADES_TABLE_SIZE:])
-        self._check_bot_activity(filtered[-BOT_DETECTION_WINDOW:])
-        self.heatmap_widget.update_heatmap(self._compute_heatmap_buckets())
+        def draw_header() -> None:
+            header.feed_status = conn_status
+            header.audio_status = audio_status
+            header.product = product_id
 
-    def _update_trades_table(self, trades: list[dict]) -> None:
-        if not self._trades_dirty:
-            return
-        self._trades_dirty = False
-        self.trades_table.clear()
-        self._trade_row_map.clear()
-        self._detail_row_keys.clear()
-        for i, t in enumerate(reversed(trades)):
-            color = "bright_green" if t["side"] == "buy" else "bright_red"
-            rk = self.trades_table.add_row(
-                Text(t["side"].capitalize(), style=color),
-                Text(f"${t['price']:.2f}", style=color),
-                Text(f"{t['size']:.6f}", style=color),
-                key=str(i)
+        # The header's current text is an input too: feed errors write to it outside this tick
+        render("status", (conn_status, audio_status, product_id, header.feed_status, header.audio_status), draw_header)
+
+        book = view.book
+        if self.book_widget is not None and book is not None:
+            render(
+                "book",
+                (book["ready"], book["stale"], book["best_bid"], book["best_ask"], book["bid_depth"], book["ask_depth"]),
+                lambda: self.book_widget.update_book(book),
             )
-            self._trade_row_map[rk] = t
-            if t is self._expanded_trade:
-                self._add_detail_rows(t, i)
 
-    def _add_detail_rows(self, trade: dict, trade_index: int) -> None:
-        detail_data = [
-            ("", "", f"  Trade ID:  {trade.get('trade_id', 'N/A')}"),
-            ("", "", f"  Time:      {trade.get('time', 'N/A')}"),
-            ("", "", f"  Maker ID:  {trade.get('maker_order_id', 'N/A')}"),
-            ("", "", f"  Taker ID:  {trade.get('taker_order_id', 'N/A')}"),
-        ]
-        for j, row in enumerate(detail_data):
-            dk = self.trades_table.add_row(*row, key=f"detail-{trade_index}-{j}")
-            self._detail_row_keys.append(dk)
-
-    def _check_bot_activity(self, trades: list[dict]) -> None:
-        size_counts: dict[float, int] = {}
-        size_prices: dict[float, float] = {}
-        for t in trades:
-            sz = round(t["size"], 4)
-            size_counts[sz] = size_counts.get(sz, 0) + 1
-            size_prices[sz] = t["price"]
-
-        bot_sizes = [sz for sz, cnt in size_counts.items() if cnt >= BOT_DETECTION_THRESHOLD]
-        if bot_sizes:
-            sz = max(bot_sizes, key=lambda x: size_counts[x])
-            self.bot_banner.update(f"[bold]Possible bot: {size_counts[sz]}+ trades of {sz} BTC @ ${size_prices[sz]:,.2f}[/bold]")
+        if self.products_widget is not None:
+            summaries = view.products
+            render(
+                "products",
+                (product_id, *((p["last_price"], p["tps"]) for p in summaries)),
+                lambda: self.products_widget.update_products(summaries, product_id),
+            )
+
+        self._update_trades_table(filtered)
+        self._check_bot_activity(view.bot)
+        buckets = list(view.heatmap)
+        render("heatmap", view.heatmap, lambda: self.heatmap_widget.update_heatmap(buckets))
+
+    def capture_depth(self) -> None:
+        """Add one time slice to the depth heatmap, when the engine runs on the UI loop."""
+        with self.engine.lock:
+            column = self.engine.book.depth_column()
+        if column is not None:
+            self.depth_widget.history.add(*column[1:])
+            self._draw_depth(column[0])
+
+    def _draw_depth(self, mid: float) -> None:
+        # The bucket size never changes, so reading it needs no lock
+        bucket_size = self.engine.book.ladder.bucket_size
+        self.render_scheduler.render(
+            "depth", (self.depth_widget.history.captured,), lambda: self.depth_widget.update_depth(mid, bucket_size),
+        )
+
+    @property
+    def table_updater(self) -> TradesTableUpdater:
+        if self._table_updater is None or self._table_updater.table is not self.trades_table:
+            self._table_updater = TradesTableUpdater(self.trades_table)
+        return self._table_updater
+
+    def _update_trades_table(self, trades: list[dict]) -> None:
+        self.table_updater.update(trades, self._expanded_seq)
+
+    def _check_bot_activity(self, dominant: tuple[float, int, float] | None) -> None:
+        if dominant:
+            sz, count, price = dominant
+            self.bot_banner.update(f"[bold]Possible bot: {count}+ trades of {sz} BTC @ ${price:,.2f}[/bold]")
             self.bot_banner.add_class("active")
             if self.bot_banner_timer:
                 self.bot_banner_timer.stop()
             self.bot_banner_timer = self.set_timer(BOT_BANNER_DURATION, self._hide_bot_banner)
+            self.render_scheduler.invalidate("bot_banner")
         else:
-            self._hide_bot_banner()
+            self.render_scheduler.render("bot_banner", (), self._hide_bot_banner)
 
     def _hide_bot_banner(self) -> None:
         self.bot_banner.update("")
@@ -511,53 +972,29 @@ class BTCBeeperApp(App):
             self.bot_banner_timer.stop()
             self.bot_banner_timer = None
 
-    def _compute_heatmap_buckets(self) -> list[int]:
-        buckets = [0] * (len(self.FILTER_SIZES) + 1)
-        for t in self.recent_trades:
-            buckets[bisect.bisect_right(self.FILTER_SIZES, t["size"])] += 1
-        return buckets
-
     def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
-        if event.row_key in self._detail_row_keys:
+        updater = self.table_updater
+        if event.row_key in updater.detail_keys:
             return
 
-        if self._expanded_trade:
-            for dk in self._detail_row_keys:
-                self.trades_table.remove_row(dk)
-            self._detail_row_keys.clear()
-            if event.row_key not in self._trade_row_map:
-                self._expanded_trade = None
+        if self._expanded_seq is not None:
+            updater.collapse()
+            if event.row_key not in updater.row_map:
+                self._expanded_seq = None
                 return
-            if self._trade_row_map.get(event.row_key) is self._expanded_trade:
+            if updater.row_map[event.row_key]["seq"] == self._expanded_seq:
                 # Toggle off — same row clicked again
-                self._expanded_trade = None
+                self._expanded_seq = None
                 return
             # Different row selected — fall through to expand it
 
-        trade = self._trade_row_map.get(event.row_key)
+        trade = updater.row_map.get(event.row_key)
         if trade is None:
             return
 
-        self._expanded_trade = trade
+        self._expanded_seq = trade["seq"]
         self._rebuild_table_with_detail()
 
     def _rebuild_table_with_detail(self) -> None:
-        min_size = self.get_min_trade_size()
-        filtered = [t for t in list(self.recent_trades)[-100:] if t["size"] >= min_size]
-        trades = filtered[-TRADES_TABLE_SIZE:]
-
-        self.trades_table.clear()
-        self._trade_row_map.clear()
-        self._detail_row_keys.clear()
-
-        for i, t in enumerate(reversed(trades)):
-            color = "bright_green" if t["side"] == "buy" else "bright_red"
-            rk = self.trades_table.add_row(
-                Text(t["side"].capitalize(), style=color),
-                Text(f"${t['price']:.2f}", style=color),
-                Text(f"{t['size']:.6f}", style=color),
-                key=str(i)
-            )
-            self._trade_row_map[rk] = t
-            if t is self._expanded_trade:
-                self._add_detail_rows(t, i)
+        trades = self._view.trades if self._view is not None else ()
+        self.table_updater.rebuild(trades[::-1], self._expanded_seq)
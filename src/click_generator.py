@@ -1,8 +1,13 @@
+import argparse
+import hashlib
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import numpy as np
-from scipy.io import wavfile
 
 SAMPLE_RATE = 44100
 RANDOM_SEED = 42
@@ -21,13 +26,29 @@ CLICK_VARIATIONS = [
 ]
 
 
-def generate_click_sound(params: dict[str, Any], sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+SYNTH_PARAMS = ("duration", "frequency", "sine_amp", "noise_amp", "decay", "double")
+
+
+def params_key(params: dict[str, Any], sample_rate: int = SAMPLE_RATE) -> str:
+    """Stable hash of the parameters that shape a click (the filename does not)."""
+    canonical = json.dumps({k: params[k] for k in SYNTH_PARAMS} | {"sample_rate": sample_rate}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def variant_seed(params: dict[str, Any], sample_rate: int = SAMPLE_RATE) -> int:
+    """Noise seed derived from the click parameters, so a variant renders the same everywhere."""
+    return int(params_key(params, sample_rate)[:8], 16) ^ RANDOM_SEED
+
+
+def generate_click_sound(params: dict[str, Any], sample_rate: int = SAMPLE_RATE,
+                         rng: np.random.Generator | None = None) -> np.ndarray:
     """Generate a click sound from parameters.
     
     Args:
         params: Dictionary with keys: filename, duration, frequency, sine_amp,
                 noise_amp, decay, double
         sample_rate: Audio sample rate (default 44100)
+        rng: Source of the noise component (default: the global np.random state)
     
     Returns:
         numpy array of int16 audio samples
@@ -35,7 +56,7 @@ def generate_click_sound(params: dict[str, Any], sample_rate: int = SAMPLE_RATE)
     t = np.linspace(0, params["duration"], int(sample_rate * params["duration"]), False)
 
     sine_wave = params["sine_amp"] * np.sin(2 * np.pi * params["frequency"] * t) if params["frequency"] > 0 else np.zeros_like(t)
-    noise = params["noise_amp"] * np.random.normal(0, 0.2, t.size)
+    noise = params["noise_amp"] * (rng or np.random).normal(0, 0.2, t.size)
     click = (sine_wave + noise) * np.exp(-params["decay"] * t / params["duration"])
 
     max_amp = np.max(np.abs(click))
@@ -51,16 +72,144 @@ def generate_click_sound(params: dict[str, Any], sample_rate: int = SAMPLE_RATE)
     return click
 
 
-def main():
-    np.random.seed(RANDOM_SEED)
+def render_variant(params: dict[str, Any], sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """generate_click_sound with the variant's own seed, so the output never depends on render order."""
+    return generate_click_sound(params, sample_rate, rng=np.random.default_rng(variant_seed(params, sample_rate)))
+
+
+def _render_group(group: list[dict[str, Any]], sample_rate: int) -> list[np.ndarray]:
+    # Every variant in the group shares a duration, so the whole group is one 2-D array.
+    # Operations mirror generate_click_sound step for step, giving the same samples as render_variant.
+    duration = group[0]["duration"]
+    t = np.linspace(0, duration, int(sample_rate * duration), False)
+
+    def column(key: str) -> np.ndarray:
+        return np.array([params[key] for params in group], dtype=float)[:, None]
 
-    sounds_dir = Path(__file__).parent.parent / "data" / "sounds"
-    sounds_dir.mkdir(parents=True, exist_ok=True)
+    frequency = column("frequency")
+    sine_wave = np.where(frequency > 0, column("sine_amp") * np.sin(2 * np.pi * frequency * t), 0.0)
+    noise = np.stack([
+        np.random.default_rng(variant_seed(params, sample_rate)).normal(0, 0.2, t.size) for params in group
+    ]) * column("noise_amp")
+    click = (sine_wave + noise) * np.exp(-column("decay") * t / duration)
 
-    for params in CLICK_VARIATIONS:
-        click = generate_click_sound(params)
-        output_path = sounds_dir / params["filename"]
-        wavfile.write(str(output_path), SAMPLE_RATE, click)
+    max_amp = np.max(np.abs(click), axis=1, keepdims=True) if t.size else np.zeros((len(group), 1))
+    click = np.divide(click, max_amp, out=click, where=max_amp > 0) * np.where(max_amp > 0, 0.9, 1.0)
+    click = (click * 32767).astype(np.int16)
+
+    silence = np.zeros(int(0.001 * sample_rate), dtype=np.int16)
+    return [
+        np.concatenate([row, silence, row]) if params["double"] else row
+        for row, params in zip(click, group)
+    ]
+
+
+def _render_chunk(variants: list[dict[str, Any]], sample_rate: int) -> list[np.ndarray]:
+    groups: dict[float, list[int]] = {}
+    for i, params in enumerate(variants):
+        groups.setdefault(params["duration"], []).append(i)
+    out: list[np.ndarray] = [None] * len(variants)
+    for indices in groups.values():
+        for i, samples in zip(indices, _render_group([variants[i] for i in indices], sample_rate)):
+            out[i] = samples
+    return out
+
+
+def generate_bank(variants: list[dict[str, Any]], sample_rate: int = SAMPLE_RATE,
+                  workers: int = 1) -> list[np.ndarray]:
+    """Render many variants at once, vectorised per duration and optionally across processes.
+
+    Each variant uses its own seed (see `variant_seed`), so the result is the
+    same as calling `render_variant` on each one, whatever the worker count.
+    """
+    if workers <= 1 or len(variants) < 2 * workers:
+        return _render_chunk(variants, sample_rate)
+    size = -(-len(variants) // workers)
+    chunks = [variants[i:i + size] for i in range(0, len(variants), size)]
+    with ProcessPoolExecutor(workers) as pool:
+        rendered = pool.map(_render_chunk, chunks, itertools.repeat(sample_rate))
+        return [samples for chunk in rendered for samples in chunk]
+
+
+def parameter_grid(frequencies, decays, durations, sine_amp: float = 0.3, noise_amp: float = 0.3,
+                   double: bool = False) -> list[dict[str, Any]]:
+    """Every frequency x decay x duration combination as CLICK_VARIATIONS style dicts."""
+    return [
+        {
+            "filename": f"click_f{frequency:g}_d{decay:g}_t{duration * 1000:g}ms.wav",
+            "duration": duration,
+            "frequency": frequency,
+            "sine_amp": sine_amp,
+            "noise_amp": noise_amp,
+            "decay": decay,
+            "double": double,
+        }
+        for frequency, decay, duration in itertools.product(frequencies, decays, durations)
+    ]
+
+
+def write_bank(path: str | Path, variants: list[dict[str, Any]], samples: list[np.ndarray],
+               sample_rate: int = SAMPLE_RATE) -> None:
+    """Pack rendered variants into one .npz: concatenated samples, offsets and a JSON index of the params."""
+    lengths = np.array([len(s) for s in samples], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    np.savez(
+        path,
+        samples=np.concatenate(samples) if samples else np.zeros(0, dtype=np.int16),
+        offsets=offsets,
+        lengths=lengths,
+        index=np.array(json.dumps({"sample_rate": sample_rate, "variants": variants})),
+    )
+
+
+def read_bank(path: str | Path) -> tuple[list[dict[str, Any]], list[np.ndarray], int]:
+    """Inverse of write_bank: (variants, samples, sample_rate); samples are views into one buffer."""
+    with np.load(path) as bank:
+        index = json.loads(str(bank["index"]))
+        data, offsets, lengths = bank["samples"], bank["offsets"], bank["lengths"]
+    samples = [data[offset:offset + length] for offset, length in zip(offsets, lengths)]
+    return index["variants"], samples, index["sample_rate"]
+
+
+def _floats(text: str) -> list[float]:
+    return [float(value) for value in text.split(",") if value]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render click sounds")
+    parser.add_argument("--out", type=Path, default=Path(__file__).parent.parent / "data" / "sounds",
+                        help="directory for WAV files (default %(default)s)")
+    parser.add_argument("--bank", type=Path, help="write one packed .npz bank instead of WAV files")
+    parser.add_argument("--grid", action="store_true",
+                        help="render the --frequencies x --decays x --durations sweep instead of CLICK_VARIATIONS")
+    parser.add_argument("--frequencies", type=_floats, default="500,1000,2000,4000")
+    parser.add_argument("--decays", type=_floats, default="4,8,12,16")
+    parser.add_argument("--durations", type=_floats, default="0.002,0.004,0.008",
+                        help="seconds, comma separated")
+    parser.add_argument("--workers", type=int, default=1, help="processes to render with")
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    variants = parameter_grid(args.frequencies, args.decays, args.durations) if args.grid else CLICK_VARIATIONS
+
+    start = time.perf_counter()
+    samples = generate_bank(variants, args.sample_rate, workers=args.workers)
+    print(f"Rendered {len(variants)} variants in {time.perf_counter() - start:.2f}s")
+
+    if args.bank:
+        write_bank(args.bank, variants, samples, args.sample_rate)
+        print(f"Generated: {args.bank}")
+        return
+
+    from scipy.io import wavfile
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    for params, click in zip(variants, samples):
+        output_path = args.out / params["filename"]
+        wavfile.write(str(output_path), args.sample_rate, click)
         print(f"Generated: {output_path}")
 
 
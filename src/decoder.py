@@ -0,0 +1,209 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+NO_TRADE_ID = -1
+TRADE_TYPES = ("match", "last_match")
+# Frames we never look inside; dropped on the type sniff without a JSON parse
+SKIPPED_TYPES = frozenset({"heartbeat", "subscriptions"})
+# Coinbase always sends "type" as the first key; other layouts just skip the fast path
+_LEADING_TYPE = re.compile(r'\{\s*"type"\s*:\s*"(\w+)"')
+_LEADING_TYPE_BYTES = re.compile(rb'\{\s*"type"\s*:\s*"(\w+)"')
+# A leading "type" value always falls inside this many characters of the frame
+_SNIFF_WINDOW = 40
+_SKIPPED_NEEDLES = tuple(f'"{t}"' for t in SKIPPED_TYPES)
+_SKIPPED_NEEDLES_BYTES = tuple(n.encode("ascii") for n in _SKIPPED_NEEDLES)
+
+
+class FrameDecodeError(ValueError):
+    """Frame is not valid JSON."""
+
+
+class InvalidTrade(ValueError):
+    """Match frame is missing price/size or they are not numeric."""
+
+
+@dataclass(slots=True)
+class Trade:
+    price: float
+    size: float
+    side: str = "unknown"
+    product_id: str | None = None
+    time: str = ""
+    trade_id: int = NO_TRADE_ID
+    maker_order_id: str = ""
+    taker_order_id: str = ""
+    sequence: int | None = None
+
+
+@dataclass(slots=True)
+class Ticker:
+    price: float
+    product_id: str | None = None
+    sequence: int | None = None
+
+
+@dataclass(slots=True)
+class BookSnapshot:
+    """level2 snapshot; bids and asks are [price, size] string pairs as sent."""
+
+    product_id: str | None
+    bids: list
+    asks: list
+
+
+@dataclass(slots=True)
+class BookUpdate:
+    """l2update; changes are [side, price, size] string triples as sent."""
+
+    product_id: str | None
+    changes: list
+
+
+@dataclass(slots=True)
+class FeedError:
+    message: str
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def trade_from_dict(data: dict) -> Trade:
+    """Build a Trade from a decoded match frame, raising InvalidTrade if unusable."""
+    try:
+        size = float(data["size"])
+        price = float(data["price"])
+    except KeyError as e:
+        raise InvalidTrade("missing price or size field") from e
+    except (ValueError, TypeError) as e:
+        raise InvalidTrade(str(e)) from e
+    get = data.get
+    trade_id = get("trade_id", NO_TRADE_ID)
+    if type(trade_id) is not int:
+        trade_id = _coerce_int(trade_id, NO_TRADE_ID)
+    sequence = get("sequence")
+    if sequence is not None and type(sequence) is not int:
+        sequence = _coerce_int(sequence, None)
+    return Trade(
+        price,
+        size,
+        get("side", "unknown"),
+        get("product_id"),
+        get("time") or "",
+        trade_id,
+        get("maker_order_id") or "",
+        get("taker_order_id") or "",
+        sequence,
+    )
+
+
+def sniff_type(frame: str | bytes) -> str | None:
+    """Return the frame's "type" if it is the leading key, without parsing the JSON."""
+    if isinstance(frame, str):
+        match = _LEADING_TYPE.match(frame)
+        return match[1] if match else None
+    match = _LEADING_TYPE_BYTES.match(frame)
+    return match[1].decode("ascii") if match else None
+
+
+def is_skipped(frame: str | bytes) -> bool:
+    """True for frames of a SKIPPED_TYPES type, checked without parsing the JSON."""
+    head = frame[:_SNIFF_WINDOW]
+    needles = _SKIPPED_NEEDLES if isinstance(frame, str) else _SKIPPED_NEEDLES_BYTES
+    # Substring checks are cheap enough for every frame; only a likely hit pays for the regex
+    for needle in needles:
+        if needle in head:
+            return sniff_type(frame) in SKIPPED_TYPES
+    return False
+
+
+# json.loads without its per-call type checks and whitespace regexes; the C scanner when available
+_scan_once = json.JSONDecoder().scan_once
+
+
+def _stdlib_loads(frame: str | bytes):
+    if isinstance(frame, str):
+        try:
+            data, end = _scan_once(frame, 0)
+        except StopIteration:
+            pass
+        else:
+            if end == len(frame):
+                return data
+    # Bytes, surrounding whitespace, trailing data or no JSON value at all: let json.loads decide
+    return json.loads(frame)
+
+
+def available_backends() -> list[str]:
+    return ["json", "orjson"] if orjson is not None else ["json"]
+
+
+class Decoder:
+    """Turns raw feed frames into Trade / Ticker / BookSnapshot / BookUpdate / FeedError records.
+
+    Heartbeat and subscription frames are recognised by sniffing the "type"
+    value and dropped before any JSON parsing. `backend` is "json", "orjson"
+    or "auto" (orjson when installed, stdlib otherwise).
+    """
+
+    def __init__(self, backend: str = "auto"):
+        if backend == "auto":
+            backend = "orjson" if orjson is not None else "json"
+        if backend not in available_backends():
+            raise ValueError(f"JSON backend {backend!r} is not available")
+        self.backend = backend
+        self._loads = orjson.loads if backend == "orjson" else _stdlib_loads
+        self.skipped = 0
+
+    def loads(self, frame: str | bytes) -> dict:
+        try:
+            data = self._loads(frame)
+        except ValueError as e:
+            raise FrameDecodeError(str(e)) from e
+        if not isinstance(data, dict):
+            raise FrameDecodeError(f"expected a JSON object, got {type(data).__name__}")
+        return data
+
+    def decode(self, frame: str | bytes) -> Trade | Ticker | BookSnapshot | BookUpdate | FeedError | None:
+        """Decode one frame; returns None for frames the app does not use."""
+        if is_skipped(frame):
+            self.skipped += 1
+            return None
+        data = self.loads(frame)
+        msg_type = data.get("type", "")
+        if msg_type in TRADE_TYPES:
+            trade = trade_from_dict(data)
+            if msg_type == "last_match":
+                # Replays the trade before subscribing; its sequence is not a position in this stream
+                trade.sequence = None
+            return trade
+        if msg_type == "ticker":
+            try:
+                price = float(data.get("price", 0))
+            except (TypeError, ValueError):
+                price = 0.0
+            sequence = data.get("sequence")
+            if sequence is not None and type(sequence) is not int:
+                sequence = _coerce_int(sequence, None)
+            return Ticker(price, data.get("product_id"), sequence)
+        if msg_type == "l2update":
+            return BookUpdate(data.get("product_id"), data.get("changes") or [])
+        if msg_type == "snapshot":
+            return BookSnapshot(data.get("product_id"), data.get("bids") or [], data.get("asks") or [])
+        if msg_type == "error":
+            return FeedError(data.get("message", "Unknown error"))
+        return None
+
+
+def decoder_from_env() -> Decoder:
+    return Decoder(os.getenv("BTCBEEPER_JSON_BACKEND", "auto"))
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+
+if __package__:
+    from .order_book import OrderBook
+else:
+    from order_book import OrderBook
+
+DEPTH_COLUMNS = int(os.getenv("BTCBEEPER_DEPTH_COLUMNS", "60"))
+DEPTH_ROWS = int(os.getenv("BTCBEEPER_DEPTH_ROWS", "12"))
+# Seconds of book history per column
+DEPTH_SLICE = float(os.getenv("BTCBEEPER_DEPTH_SLICE", "1"))
+SHADES = " ░▒▓█"
+BID_COLORS = ("#1b5e20", "#2e7d32", "#43a047", "#69f0ae")
+ASK_COLORS = ("#7f1d1d", "#c62828", "#e53935", "#ff8a80")
+# Below the smallest size increment; emptied buckets keep float residue around 1e-15
+EMPTY_SIZE = 1e-8
+
+
+def _palette() -> np.ndarray:
+    # Index side * len(SHADES) + shade; shade 0 is an empty cell on either side
+    cells = []
+    for colors in (BID_COLORS, ASK_COLORS):
+        cells.append(" ")
+        cells += [f"[{color}]{shade}[/]" for shade, color in zip(SHADES[1:], colors)]
+    return np.array(cells, dtype=object)
+
+
+PALETTE = _palette()
+
+
+def quantize(bids: np.ndarray, asks: np.ndarray, reference: float | None = None) -> np.ndarray:
+    """Palette index per cell: the larger side's colour, shaded by sqrt(size / reference).
+
+    `reference` defaults to the largest cell, so the busiest level is always
+    the darkest shade.
+    """
+    larger = np.maximum(bids, asks)
+    if reference is None:
+        reference = float(larger.max()) if larger.size else 0.0
+    if reference < EMPTY_SIZE:
+        return np.zeros(larger.shape, dtype=np.intp)
+    shades = len(SHADES) - 1
+    level = np.ceil(np.sqrt(np.clip(larger / reference, 0.0, 1.0)) * shades).astype(np.intp)
+    level[larger < EMPTY_SIZE] = 0
+    return np.where(asks > bids, len(SHADES), 0) + level
+
+
+class DepthHistory:
+    """Ring matrix of resting size per price bucket (rows) per time slice (columns).
+
+    `capture` copies the book's DepthLadder into the next column (`add`
+    takes a column already copied, e.g. on the ingest thread); rows are
+    the ladder's buckets, so a column costs a fixed-size copy however many
+    levels the book has. When the ladder recentres, older columns shift to
+    keep each row on the same price. `render` picks the `rows` buckets
+    around the mid, orders the columns oldest to newest and maps them to
+    coloured block characters with NumPy.
+    """
+
+    def __init__(self, buckets: int, columns: int = DEPTH_COLUMNS):
+        if columns <= 0:
+            raise ValueError("columns must be positive")
+        self.buckets = buckets
+        self.columns = columns
+        self.bids = np.zeros((buckets, columns), dtype=np.float32)
+        self.asks = np.zeros((buckets, columns), dtype=np.float32)
+        self.origin: int | None = None
+        self.head = columns - 1
+        self.captured = 0
+
+    def _shift(self, offset: int) -> None:
+        # New row r shows what old row r + offset showed
+        for grid in (self.bids, self.asks):
+            if abs(offset) >= self.buckets:
+                grid[:] = 0
+            elif offset > 0:
+                grid[:-offset] = grid[offset:]
+                grid[-offset:] = 0
+            elif offset < 0:
+                grid[-offset:] = grid[:offset]
+                grid[:-offset] = 0
+
+    def capture(self, book: OrderBook) -> bool:
+        """Add a column from the book's ladder; False if the book has nothing to show yet."""
+        column = book.depth_column()
+        if column is None:
+            return False
+        self.add(*column[1:])
+        return True
+
+    def add(self, origin: int, bids: list[float], asks: list[float]) -> None:
+        """Add a column of bucket totals whose first bucket is `origin`, e.g. from OrderBook.depth_column."""
+        if self.origin is not None and origin != self.origin:
+            self._shift(origin - self.origin)
+        self.origin = origin
+        self.head = (self.head + 1) % self.columns
+        self.bids[:, self.head] = bids
+        self.asks[:, self.head] = asks
+        self.captured += 1
+
+    def window(self, center_bucket: int, rows: int) -> tuple[int, np.ndarray, np.ndarray]:
+        """(first bucket, bids, asks) for `rows` buckets around `center_bucket`, columns oldest first."""
+        rows = min(rows, self.buckets)
+        first = min(max(center_bucket - self.origin - rows // 2, 0), self.buckets - rows)
+        order = (np.arange(1, self.columns + 1) + self.head) % self.columns
+        rows_slice = slice(first, first + rows)
+        return self.origin + first, self.bids[rows_slice][:, order], self.asks[rows_slice][:, order]
+
+    def render(self, mid: float, bucket_size: float, rows: int = DEPTH_ROWS) -> list[str]:
+        """Markup lines, highest price first, each a price label then one cell per column."""
+        if self.origin is None:
+            return []
+        first, bids, asks = self.window(int(mid // bucket_size), rows)
+        cells = PALETTE[quantize(bids, asks)]
+        mid_row = int(mid // bucket_size) - first
+        lines = []
+        for row in range(len(cells) - 1, -1, -1):
+            price = (first + row) * bucket_size
+            label = f"[bold]{price:>9,.0f}[/]" if row == mid_row else f"[dim]{price:>9,.0f}[/]"
+            lines.append(f"{label} {''.join(cells[row].tolist())}")
+        return lines
@@ -0,0 +1,614 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+import websockets
+import websockets.exceptions
+
+if __package__:
+    from .decoder import (
+        BookSnapshot,
+        BookUpdate,
+        FeedError,
+        FrameDecodeError,
+        InvalidTrade,
+        Ticker,
+        Trade,
+        decoder_from_env,
+        trade_from_dict,
+    )
+    from .order_book import BOOK_CHANNEL, OrderBook
+    from .recorder import FrameRecorder, ReplaySource
+    from .stats import SEQ_GAP, SEQ_OK, BatchCounters, BotDetector, FilterLevelStats, SequenceTracker
+    from .tape import PRODUCT_ID, PRODUCT_IDS, SIZE_BINS, TapeWriter
+    from .trade_ring import NO_TRADE_ID, TradeRing, parse_exchange_time
+else:
+    from decoder import (
+        BookSnapshot,
+        BookUpdate,
+        FeedError,
+        FrameDecodeError,
+        InvalidTrade,
+        Ticker,
+        Trade,
+        decoder_from_env,
+        trade_from_dict,
+    )
+    from order_book import BOOK_CHANNEL, OrderBook
+    from recorder import FrameRecorder, ReplaySource
+    from stats import SEQ_GAP, SEQ_OK, BatchCounters, BotDetector, FilterLevelStats, SequenceTracker
+    from tape import PRODUCT_ID, PRODUCT_IDS, SIZE_BINS, TapeWriter
+    from trade_ring import NO_TRADE_ID, TradeRing, parse_exchange_time
+
+logger = logging.getLogger(__name__)
+
+COINBASE_WS_URL = os.getenv("COINBASE_WS_URL", "wss://ws-feed.exchange.coinbase.com")
+RECORD_PATH = os.getenv("BTCBEEPER_RECORD_PATH")
+REPLAY_PATH = os.getenv("BTCBEEPER_REPLAY_PATH")
+REPLAY_SPEED = os.getenv("BTCBEEPER_REPLAY_SPEED", "1")
+
+TPS_WINDOW = 10
+MAX_RECENT_TRADES = int(os.getenv("BTCBEEPER_MAX_RECENT_TRADES", "1000"))
+RECENT_FILTER_LOOKBACK = 100
+MAX_RECONNECT_ATTEMPTS = 5
+RECONNECT_DELAY = 2
+BOT_DETECTION_THRESHOLD = 5
+BOT_DETECTION_WINDOW = int(os.getenv("BTCBEEPER_BOT_WINDOW", "50"))
+BOT_DETECTION_MAX_AGE = float(os.getenv("BTCBEEPER_BOT_WINDOW_SECS", "0")) or None
+INGEST_MAX_BATCH = int(os.getenv("BTCBEEPER_MAX_BATCH", "256"))
+INGEST_LATENCY_BUDGET = float(os.getenv("BTCBEEPER_BATCH_BUDGET", "0.02"))
+# Trade IDs remembered per product to spot a match delivered twice
+RECENT_TRADE_IDS = 1024
+
+
+def _buffered_frames(ws) -> int:
+    # websockets' legacy protocol exposes received-but-unread frames as ws.messages
+    try:
+        return len(ws.messages)
+    except (AttributeError, TypeError):
+        return 0
+
+
+class ProductShard:
+    """Session stats, recent trades and bot windows for one product."""
+
+    def __init__(self, product_id: str, filter_sizes: list[float]):
+        self.product_id = product_id
+        self.stats = {
+            "total_trades": 0,
+            "last_price": 0.0,
+            "session_volume": 0.0,
+            "avg_trade_size": 0.0,
+            "largest_trade": None,
+            "tps": 0.0,
+            "highest_tps": 0.0,
+            "parse_errors": 0,
+            "invalid_trades": 0,
+            "session_start": time.time(),
+            "session_high": None,
+            "session_low": None,
+            "volume_usd": 0.0,
+            "buy_volume": 0.0,
+            "sell_volume": 0.0,
+        }
+        self.sequence = SequenceTracker()
+        self.stats.update(self.sequence.counts())
+        self.recent_trades = TradeRing(MAX_RECENT_TRADES, size_bins=filter_sizes)
+        self.filter_stats = FilterLevelStats(filter_sizes)
+        self.bot_detectors = [
+            BotDetector(max_trades=BOT_DETECTION_WINDOW, max_age=BOT_DETECTION_MAX_AGE)
+            for _ in filter_sizes
+        ]
+        self.trade_timestamps: deque[float] = deque()
+        self._recent_ids: deque[int] = deque()
+        self._recent_id_set: set[int] = set()
+
+    def is_repeat(self, trade_id: int) -> bool:
+        """True if this trade ID was seen recently; otherwise remember it."""
+        if trade_id == NO_TRADE_ID:
+            return False
+        seen = self._recent_id_set
+        if trade_id in seen:
+            return True
+        ids = self._recent_ids
+        ids.append(trade_id)
+        seen.add(trade_id)
+        if len(ids) > RECENT_TRADE_IDS:
+            seen.discard(ids.popleft())
+        return False
+
+    def update_tps(self, now: float) -> None:
+        timestamps = self.trade_timestamps
+        while timestamps and now - timestamps[0] > TPS_WINDOW:
+            timestamps.popleft()
+        stats = self.stats
+        stats["tps"] = len(timestamps) / TPS_WINDOW
+        if stats["tps"] > stats["highest_tps"]:
+            stats["highest_tps"] = stats["tps"]
+
+
+@dataclass(frozen=True, slots=True)
+class FeedView:
+    """Everything the UI draws, copied out of the engine in one go by `FeedEngine.view`.
+
+    Nothing in it is shared with the engine, so it can be handed to another
+    thread and rendered without the engine lock.
+    """
+
+    product_id: str
+    min_size: float
+    stats: Mapping
+    # Oldest first, as returned by recent_filtered
+    trades: tuple[dict, ...]
+    heatmap: tuple[int, ...]
+    bot: tuple[float, int, float] | None
+    book: dict | None
+    # One summary per product when following more than one, else empty
+    products: tuple[dict, ...]
+    last_msg_time: float
+
+
+class FeedEngine:
+    """Feed connection, decoding and session stats, independent of any UI.
+
+    Every subscribed product gets its own ProductShard, looked up by
+    product_id as frames arrive. One shard is active: `stats`,
+    `recent_trades` and the other per-product attributes refer to it, and
+    only its trades reach the callbacks. The other shards keep counting in
+    the background so switching product is instant.
+
+    The engine reports what a front end may want to show through optional
+    callbacks: `on_trade(trade)` for each trade that passes the current size
+    filter, `on_price(move_from, move_to, last_price)` once per batch (or per
+    trade outside a batch), `on_status(text)` for connection state and
+    `on_connect()` once each connection is subscribed. They are called on
+    whichever thread runs the engine.
+    """
+
+    FILTER_SIZES = SIZE_BINS
+
+    def __init__(
+        self,
+        recorder: FrameRecorder | None = None,
+        replay: ReplaySource | None = None,
+        on_trade: Callable[[Trade], None] | None = None,
+        on_price: Callable[[float | None, float | None, float], None] | None = None,
+        on_status: Callable[[str], None] | None = None,
+        on_connect: Callable[[], None] | None = None,
+        products: list[str] | None = None,
+        book: OrderBook | None = None,
+        tape: TapeWriter | None = None,
+    ):
+        self.recorder = recorder
+        # Every trade of every product goes to the tape, whatever the size filter
+        self.tape = tape
+        self.replay = replay
+        self.on_trade = on_trade
+        self.on_price = on_price
+        self.on_status = on_status
+        self.on_connect = on_connect
+        self.filter_index = 0
+        self.products = list(PRODUCT_IDS if products is None else products)
+        if not self.products:
+            raise ValueError("at least one product is required")
+        self.shards = {product_id: ProductShard(product_id, self.FILTER_SIZES) for product_id in self.products}
+        self.shard = self.shards[self.products[0]]
+        # Optional level2 book, for a single product, updated under `lock` like the shards
+        self.book = book
+        # Frames that fail to decode can't be attributed to a product; these are feed wide
+        self.parse_errors = 0
+        self.invalid_trades = 0
+        self.batch_counters = BatchCounters()
+        self.decoder = decoder_from_env()
+        self.last_msg_time: float = 0.0
+        # Set whenever a trade lands in recent_trades; `view` clears it and reuses its last trades until then
+        self.trades_dirty: bool = False
+        self._view_trades: tuple[dict, ...] | None = None
+        # Guards trade state when the engine runs on its own thread; uncontended otherwise
+        self.lock = threading.RLock()
+        self._deferring_ui: bool = False
+        self._pending_move_from: float | None = None
+        self._pending_move_to: float | None = None
+        # Gap counts at the last log_gap_summary, per product
+        self._gaps_logged: dict[str, tuple[int, int, int, int]] = {}
+
+    @property
+    def product_id(self) -> str:
+        return self.shard.product_id
+
+    @property
+    def stats(self) -> dict:
+        return self.shard.stats
+
+    @stats.setter
+    def stats(self, value: dict) -> None:
+        self.shard.stats = value
+
+    @property
+    def recent_trades(self) -> TradeRing:
+        return self.shard.recent_trades
+
+    @property
+    def filter_stats(self) -> FilterLevelStats:
+        return self.shard.filter_stats
+
+    @property
+    def bot_detectors(self) -> list[BotDetector]:
+        return self.shard.bot_detectors
+
+    @property
+    def trade_timestamps(self) -> deque:
+        return self.shard.trade_timestamps
+
+    @trade_timestamps.setter
+    def trade_timestamps(self, value: deque) -> None:
+        self.shard.trade_timestamps = value
+
+    def set_product(self, product_id: str) -> None:
+        """Make `product_id` the product whose stats and trades are shown and reported."""
+        with self.lock:
+            shard = self.shards[product_id]
+            shard.stats.update(shard.filter_stats.level(self.filter_index))
+            shard.stats["parse_errors"] = self.parse_errors
+            shard.stats["invalid_trades"] = self.invalid_trades
+            self.shard = shard
+            self.trades_dirty = True
+
+    def _count_error(self, key: str) -> None:
+        if key == "parse_errors":
+            self.parse_errors += 1
+        else:
+            self.invalid_trades += 1
+        self.stats[key] += 1
+
+    def _set_status(self, text: str) -> None:
+        if self.on_status:
+            self.on_status(text)
+
+    def _connect(self):
+        if self.replay:
+            return self.replay.connect()
+        return websockets.connect(COINBASE_WS_URL, ping_interval=10, ping_timeout=5)
+
+    async def run(self) -> None:
+        reconnect_attempts = 0
+        channels: list = ["matches", "ticker", "heartbeat"]
+        if self.book:
+            channels.append({"name": BOOK_CHANNEL, "product_ids": [self.book.product_id]})
+        subscribe_msg = json.dumps({
+            "type": "subscribe",
+            "product_ids": self.products,
+            "channels": channels,
+        })
+
+        try:
+            while reconnect_attempts < MAX_RECONNECT_ATTEMPTS:
+                try:
+                    async with self._connect() as ws:
+                        await ws.send(subscribe_msg)
+                        reconnect_attempts = 0
+                        # Trade IDs carry on from wherever the feed is now, not from the last connection
+                        for shard in self.shards.values():
+                            shard.sequence.reset()
+                        if self.book:
+                            # Changes missed while disconnected would corrupt it; the new snapshot rebuilds it
+                            self.book.clear()
+                        self.last_msg_time = time.time()
+                        logger.info("Connected to %s", self.replay.path if self.replay else COINBASE_WS_URL)
+                        if self.on_connect:
+                            self.on_connect()
+                        frames = aiter(ws)
+                        async for message in frames:
+                            batch = await self.drain_batch(ws, frames, message)
+                            now = time.time()
+                            if self.last_msg_time and now - self.last_msg_time > 2:
+                                logger.info("Message gap of %.1fs", now - self.last_msg_time)
+                            self.last_msg_time = now
+                            if self.recorder:
+                                self.recorder.write_many(batch, now)
+                            self.process_batch(batch)
+                    if self.replay and self.replay.finished:
+                        logger.info("Replay finished after %d frames", self.replay.frames_replayed)
+                        self._set_status("[bright_yellow]REPLAY END[/]")
+                        return
+                except (websockets.exceptions.WebSocketException, ConnectionError, OSError) as e:
+                    reconnect_attempts += 1
+                    logger.warning("Connection error: %s (attempt %d/%d)", e, reconnect_attempts, MAX_RECONNECT_ATTEMPTS)
+                    self._set_status(f"[bright_red]ERR {reconnect_attempts}/{MAX_RECONNECT_ATTEMPTS}[/]")
+                    if reconnect_attempts < MAX_RECONNECT_ATTEMPTS:
+                        delay = min(RECONNECT_DELAY * 2 ** reconnect_attempts, 60)
+                        await asyncio.sleep(delay)
+                    else:
+                        logger.error("Max reconnection attempts reached, giving up")
+                        self._set_status("[bright_red]DISCONNECTED[/]")
+        finally:
+            # However the loop ends: replay end, giving up, cancellation or an unexpected error
+            logger.info("Ingest batches: %s", self.batch_counters.snapshot())
+
+    async def drain_batch(self, ws, frames, first: str) -> list[str]:
+        # Pull whatever the connection has already buffered, bounded by size and latency
+        batch = [first]
+        deadline = time.monotonic() + INGEST_LATENCY_BUDGET
+        while len(batch) < INGEST_MAX_BATCH and _buffered_frames(ws) and time.monotonic() < deadline:
+            try:
+                batch.append(await anext(frames))
+            except StopAsyncIteration:
+                break
+        return batch
+
+    def process_batch(self, batch: list[str]) -> None:
+        with self.lock:
+            self.batch_counters.record(len(batch))
+            self._deferring_ui = True
+            try:
+                for message in batch:
+                    self.process_message(message)
+            finally:
+                self._deferring_ui = False
+            move = (self._pending_move_from, self._pending_move_to, self.stats["last_price"])
+            self._pending_move_from = self._pending_move_to = None
+        if move[1] is not None and self.on_price:
+            self.on_price(*move)
+
+    def process_message(self, message: str) -> None:
+        try:
+            record = self.decoder.decode(message)
+        except FrameDecodeError as e:
+            self._count_error("parse_errors")
+            logger.debug("JSON parse error: %s", e)
+            return
+        except InvalidTrade as e:
+            self._count_error("invalid_trades")
+            logger.debug("Invalid trade: %s", e)
+            return
+
+        if record is None:
+            return
+        product_id = getattr(record, "product_id", None)
+        shard = self.shards.get(product_id) if product_id is not None else self.shard
+        if shard is None:
+            return
+        if isinstance(record, Trade):
+            # Coinbase's match sequence numbers skip whatever went to other channels; trade IDs rise by one per match
+            if record.trade_id != NO_TRADE_ID:
+                self._check_trade_id(shard, record.trade_id)
+            if shard.is_repeat(record.trade_id):
+                logger.debug("%s repeated trade %d dropped", shard.product_id, record.trade_id)
+                return
+            if shard is self.shard:
+                self.handle_trade(record)
+            else:
+                self._handle_background_trade(record, shard)
+        elif isinstance(record, BookUpdate):
+            if self.book and record.product_id == self.book.product_id:
+                self.book.apply_changes(record.changes)
+        elif isinstance(record, Ticker):
+            if record.price > 0:
+                shard.stats["last_price"] = record.price
+        elif isinstance(record, BookSnapshot):
+            if self.book and record.product_id == self.book.product_id:
+                self.book.apply_snapshot(record.bids, record.asks)
+        elif isinstance(record, FeedError):
+            self._set_status(f"[Error]: {record.message}")
+
+    def _check_trade_id(self, shard: ProductShard, trade_id: int) -> None:
+        """Account for a match's trade ID; the counts are for display only."""
+        tracker = shard.sequence
+        status = tracker.observe(trade_id)
+        if status == SEQ_OK:
+            return
+        shard.stats.update(tracker.counts())
+        if status == SEQ_GAP:
+            # Per gap, so DEBUG: a lossy feed would otherwise flood the log; log_gap_summary reports at INFO
+            logger.debug(
+                "%s trade ID gap: %d missing before %d (%d gaps, %d missing this session)",
+                shard.product_id, tracker.last_gap, trade_id, tracker.gaps, tracker.missing,
+            )
+        else:
+            logger.debug("%s %s match, trade ID %d", shard.product_id, status, trade_id)
+
+    def log_gap_summary(self) -> None:
+        """Log each product's trade ID gap counts at INFO, if they changed since the last summary."""
+        with self.lock:
+            for product_id, shard in self.shards.items():
+                tracker = shard.sequence
+                counts = (tracker.gaps, tracker.missing, tracker.late, tracker.duplicates)
+                if counts == self._gaps_logged.get(product_id, (0, 0, 0, 0)):
+                    continue
+                self._gaps_logged[product_id] = counts
+                logger.info(
+                    "%s trade ID gaps: %d (%d missing, largest %d), %d late, %d duplicates",
+                    product_id, tracker.gaps, tracker.missing, tracker.largest_gap, tracker.late, tracker.duplicates,
+                )
+
+    def handle_trade(self, trade: Trade | dict) -> None:
+        if not isinstance(trade, Trade):
+            try:
+                trade = trade_from_dict(trade)
+            except InvalidTrade as e:
+                self._count_error("invalid_trades")
+                logger.debug("Invalid trade: %s", e)
+                return
+        shard = self.shard
+        if trade.product_id is not None and trade.product_id != shard.product_id:
+            other = self.shards.get(trade.product_id)
+            if other is not None:
+                self._handle_background_trade(trade, other)
+            return
+
+        now = time.time()
+        passed_levels = self._record_trade(trade, shard, now)
+        self.trades_dirty = True
+
+        # Stats, audio, and price animation are gated by the size filter
+        stats = shard.stats
+        move_from = move_to = None
+        if passed_levels > self.filter_index:
+            prev_price = stats["last_price"]
+            stats["last_price"] = trade.price
+            stats.update(shard.filter_stats.level(self.filter_index))
+
+            shard.trade_timestamps.append(now)
+            shard.update_tps(now)
+
+            if self.on_trade:
+                self.on_trade(trade)
+
+            if self._deferring_ui:
+                # Net move over the batch is reported once at the end of process_batch
+                if self._pending_move_to is None:
+                    self._pending_move_from = prev_price
+                self._pending_move_to = trade.price
+            else:
+                move_from, move_to = prev_price, trade.price
+
+        if not self._deferring_ui and self.on_price:
+            self.on_price(move_from, move_to, stats["last_price"])
+
+    def _record_trade(self, trade: Trade, shard: ProductShard, now: float) -> int:
+        """Add a trade to the shard's ring, filter levels and bot windows; returns the levels it passed."""
+        trade_price = trade.price
+        trade_size = trade.size
+        exchange_time = parse_exchange_time(trade.time)
+
+        # All trades feed the heatmap via recent_trades
+        shard.recent_trades.append(
+            trade_price,
+            trade_size,
+            trade.side,
+            exchange_time,
+            trade.trade_id,
+            trade.maker_order_id,
+            trade.taker_order_id,
+        )
+        if self.tape is not None:
+            # NaN != NaN: trades without a usable exchange time are stamped with when they arrived
+            tape_time = exchange_time if exchange_time == exchange_time else now
+            self.tape.append(shard.product_id, tape_time, trade_price, trade_size, trade.side, trade.trade_id)
+
+        # Session stats and bot windows are kept for every filter level; only the current one is shown
+        passed_levels = shard.filter_stats.add(trade_price, trade_size, trade.side)
+        for detector in shard.bot_detectors[:passed_levels]:
+            detector.add(trade_size, trade_price, now)
+        return passed_levels
+
+    def _handle_background_trade(self, trade: Trade, shard: ProductShard) -> None:
+        # Same bookkeeping as the active product, without any UI callbacks
+        now = time.time()
+        if self._record_trade(trade, shard, now) > self.filter_index:
+            stats = shard.stats
+            stats["last_price"] = trade.price
+            stats.update(shard.filter_stats.level(self.filter_index))
+            shard.trade_timestamps.append(now)
+            shard.update_tps(now)
+
+    def update_tps(self) -> None:
+        self.shard.update_tps(time.time())
+
+    def product_summaries(self) -> list[dict]:
+        """Price, rate and totals for every product at the current filter level, in subscription order."""
+        now = time.time()
+        summaries = []
+        with self.lock:
+            for product_id, shard in self.shards.items():
+                shard.update_tps(now)
+                stats = shard.stats
+                summaries.append({
+                    "product_id": product_id,
+                    "last_price": stats["last_price"],
+                    "tps": stats["tps"],
+                    "total_trades": stats["total_trades"],
+                    "session_volume": stats["session_volume"],
+                })
+        return summaries
+
+    def set_filter(self, index: int) -> None:
+        with self.lock:
+            self.filter_index = index
+            # Background products are summarised at the filter level too, not only the one on screen
+            for shard in self.shards.values():
+                shard.stats.update(shard.filter_stats.level(index))
+            self.trades_dirty = True
+
+    def min_trade_size(self) -> float:
+        return self.FILTER_SIZES[self.filter_index]
+
+    def recent_filtered(self, limit: int) -> list[dict]:
+        seqs = self.recent_trades.tail_seqs_where_size_at_least(self.min_trade_size(), RECENT_FILTER_LOOKBACK)
+        return [self.recent_trades.get(seq) for seq in seqs[-limit:]]
+
+    def heatmap_buckets(self) -> list[int]:
+        return self.recent_trades.bucket_counts()
+
+    def bot_activity(self) -> tuple[float, int, float] | None:
+        """(size, count, last price) of a likely bot at the current filter level, if any."""
+        detector = self.bot_detectors[self.filter_index]
+        detector.expire(time.time())
+        dominant = detector.dominant()
+        if dominant and dominant[1] >= BOT_DETECTION_THRESHOLD:
+            return dominant
+        return None
+
+    def view(self, trades_limit: int) -> FeedView:
+        """Copy what the UI shows, with the newest `trades_limit` trades that pass the filter."""
+        with self.lock:
+            if self.trades_dirty or self._view_trades is None:
+                self.trades_dirty = False
+                self._view_trades = tuple(self.recent_filtered(trades_limit))
+            book = self.book
+            return FeedView(
+                product_id=self.product_id,
+                min_size=self.min_trade_size(),
+                stats=MappingProxyType(dict(self.stats)),
+                trades=self._view_trades,
+                heatmap=tuple(self.heatmap_buckets()),
+                bot=self.bot_activity(),
+                book=book.snapshot() if book is not None else None,
+                products=tuple(self.product_summaries()) if len(self.shards) > 1 else (),
+                last_msg_time=self.last_msg_time,
+            )
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable summary of the session at the current filter level."""
+        with self.lock:
+            s = self.stats
+            now = time.time()
+            bot = self.bot_activity()
+            volume = s.get("session_volume", 0.0)
+            snapshot = {
+                "time": now,
+                "product_id": self.product_id,
+                "uptime": now - s.get("session_start", now),
+                "min_size": self.min_trade_size(),
+                "last_price": s["last_price"],
+                "total_trades": s["total_trades"],
+                "tps": s["tps"],
+                "highest_tps": s["highest_tps"],
+                "session_high": s.get("session_high"),
+                "session_low": s.get("session_low"),
+                "session_volume": volume,
+                "buy_volume": s.get("buy_volume", 0.0),
+                "sell_volume": s.get("sell_volume", 0.0),
+                "volume_usd": s.get("volume_usd", 0.0),
+                "vwap": s.get("volume_usd", 0.0) / volume if volume else None,
+                "largest_trade": s.get("largest_trade"),
+                "parse_errors": s["parse_errors"],
+                "invalid_trades": s["invalid_trades"],
+                "sequence": self.shard.sequence.snapshot(),
+                "book": self.book.snapshot() if self.book else None,
+                "tape": self.tape.snapshot() if self.tape else None,
+                "heatmap": self.heatmap_buckets(),
+                "bot": {"size": bot[0], "count": bot[1], "price": bot[2]} if bot else None,
+                "batches": self.batch_counters.snapshot(),
+                "last_msg_age": now - self.last_msg_time if self.last_msg_time else None,
+            }
+            if len(self.shards) > 1:
+                snapshot["products"] = self.product_summaries()
+            return snapshot
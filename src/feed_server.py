@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Local synthetic feed speaking the subset of the Coinbase protocol BTCBeeper uses.
+
+Run it and point the app at it:
+
+    python -m src.feed_server --tps 500 --burst bursty --port 8765
+    COINBASE_WS_URL=ws://127.0.0.1:8765 python -m src.main
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+BURST_PROFILES = ("steady", "bursty", "spike", "ramp")
+SIZE_DISTRIBUTIONS = ("lognormal", "uniform", "fixed", "bot")
+TICK_INTERVAL = 0.01
+BOOK_CHANNELS = ("level2", "level2_batch")
+# Coarser than the exchange's 0.01 so the synthetic book keeps up with the trade price walk
+BOOK_TICK = 1.0
+SUBSCRIBE_TIMEOUT = 10.0
+BOT_SIZE = 0.0123
+
+
+@dataclass
+class FeedProfile:
+    """How fast, how bursty and how dirty the synthetic feed is.
+
+    `tps` is the base trade rate of each subscribed product. During a burst the rate is multiplied by
+    `burst_factor`: "bursty" repeats a `burst_length` second burst every
+    `burst_period` seconds, "spike" fires it once after one period, and
+    "ramp" climbs linearly from tps to tps * burst_factor over one period
+    and holds there. `malformed_rate` is the fraction of trade frames
+    replaced by broken ones, `drop_rate` the fraction of trade and ticker
+    frames generated but never sent (a dropped match leaves a trade ID gap;
+    l2update frames are always sent), and `disconnect_after`
+    closes each connection abnormally after that many seconds. Clients that
+    subscribe to a level2 channel get a `book_levels` deep snapshot, then
+    `book_updates` l2update frames per trade.
+    """
+
+    tps: float = 50.0
+    burst: str = "steady"
+    burst_factor: float = 10.0
+    burst_period: float = 10.0
+    burst_length: float = 1.0
+    sizes: str = "lognormal"
+    mean_size: float = 0.05
+    malformed_rate: float = 0.0
+    drop_rate: float = 0.0
+    ticker_every: int = 10
+    heartbeat_interval: float = 1.0
+    book_levels: int = 200
+    book_updates: int = 5
+    disconnect_after: float | None = None
+    # Streamed when a subscribe names no products
+    product_id: str = "BTC-USD"
+    start_price: float = 60000.0
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.burst not in BURST_PROFILES:
+            raise ValueError(f"burst must be one of {BURST_PROFILES}, got {self.burst!r}")
+        if self.sizes not in SIZE_DISTRIBUTIONS:
+            raise ValueError(f"sizes must be one of {SIZE_DISTRIBUTIONS}, got {self.sizes!r}")
+        if self.tps < 0:
+            raise ValueError("tps must be >= 0")
+        if not 0 <= self.malformed_rate <= 1:
+            raise ValueError("malformed_rate must be between 0 and 1")
+        if not 0 <= self.drop_rate < 1:
+            raise ValueError("drop_rate must be at least 0 and below 1")
+
+    def rate_at(self, elapsed: float) -> float:
+        """Target trades/sec `elapsed` seconds into a connection."""
+        peak = self.tps * self.burst_factor
+        if self.burst == "bursty":
+            return peak if elapsed % self.burst_period < self.burst_length else self.tps
+        if self.burst == "spike":
+            return peak if self.burst_period <= elapsed < self.burst_period + self.burst_length else self.tps
+        if self.burst == "ramp":
+            return self.tps + (peak - self.tps) * min(elapsed / self.burst_period, 1.0)
+        return self.tps
+
+
+class FrameGenerator:
+    """Deterministic (seeded) source of match, ticker, heartbeat, level2 and malformed frames for one product."""
+
+    def __init__(self, profile: FeedProfile, book: bool = False, product_id: str | None = None, seed: int | None = None):
+        self.profile = profile
+        self.book = book
+        self.product_id = product_id or profile.product_id
+        self._book_mid: int | None = None
+        self._rng = random.Random(profile.seed if seed is None else seed)
+        self.price = profile.start_price
+        self.sequence = 0
+        self.trade_id = 0
+        self.trades = 0
+        self.malformed = 0
+        self.dropped = 0
+
+    def _size(self) -> float:
+        p, rng = self.profile, self._rng
+        if p.sizes == "fixed":
+            return p.mean_size
+        if p.sizes == "uniform":
+            return rng.uniform(0, 2 * p.mean_size)
+        if p.sizes == "bot" and rng.random() < 0.3:
+            return BOT_SIZE
+        # Lognormal with the requested mean; heavy right tail like real prints
+        sigma = 1.2
+        return rng.lognormvariate(math.log(p.mean_size) - sigma * sigma / 2, sigma)
+
+    def _next_sequence(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+    def trade_frame(self) -> str:
+        rng = self._rng
+        self.price = max(0.01, self.price * (1 + rng.gauss(0, 0.0002)))
+        self.trade_id += 1
+        self.trades += 1
+        return json.dumps({
+            "type": "match",
+            "trade_id": self.trade_id,
+            "maker_order_id": f"{rng.getrandbits(128):032x}",
+            "taker_order_id": f"{rng.getrandbits(128):032x}",
+            "side": "buy" if rng.random() < 0.5 else "sell",
+            "size": f"{max(self._size(), 1e-8):.8f}",
+            "price": f"{self.price:.2f}",
+            "product_id": self.product_id,
+            "sequence": self._next_sequence(),
+            "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        })
+
+    def ticker_frame(self) -> str:
+        return json.dumps({
+            "type": "ticker",
+            # Like Coinbase, a ticker carries the sequence of the match it reports
+            "sequence": self.sequence,
+            "product_id": self.product_id,
+            "price": f"{self.price:.2f}",
+        })
+
+    def heartbeat_frame(self) -> str:
+        return json.dumps({
+            "type": "heartbeat",
+            "sequence": self.sequence,
+            "last_trade_id": self.trade_id,
+            "product_id": self.product_id,
+            "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        })
+
+    def _book_price(self, tick: int) -> str:
+        return f"{tick * BOOK_TICK:.2f}"
+
+    def _book_size(self) -> str:
+        return f"{self._rng.lognormvariate(-1, 1.5):.8f}"
+
+    def book_snapshot_frame(self) -> str:
+        """Full book around the current price; levels are one tick apart."""
+        mid = self._book_mid = round(self.price / BOOK_TICK)
+        levels = range(1, self.profile.book_levels + 1)
+        return json.dumps({
+            "type": "snapshot",
+            "product_id": self.product_id,
+            "bids": [[self._book_price(mid - k), self._book_size()] for k in levels],
+            "asks": [[self._book_price(mid + k), self._book_size()] for k in levels],
+        })
+
+    def book_update_frame(self) -> str:
+        """A few level changes near the top, plus removal of any level the price has moved through."""
+        rng = self._rng
+        if self._book_mid is None:
+            self._book_mid = round(self.price / BOOK_TICK)
+        old_mid, mid = self._book_mid, round(self.price / BOOK_TICK)
+        self._book_mid = mid
+        changes = []
+        if mid > old_mid:
+            changes += [["sell", self._book_price(t), "0"] for t in range(old_mid + 1, mid + 1)]
+        elif mid < old_mid:
+            changes += [["buy", self._book_price(t), "0"] for t in range(mid, old_mid)]
+        for _ in range(rng.randint(1, 3)):
+            side = "buy" if rng.random() < 0.5 else "sell"
+            distance = int(rng.expovariate(0.1)) + 1
+            tick = mid - distance if side == "buy" else mid + distance
+            size = "0" if rng.random() < 0.3 else self._book_size()
+            changes.append([side, self._book_price(tick), size])
+        return json.dumps({
+            "type": "l2update",
+            "product_id": self.product_id,
+            "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "changes": changes,
+        })
+
+    def malformed_frame(self) -> str:
+        self.malformed += 1
+        kind = self._rng.randrange(3)
+        if kind == 0:
+            return self.trade_frame()[: self._rng.randrange(1, 40)]
+        if kind == 1:
+            return json.dumps({"type": "match", "size": "0.1", "product_id": self.product_id})
+        return json.dumps({"type": "match", "price": "n/a", "size": "0.1", "product_id": self.product_id})
+
+    def frames(self, n: int) -> list[str]:
+        """Next `n` trade-slot frames, with tickers interleaved and malformed ones mixed in."""
+        p = self.profile
+        rng = self._rng
+        out = []
+        kept = out.append
+
+        def maybe_drop(frame: str) -> None:
+            if rng.random() < p.drop_rate:
+                self.dropped += 1
+            else:
+                out.append(frame)
+
+        if p.drop_rate:
+            kept = maybe_drop
+        for _ in range(n):
+            if p.malformed_rate and rng.random() < p.malformed_rate:
+                kept(self.malformed_frame())
+                continue
+            kept(self.trade_frame())
+            if p.ticker_every and self.trades % p.ticker_every == 0:
+                kept(self.ticker_frame())
+            # Book frames are never dropped: a lost l2update leaves the book wrong until the next snapshot
+            if self.book:
+                out.extend(self.book_update_frame() for _ in range(p.book_updates))
+        return out
+
+
+class FeedServer:
+    """Websocket server emitting a FeedProfile to every client that subscribes, for each product it names."""
+
+    def __init__(self, profile: FeedProfile, host: str = "127.0.0.1", port: int = 8765):
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self._server = None
+        self.connections = 0
+        self.frames_sent = 0
+        self.disconnects = 0
+
+    async def start(self) -> None:
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Synthetic feed on ws://%s:%d (%s)", self.host, self.port, self.profile)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+    async def _handle(self, ws, path=None) -> None:
+        try:
+            request = json.loads(await asyncio.wait_for(ws.recv(), SUBSCRIBE_TIMEOUT))
+        except (asyncio.TimeoutError, ValueError, websockets.exceptions.ConnectionClosed):
+            return
+        if not isinstance(request, dict) or request.get("type") != "subscribe":
+            await ws.send(json.dumps({"type": "error", "message": "Failed to subscribe", "reason": "expected subscribe"}))
+            return
+        self.connections += 1
+        # Channels are names, or {"name": ..., "product_ids": [...]} objects overriding the top-level products
+        channels = [
+            channel if isinstance(channel, dict) else {"name": channel, "product_ids": request.get("product_ids", [])}
+            for channel in request.get("channels", [])
+        ]
+        await ws.send(json.dumps({"type": "subscriptions", "channels": channels}))
+        gens = self._generators(request, channels)
+        try:
+            for gen in gens:
+                if gen.book:
+                    await ws.send(gen.book_snapshot_frame())
+            await self._emit(ws, gens)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def _generators(self, request: dict, channels: list[dict]) -> list[FrameGenerator]:
+        """One generator per subscribed product, each with its own seed and sequence; the profile's product if none."""
+        requested = list(request.get("product_ids") or [])
+        product_ids, book_ids = list(requested), set()
+        for channel in channels:
+            ids = channel.get("product_ids") or requested or [self.profile.product_id]
+            product_ids += [product_id for product_id in ids if product_id not in product_ids]
+            if channel.get("name") in BOOK_CHANNELS:
+                book_ids.update(ids)
+        product_ids = product_ids or [self.profile.product_id]
+        return [
+            FrameGenerator(self.profile, book=product_id in book_ids, product_id=product_id, seed=self.profile.seed + i)
+            for i, product_id in enumerate(product_ids)
+        ]
+
+    async def _emit(self, ws, gens: list[FrameGenerator]) -> None:
+        profile = self.profile
+        loop = asyncio.get_running_loop()
+        start = last = last_heartbeat = last_report = loop.time()
+        owed = 0.0
+        sent_at_report = 0
+        while True:
+            await asyncio.sleep(TICK_INTERVAL)
+            now = loop.time()
+            elapsed = now - start
+            if profile.disconnect_after is not None and elapsed >= profile.disconnect_after:
+                self.disconnects += 1
+                await ws.close(code=1011, reason="forced disconnect")
+                return
+            owed += profile.rate_at(elapsed) * (now - last)
+            last = now
+            due = int(owed)
+            owed -= due
+            # The rate is per product, as on the exchange
+            frames = [frame for gen in gens for frame in gen.frames(due)]
+            if now - last_heartbeat >= profile.heartbeat_interval:
+                frames += [gen.heartbeat_frame() for gen in gens]
+                last_heartbeat = now
+            for frame in frames:
+                # send() waits once the client stops draining, so falling behind shows up below
+                await ws.send(frame)
+            self.frames_sent += len(frames)
+            if now - last_report >= 1.0:
+                trades = sum(gen.trades for gen in gens)
+                logger.info(
+                    "target %.0f tps x %d products, sent %.0f trades/s, %d trades, %d malformed, %d dropped",
+                    profile.rate_at(elapsed), len(gens), (trades - sent_at_report) / (now - last_report),
+                    trades, sum(gen.malformed for gen in gens), sum(gen.dropped for gen in gens),
+                )
+                sent_at_report = trades
+                last_report = now
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = FeedProfile()
+    parser = argparse.ArgumentParser(description="Synthetic Coinbase-style feed for load testing BTCBeeper")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tps", type=float, default=defaults.tps, help="base trades per second")
+    parser.add_argument("--burst", choices=BURST_PROFILES, default=defaults.burst)
+    parser.add_argument("--burst-factor", type=float, default=defaults.burst_factor)
+    parser.add_argument("--burst-period", type=float, default=defaults.burst_period)
+    parser.add_argument("--burst-length", type=float, default=defaults.burst_length)
+    parser.add_argument("--sizes", choices=SIZE_DISTRIBUTIONS, default=defaults.sizes)
+    parser.add_argument("--mean-size", type=float, default=defaults.mean_size)
+    parser.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate,
+                        help="fraction of trade frames replaced by broken ones")
+    parser.add_argument("--drop-rate", type=float, default=defaults.drop_rate,
+                        help="fraction of trade and ticker frames never sent; dropped matches leave trade ID gaps")
+    parser.add_argument("--disconnect-after", type=float, default=None,
+                        help="drop each connection after this many seconds")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    profile = FeedProfile(
+        tps=args.tps,
+        burst=args.burst,
+        burst_factor=args.burst_factor,
+        burst_period=args.burst_period,
+        burst_length=args.burst_length,
+        sizes=args.sizes,
+        mean_size=args.mean_size,
+        malformed_rate=args.malformed_rate,
+        drop_rate=args.drop_rate,
+        disconnect_after=args.disconnect_after,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(FeedServer(profile, args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
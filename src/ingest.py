@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+logger = logging.getLogger(__name__)
+
+
+class HandoffQueue:
+    """Bounded, thread-safe queue from the ingest thread to the UI.
+
+    `put` never blocks: when the queue is full the overflow policy either
+    discards the oldest queued item or the incoming one, and the drop is
+    counted. That way a slow UI can lose updates but never stalls ingest.
+    """
+
+    def __init__(self, maxsize: int, overflow: str = "drop_oldest"):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._items: deque = deque()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any) -> bool:
+        """Queue `item`; returns False if it was dropped instead."""
+        with self._lock:
+            self.published += 1
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.overflow == "drop_newest":
+                    return False
+                self._items.popleft()
+            self._items.append(item)
+            if len(self._items) > self.high_water:
+                self.high_water = len(self._items)
+            return True
+
+    def drain(self) -> list:
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+        return items
+
+    def snapshot(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "high_water": self.high_water,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+class IngestThread(threading.Thread):
+    """Runs a coroutine (the feed loop) on its own event loop in a daemon thread.
+
+    If the coroutine raises, the exception is logged, kept in `error` and
+    passed to `on_error`, which is called on the ingest thread.
+    """
+
+    def __init__(
+        self,
+        coro_factory: Callable[[], Awaitable[None]],
+        name: str = "btcbeeper-ingest",
+        on_error: Callable[[BaseException], None] | None = None,
+    ):
+        super().__init__(name=name, daemon=True)
+        self._coro_factory = coro_factory
+        self.on_error = on_error
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._ready = threading.Event()
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            self._task = loop.create_task(self._coro_factory())
+            self._ready.set()
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+            logger.exception("Ingest loop failed")
+            if self.on_error:
+                self.on_error(e)
+        finally:
+            self._ready.set()
+            loop.close()
+
+    def call_soon(self, callback: Callable[..., Any], *args) -> bool:
+        """Run `callback(*args)` on the ingest loop; False if the loop is not running, e.g. after the feed ended."""
+        loop = self._loop
+        # A loop that has finished but is not closed yet would accept the callback and never run it
+        if loop is None or not loop.is_running():
+            return False
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            return False
+        return True
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if not self.is_alive():
+            return
+        self._ready.wait(timeout)
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Loop closed between the check and the call; the thread is already finishing
+                pass
+        self.join(timeout)
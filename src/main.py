@@ -1,31 +1,218 @@
 #!/usr/bin/env python3
+import time
+
+# Startup timings are measured from here, before any of the heavier imports
+_MAIN_IMPORTED = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import logging
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .startup import StartupProfile
+
+STARTUP = StartupProfile(origin=_MAIN_IMPORTED)
 
-import pygame
+with STARTUP.phase("import engine"):
+    from . import engine as engine_module
+    from .order_book import BOOK_ENABLED, DEPTH_BUCKET, DepthLadder, OrderBook
+    from .recorder import FrameRecorder, ReplaySource, parse_speed
+    from .tape import TAPE_DIR, TapeWriter
 
-from . import cli as cli_module
+HEADLESS_STATS_INTERVAL = float(os.getenv("BTCBEEPER_STATS_INTERVAL", "10"))
 
 
-def main() -> None:
-    click_sound = None
-    click_sound_sell = None
+def parse_products(value: str) -> list[str]:
+    products = list(dict.fromkeys(p.strip().upper() for p in value.split(",") if p.strip()))
+    if not products:
+        raise argparse.ArgumentTypeError("at least one product is required")
+    return products
 
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="btcbeeper", description="Live Coinbase trade ticker")
+    parser.add_argument("--record", metavar="PATH", default=engine_module.RECORD_PATH,
+                        help="append raw feed frames to a gzip recording")
+    parser.add_argument("--replay", metavar="PATH", default=engine_module.REPLAY_PATH,
+                        help="replay a recording instead of connecting to Coinbase")
+    parser.add_argument("--tape", metavar="DIR", default=TAPE_DIR,
+                        help="append every trade to a binary tape of daily segment files under DIR")
+    parser.add_argument("--speed", type=parse_speed, default=parse_speed(engine_module.REPLAY_SPEED),
+                        help='replay speed multiplier, e.g. "1", "10x" or "max"')
+    parser.add_argument("--headless", action="store_true", default=os.getenv("BTCBEEPER_HEADLESS") == "1",
+                        help="run the feed and stats without the terminal UI or audio")
+    parser.add_argument("--stats-interval", type=float, default=HEADLESS_STATS_INTERVAL, metavar="SECS",
+                        help="seconds between stats snapshots in headless mode")
+    parser.add_argument("--json", action="store_true",
+                        help="headless: print snapshots to stdout as JSON lines instead of logging them")
+    parser.add_argument("--products", type=parse_products, default=engine_module.PRODUCT_IDS, metavar="IDS",
+                        help='comma separated products to follow over one connection, e.g. "BTC-USD,ETH-USD"; '
+                             "the first is shown first")
+    parser.add_argument("--book", action="store_true", default=BOOK_ENABLED,
+                        help="also keep a level2 order book for the first product")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup phase took, and when the first trade showed, on exit")
+    return parser.parse_args(argv)
+
+
+async def run_headless(engine: engine_module.FeedEngine, interval: float, emit) -> None:
+    """Run the feed until it stops, emitting a stats snapshot every `interval` seconds."""
+    feed = asyncio.create_task(engine.run())
     try:
-        pygame.mixer.init()
-    except pygame.error as e:
-        cli_module.logger.warning("Audio init failed: %s", e)
-    else:
-        if os.path.exists(cli_module.CLICK_SOUND_PATH):
-            click_sound = pygame.mixer.Sound(cli_module.CLICK_SOUND_PATH)
-        else:
-            cli_module.logger.warning("Buy sound not found: %s", cli_module.CLICK_SOUND_PATH)
+        while not feed.done():
+            await asyncio.wait({feed}, timeout=interval)
+            emit(engine.snapshot())
+        await feed
+    finally:
+        feed.cancel()
+        if engine.recorder:
+            engine.recorder.close()
+        if engine.tape:
+            engine.tape.close()
+
+
+def _emit_json(snapshot: dict) -> None:
+    sys.stdout.write(json.dumps(snapshot) + "\n")
+    sys.stdout.flush()
+
+
+def _emit_log(snapshot: dict) -> None:
+    engine_module.logger.info(
+        "%s price %.2f  trades %d  tps %.2f (peak %.2f)  vol %.4f  errors %d/%d",
+        snapshot["product_id"], snapshot["last_price"], snapshot["total_trades"], snapshot["tps"],
+        snapshot["highest_tps"], snapshot["session_volume"], snapshot["parse_errors"], snapshot["invalid_trades"],
+    )
+    sequence = snapshot["sequence"]
+    if sequence["gaps"] or sequence["duplicates"]:
+        engine_module.logger.info(
+            "sequence gaps %d (%d missing, largest %d)  late %d  duplicates %d",
+            sequence["gaps"], sequence["missing"], sequence["largest_gap"], sequence["late"], sequence["duplicates"],
+        )
+    book = snapshot["book"]
+    if book and book["best_bid"] and book["best_ask"]:
+        engine_module.logger.info(
+            "book bid %.2f  ask %.2f  spread %.2f  top %d %.4f / %.4f  imbalance %+.2f  %d updates",
+            book["best_bid"][0], book["best_ask"][0], book["spread"], book["depth_levels"],
+            book["bid_depth"], book["ask_depth"], book["imbalance"] or 0.0, book["updates"],
+        )
+    tape = snapshot["tape"]
+    if tape:
+        engine_module.logger.info(
+            "tape %d trades, %.1f MB  %d pending  %d dropped%s",
+            tape["records"], tape["bytes"] / 1e6, tape["pending"], tape["dropped"],
+            f"  error: {tape['error']}" if tape["error"] else "",
+        )
+    if snapshot.get("products"):
+        engine_module.logger.info("products  %s", "  ".join(
+            f"{p['product_id']} {p['last_price']:.2f} {p['tps']:.1f}/s" for p in snapshot["products"]
+        ))
+
+
+def main_headless(args: argparse.Namespace) -> None:
+    # Log to stderr unless a file is asked for, so stdout stays clean for --json
+    log_path = os.getenv("BTCBEEPER_LOG_PATH")
+    target = {"filename": log_path} if log_path else {"stream": sys.stderr}
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", **target)
+    engine = engine_module.FeedEngine(
+        recorder=FrameRecorder(args.record) if args.record else None,
+        replay=ReplaySource(args.replay, speed=args.speed) if args.replay else None,
+        on_status=lambda text: engine_module.logger.info("Feed status: %s", text),
+        on_connect=lambda: STARTUP.mark("feed subscribed"),
+        products=args.products,
+        book=OrderBook(args.products[0]) if args.book else None,
+        tape=TapeWriter(args.tape) if args.tape else None,
+        # Only hooked up when asked for; otherwise trades pay nothing for it
+        on_trade=(lambda trade: STARTUP.mark("first trade received")) if args.startup_report else None,
+    )
+    try:
+        asyncio.run(run_headless(engine, args.stats_interval, _emit_json if args.json else _emit_log))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _finish_startup_report(args)
 
-        if os.path.exists(cli_module.SELL_SOUND_PATH):
-            click_sound_sell = pygame.mixer.Sound(cli_module.SELL_SOUND_PATH)
-        else:
-            cli_module.logger.warning("Sell sound not found: %s", cli_module.SELL_SOUND_PATH)
 
-    cli_module.BTCBeeperApp(click_sound=click_sound, click_sound_sell=click_sound_sell).run()
+def _finish_startup_report(args: argparse.Namespace) -> None:
+    report = STARTUP.report()
+    engine_module.logger.info("Startup:\n%s", report)
+    if args.startup_report:
+        print(report, file=sys.stderr)
+
+
+def init_audio() -> tuple:
+    """Mixer and click sounds: (click_sound, click_sound_sell, sound_bank), all None without audio."""
+    with STARTUP.phase("import pygame"):
+        import pygame
+
+        from .sound_bank import BUY_SOUND, CLICK_SOUND_PATH, SELL_SOUND, SELL_SOUND_PATH, SoundBank
+
+    logger = engine_module.logger
+    with STARTUP.phase("mixer init"):
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            logger.warning("Audio init failed: %s", e)
+            return None, None, None
+
+    sound_bank = SoundBank(sample_rate=pygame.mixer.get_init()[0])
+
+    def load_click(path: str | None, name: str):
+        # A WAV path overrides the click synthesised in memory
+        if path:
+            if os.path.exists(path):
+                return pygame.mixer.Sound(path)
+            logger.warning("Sound not found: %s", path)
+            return None
+        try:
+            return sound_bank.sound(name)
+        except (ValueError, pygame.error) as e:
+            logger.warning("Could not build click %s: %s", name, e)
+            return None
+
+    with STARTUP.phase("load sounds"):
+        click_sound = load_click(CLICK_SOUND_PATH, BUY_SOUND)
+        click_sound_sell = load_click(SELL_SOUND_PATH, SELL_SOUND)
+    return click_sound, click_sound_sell, sound_bank
+
+
+def main_ui(args: argparse.Namespace) -> None:
+    # Audio (pygame import, mixer init, sound synthesis) runs alongside the Textual import and
+    # compose, and the app connects to the feed from on_load, so none of them wait on each other
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="btcbeeper-audio-init")
+    audio_init = executor.submit(init_audio)
+    executor.shutdown(wait=False)
+
+    # Imported here so headless runs never load Textual or pygame
+    with STARTUP.phase("import ui"):
+        from . import cli as cli_module
+
+    with STARTUP.phase("create app"):
+        app = cli_module.BTCBeeperApp(
+            recorder=FrameRecorder(args.record) if args.record else None,
+            replay=ReplaySource(args.replay, speed=args.speed) if args.replay else None,
+            audio_init=audio_init,
+            startup=STARTUP,
+            products=args.products,
+            # The ladder feeds the depth heatmap; headless runs have no use for it
+            book=(OrderBook(args.products[0], ladder=DepthLadder() if DEPTH_BUCKET > 0 else None)
+                  if args.book else None),
+            tape=TapeWriter(args.tape) if args.tape else None,
+        )
+    try:
+        app.run()
+    finally:
+        _finish_startup_report(args)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.headless:
+        main_headless(args)
+    else:
+        main_ui(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+import os
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+BOOK_ENABLED = os.getenv("BTCBEEPER_BOOK") == "1"
+# level2 needs an authenticated connection; level2_batch sends the same messages every 50ms without one
+BOOK_CHANNEL = os.getenv("BTCBEEPER_BOOK_CHANNEL", "level2_batch")
+BOOK_DEPTH_LEVELS = int(os.getenv("BTCBEEPER_BOOK_DEPTH", "10"))
+# Price bucket (USD) for the depth heatmap's ladder; 0 disables the ladder
+DEPTH_BUCKET = float(os.getenv("BTCBEEPER_DEPTH_BUCKET", "5"))
+DEPTH_LADDER_BUCKETS = int(os.getenv("BTCBEEPER_DEPTH_LADDER_BUCKETS", "64"))
+
+
+class BookSide:
+    """Price levels for one side of the book, best price last.
+
+    Sizes live in a dict keyed by price. A parallel list holds the sort keys
+    (price for bids, -price for asks) in ascending order, so the best level
+    is always at the end and most changes, which land near the top of the
+    book, insert or delete near the end of the list. Changing an existing
+    level is a dict write; adding or removing one is a bisect plus a list
+    insert/delete. The size of the best `depth_levels` levels and of the
+    whole side are kept up to date on every change, so reading them is O(1).
+    """
+
+    def __init__(self, is_ask: bool, depth_levels: int = BOOK_DEPTH_LEVELS):
+        if depth_levels <= 0:
+            raise ValueError("depth_levels must be positive")
+        self.is_ask = is_ask
+        self.depth_levels = depth_levels
+        self._sign = -1.0 if is_ask else 1.0
+        self.sizes: dict[float, float] = {}
+        self._keys: list[float] = []
+        self.depth = 0.0
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def best(self) -> tuple[float, float] | None:
+        if not self._keys:
+            return None
+        price = self._keys[-1] * self._sign
+        return price, self.sizes[price]
+
+    def levels(self, count: int | None = None) -> list[tuple[float, float]]:
+        """(price, size) for the best `count` levels (all if None), best first."""
+        keys = self._keys if count is None else self._keys[-count:]
+        sign, sizes = self._sign, self.sizes
+        return [(key * sign, sizes[key * sign]) for key in reversed(keys)]
+
+    def _size_at(self, index: int) -> float:
+        return self.sizes[self._keys[index] * self._sign]
+
+    def set(self, price: float, size: float) -> None:
+        """Set the resting size at `price`; 0 removes the level."""
+        sizes = self.sizes
+        old = sizes.get(price)
+        if size <= 0:
+            if old is None:
+                return
+            del sizes[price]
+            keys = self._keys
+            i = bisect_left(keys, price * self._sign)
+            in_depth = len(keys) - i <= self.depth_levels
+            del keys[i]
+            self.total -= old
+            if in_depth:
+                self.depth -= old
+                # The level just below the top N moves up into it
+                if len(keys) >= self.depth_levels:
+                    self.depth += self._size_at(-self.depth_levels)
+            return
+        if old is not None:
+            sizes[price] = size
+            self.total += size - old
+            keys = self._keys
+            if len(keys) <= self.depth_levels or price * self._sign >= keys[-self.depth_levels]:
+                self.depth += size - old
+            return
+        keys = self._keys
+        key = price * self._sign
+        i = bisect_left(keys, key)
+        keys.insert(i, key)
+        sizes[price] = size
+        self.total += size
+        if len(keys) - i <= self.depth_levels:
+            self.depth += size
+            # ...pushing the old Nth level out of the top N
+            if len(keys) > self.depth_levels:
+                self.depth -= self._size_at(-self.depth_levels - 1)
+
+    def load(self, levels) -> None:
+        """Replace every level with `levels`, an iterable of (price, size) strings or numbers."""
+        sign = self._sign
+        sizes = {}
+        for price, size in levels:
+            size = float(size)
+            if size > 0:
+                sizes[float(price)] = size
+        self.sizes = sizes
+        self._keys = sorted(price * sign for price in sizes)
+        self.recompute()
+
+    def recompute(self) -> None:
+        """Recalculate the running totals from the levels, dropping any float drift."""
+        top = self._keys[-self.depth_levels:]
+        self.depth = sum(self.sizes[key * self._sign] for key in top)
+        self.total = sum(self.sizes.values())
+
+    def clear(self) -> None:
+        self.sizes = {}
+        self._keys = []
+        self.depth = 0.0
+        self.total = 0.0
+
+
+class DepthLadder:
+    """Resting size per fixed-width price bucket, for a window of buckets around the mid.
+
+    The book adds each change's size delta to its bucket as it applies it,
+    so reading the whole ladder never walks the levels. `origin` is the
+    absolute bucket index (price // bucket_size) of element 0. When the mid
+    drifts into the outer quarters of the window, `recentre` moves the window
+    and rebuilds the totals from the book with NumPy, which also drops any
+    float drift; a snapshot does the same.
+    """
+
+    def __init__(self, bucket_size: float = DEPTH_BUCKET, buckets: int = DEPTH_LADDER_BUCKETS):
+        if bucket_size <= 0 or buckets <= 0:
+            raise ValueError("bucket_size and buckets must be positive")
+        self.bucket_size = bucket_size
+        self.buckets = buckets
+        self.origin: int | None = None
+        self.bids = [0.0] * buckets
+        self.asks = [0.0] * buckets
+        self.recentres = 0
+
+    def bucket(self, price: float) -> int:
+        return int(price // self.bucket_size)
+
+    def add(self, is_bid: bool, price: float, delta: float) -> None:
+        if self.origin is None:
+            return
+        i = int(price // self.bucket_size) - self.origin
+        if 0 <= i < self.buckets:
+            (self.bids if is_bid else self.asks)[i] += delta
+
+    def needs_recentre(self, mid: float) -> bool:
+        if self.origin is None:
+            return True
+        i = self.bucket(mid) - self.origin
+        return not self.buckets // 4 <= i < self.buckets - self.buckets // 4
+
+    def recentre(self, book: "OrderBook", mid: float) -> None:
+        self.origin = self.bucket(mid) - self.buckets // 2
+        self.bids = self._totals(book.bids)
+        self.asks = self._totals(book.asks)
+        self.recentres += 1
+
+    def _totals(self, side: BookSide) -> list[float]:
+        count = len(side.sizes)
+        prices = np.fromiter(side.sizes.keys(), dtype=np.float64, count=count)
+        sizes = np.fromiter(side.sizes.values(), dtype=np.float64, count=count)
+        index = (prices // self.bucket_size).astype(np.int64) - self.origin
+        inside = (index >= 0) & (index < self.buckets)
+        return np.bincount(index[inside], weights=sizes[inside], minlength=self.buckets).tolist()
+
+    def clear(self) -> None:
+        self.origin = None
+        self.bids = [0.0] * self.buckets
+        self.asks = [0.0] * self.buckets
+
+
+class OrderBook:
+    """Level 2 book for one product, built from a snapshot plus l2update changes.
+
+    Best bid/ask, spread, mid, depth over the best `depth_levels` levels and
+    the bid/ask imbalance of that depth are all O(1) reads. With a
+    `ladder`, resting size is also kept per price bucket for the depth
+    heatmap. A change that leaves the best bid at or above the best ask
+    means an update was missed; the book is counted as crossed and marked
+    stale until the next snapshot replaces it.
+    """
+
+    def __init__(self, product_id: str, depth_levels: int = BOOK_DEPTH_LEVELS, ladder: DepthLadder | None = None):
+        self.product_id = product_id
+        self.depth_levels = depth_levels
+        self.bids = BookSide(is_ask=False, depth_levels=depth_levels)
+        self.asks = BookSide(is_ask=True, depth_levels=depth_levels)
+        self.ladder = ladder
+        self.ready = False
+        self.snapshots = 0
+        self.updates = 0
+        self.changes = 0
+        self.crossed = 0
+        self.stale = False
+        self.last_update_time: float = 0.0
+
+    def apply_snapshot(self, bids, asks) -> None:
+        self.bids.load(bids)
+        self.asks.load(asks)
+        mid = self.mid()
+        if self.ladder is not None and mid is not None:
+            self.ladder.recentre(self, mid)
+        self.ready = True
+        self.stale = False
+        self.snapshots += 1
+        self.last_update_time = time.time()
+
+    def apply_changes(self, changes) -> None:
+        """Apply l2update changes: [side, price, size] with side "buy" or "sell" and a size of 0 removing the level."""
+        if not self.ready:
+            return
+        bids, asks, ladder = self.bids, self.asks, self.ladder
+        if ladder is None:
+            bids_set, asks_set = bids.set, asks.set
+            for side, price, size in changes:
+                if side == "buy":
+                    bids_set(float(price), float(size))
+                else:
+                    asks_set(float(price), float(size))
+        else:
+            for side, price, size in changes:
+                price, size = float(price), float(size)
+                book_side = bids if side == "buy" else asks
+                ladder.add(book_side is bids, price, max(size, 0.0) - book_side.sizes.get(price, 0.0))
+                book_side.set(price, size)
+        self.updates += 1
+        self.changes += len(changes)
+        self.last_update_time = time.time()
+        if not self.stale and bids._keys and asks._keys and bids._keys[-1] >= -asks._keys[-1]:
+            self.crossed += 1
+            self.stale = True
+
+    def clear(self) -> None:
+        """Forget every level until the next snapshot, e.g. after a reconnect."""
+        self.bids.clear()
+        self.asks.clear()
+        if self.ladder is not None:
+            self.ladder.clear()
+        self.ready = False
+        self.stale = False
+
+    def best_bid(self) -> tuple[float, float] | None:
+        return self.bids.best()
+
+    def best_ask(self) -> tuple[float, float] | None:
+        return self.asks.best()
+
+    def spread(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def mid(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def imbalance(self) -> float | None:
+        """(bid depth - ask depth) / total over the best depth_levels levels: +1 all bids, -1 all asks."""
+        bid_depth, ask_depth = self.bids.depth, self.asks.depth
+        total = bid_depth + ask_depth
+        if total <= 0:
+            return None
+        return (bid_depth - ask_depth) / total
+
+    def depth_column(self) -> tuple[float, int, list[float], list[float]] | None:
+        """(mid, origin, bids, asks) copied from the ladder, recentred on the mid first if needed; None until ready."""
+        ladder = self.ladder
+        mid = self.mid()
+        if ladder is None or not self.ready or mid is None:
+            return None
+        if ladder.needs_recentre(mid):
+            ladder.recentre(self, mid)
+        return mid, ladder.origin, ladder.bids[:], ladder.asks[:]
+
+    def snapshot(self) -> dict:
+        bid, ask = self.bids.best(), self.asks.best()
+        return {
+            "product_id": self.product_id,
+            "ready": self.ready,
+            "stale": self.stale,
+            "best_bid": list(bid) if bid else None,
+            "best_ask": list(ask) if ask else None,
+            "spread": self.spread(),
+            "mid": self.mid(),
+            "depth_levels": self.depth_levels,
+            "bid_depth": self.bids.depth,
+            "ask_depth": self.asks.depth,
+            "imbalance": self.imbalance(),
+            "bid_levels": len(self.bids),
+            "ask_levels": len(self.asks),
+            "snapshots": self.snapshots,
+            "updates": self.updates,
+            "changes": self.changes,
+            "crossed": self.crossed,
+        }
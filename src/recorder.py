@@ -0,0 +1,217 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+import zlib
+from collections import deque
+from typing import Iterator
+
+FLUSH_INTERVAL = 1.0
+REPLAY_CHUNK = 1024
+SCAN_CHUNK = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+
+class FrameRecorder:
+    """Appends raw feed frames to a gzip file as `<epoch seconds>\\t<frame>` lines.
+
+    Frames are JSON, which escapes tabs and newlines, so the line format is
+    unambiguous. The file is opened in append mode and each session adds a
+    new gzip member. A session that was killed before close() leaves an
+    unterminated member, so before appending its flushed lines are rewritten
+    as a complete member. Output is flushed at most once per FLUSH_INTERVAL
+    so recording costs little per frame.
+    """
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        if os.path.exists(path):
+            _repair_tail(path)
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._last_flush = time.monotonic()
+        self.frames_written = 0
+
+    def write(self, frame: str | bytes, received_at: float) -> None:
+        if isinstance(frame, (bytes, bytearray)):
+            frame = frame.decode("utf-8", "replace")
+        self._file.write(f"{received_at:.6f}\t{frame}\n")
+        self.frames_written += 1
+        self._maybe_flush()
+
+    def write_many(self, frames: list, received_at: float) -> None:
+        prefix = f"{received_at:.6f}\t"
+        self._file.writelines(
+            prefix + (f.decode("utf-8", "replace") if isinstance(f, (bytes, bytearray)) else f) + "\n"
+            for f in frames
+        )
+        self.frames_written += len(frames)
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def _repair_tail(path: str) -> None:
+    """Rewrite an unterminated last gzip member as a complete one holding its whole lines."""
+    member_start = offset = 0
+    decomp = zlib.decompressobj(wbits=31)
+    text = bytearray()
+    with open(path, "rb") as f:
+        while chunk := f.read(SCAN_CHUNK):
+            while chunk:
+                try:
+                    text += decomp.decompress(chunk)
+                except zlib.error:
+                    # Corrupt rather than cut short: drop the member from here on
+                    offset = -1
+                    break
+                if not decomp.eof:
+                    offset += len(chunk)
+                    break
+                # Member complete; whatever follows starts the next one
+                consumed = len(chunk) - len(decomp.unused_data)
+                offset += consumed
+                chunk = decomp.unused_data
+                member_start = offset
+                decomp = zlib.decompressobj(wbits=31)
+                text.clear()
+            if offset < 0:
+                break
+    if member_start == offset:
+        return
+    keep = bytes(text[: text.rfind(b"\n") + 1])
+    with open(path, "r+b") as f:
+        f.truncate(member_start)
+        f.seek(member_start)
+        if keep:
+            f.write(gzip.compress(keep))
+    logger.warning("Recording %s was not closed cleanly; kept %d bytes of its last session", path, len(keep))
+
+
+def read_frames(path: str) -> Iterator[tuple[float, str]]:
+    """Yield (received_at, frame) pairs from a recording.
+
+    A recording cut off mid-write ends at the last frame that can be read.
+    """
+    count = 0
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                stamp, sep, frame = line.rstrip("\n").partition("\t")
+                if not sep:
+                    continue
+                try:
+                    yield float(stamp), frame
+                except ValueError:
+                    continue
+                count += 1
+        except (EOFError, zlib.error):
+            logger.warning("Recording %s truncated after %d frames", path, count)
+
+
+class ReplayConnection:
+    """Stands in for a websockets connection, yielding recorded frames on schedule.
+
+    Frames whose replay time has come are moved into `messages`, mirroring
+    websockets' receive buffer, so the batched reader in _ws_loop sees bursts
+    the same way it would live.
+    """
+
+    def __init__(self, source: "ReplaySource"):
+        self._source = source
+        self._frames = read_frames(source.path)
+        self._pending: tuple[float, str] | None = None
+        self.messages: deque[str] = deque()
+        self.sent: list = []
+
+    async def send(self, message) -> None:
+        self.sent.append(message)
+
+    def _refill(self) -> float | None:
+        """Buffer every due frame; returns seconds until the next frame, or None at EOF."""
+        source = self._source
+        while len(self.messages) < REPLAY_CHUNK:
+            if self._pending is None:
+                self._pending = next(self._frames, None)
+                if self._pending is None:
+                    return None
+            stamp, frame = self._pending
+            if source.origin is None:
+                source.origin = stamp
+                source.started = time.monotonic()
+            if source.speed > 0:
+                wait = (stamp - source.origin) / source.speed - (time.monotonic() - source.started)
+                if wait > 0:
+                    return wait
+            self.messages.append(frame)
+            self._pending = None
+            source.frames_replayed += 1
+        return 0.0
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            if not self.messages:
+                wait = self._refill()
+                if not self.messages:
+                    if wait is None:
+                        self._source.finished = True
+                        return
+                    await asyncio.sleep(wait)
+                    continue
+                # Let the UI loop run between chunks even at unlimited speed
+                await asyncio.sleep(0)
+            yield self.messages.popleft()
+
+
+class ReplaySource:
+    """Replays a FrameRecorder file at `speed`x real time (0 = as fast as possible)."""
+
+    def __init__(self, path: str, speed: float = 1.0):
+        if speed < 0:
+            raise ValueError("speed must be >= 0")
+        self.path = path
+        self.speed = speed
+        self.origin: float | None = None
+        self.started = 0.0
+        self.frames_replayed = 0
+        self.finished = False
+
+    def connect(self) -> "_ReplayContext":
+        return _ReplayContext(self)
+
+
+class _ReplayContext:
+    def __init__(self, source: ReplaySource):
+        self._source = source
+
+    async def __aenter__(self) -> ReplayConnection:
+        return ReplayConnection(self._source)
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+def parse_speed(value: str) -> float:
+    """Parse a replay speed such as "1", "10x" or "max"."""
+    value = value.strip().lower()
+    if value in ("max", "0"):
+        return 0.0
+    speed = float(value[:-1] if value.endswith("x") else value)
+    if speed <= 0:
+        raise ValueError("replay speed must be positive or 'max'")
+    return speed
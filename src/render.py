@@ -0,0 +1,48 @@
+import time
+from typing import Callable
+
+_NEVER = object()
+
+
+class RenderScheduler:
+    """Redraws a widget only when the inputs it depends on have changed.
+
+    Callers pass each widget's inputs as a tuple on every tick; the draw
+    callback runs only if that tuple differs from the one last drawn. Renders,
+    skips and time spent drawing are counted per widget.
+    """
+
+    def __init__(self):
+        self._last: dict[str, object] = {}
+        self.renders: dict[str, int] = {}
+        self.skips: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+
+    def render(self, name: str, inputs: tuple, draw: Callable[[], None]) -> bool:
+        """Run `draw` if `inputs` changed since the last draw; returns whether it ran."""
+        if self._last.get(name, _NEVER) == inputs:
+            self.skips[name] = self.skips.get(name, 0) + 1
+            return False
+        start = time.perf_counter()
+        draw()
+        self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+        self.renders[name] = self.renders.get(name, 0) + 1
+        self._last[name] = inputs
+        return True
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Force the next render of `name` (or of every widget)."""
+        if name is None:
+            self._last.clear()
+        else:
+            self._last.pop(name, None)
+
+    def snapshot(self) -> dict[str, dict]:
+        return {
+            name: {
+                "renders": self.renders.get(name, 0),
+                "skips": self.skips.get(name, 0),
+                "seconds": self.seconds.get(name, 0.0),
+            }
+            for name in sorted(self.renders.keys() | self.skips.keys())
+        }
@@ -0,0 +1,211 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+if __package__:
+    from .click_generator import CLICK_VARIATIONS, SAMPLE_RATE, params_key, render_variant
+else:
+    from click_generator import CLICK_VARIATIONS, SAMPLE_RATE, params_key, render_variant
+
+logger = logging.getLogger(__name__)
+
+SOUND_CACHE_DIR = os.getenv("BTCBEEPER_SOUND_CACHE", str(Path.home() / ".cache" / "btcbeeper" / "sounds"))
+BUY_SOUND = os.getenv("BTCBEEPER_SOUND", "geiger_click7")
+SELL_SOUND = os.getenv("BTCBEEPER_SELL_SOUND", "geiger_click4")
+# WAV overrides for the synthesised clicks
+CLICK_SOUND_PATH = os.getenv("BTCBEEPER_SOUND_PATH")
+SELL_SOUND_PATH = os.getenv("BTCBEEPER_SELL_SOUND_PATH")
+TIMBRE_CACHE_SIZE = int(os.getenv("BTCBEEPER_TIMBRE_CACHE_SIZE", "32"))
+# Trade sizes are quantised to this many log-spaced buckets per decade between the two bounds (BTC)
+TIMBRE_BUCKETS_PER_DECADE = 4
+TIMBRE_MIN_SIZE = 0.0001
+TIMBRE_MAX_SIZE = 100.0
+SELL_PITCH = 0.85
+
+
+def variation_names() -> list[str]:
+    return [Path(params["filename"]).stem for params in CLICK_VARIATIONS]
+
+
+def find_variation(name: str | int) -> dict[str, Any]:
+    """Look up a CLICK_VARIATIONS entry by 1-based index, stem ("geiger_click7") or filename."""
+    if isinstance(name, int) or str(name).isdigit():
+        index = int(name)
+        if not 1 <= index <= len(CLICK_VARIATIONS):
+            raise ValueError(f"sound index must be 1-{len(CLICK_VARIATIONS)}, got {index}")
+        return CLICK_VARIATIONS[index - 1]
+    for params in CLICK_VARIATIONS:
+        if name in (params["filename"], Path(params["filename"]).stem):
+            return params
+    raise ValueError(f"unknown sound {name!r}; choose from {', '.join(variation_names())}")
+
+
+class SoundBank:
+    """Click sounds synthesised in memory from the click_generator model.
+
+    Samples are rendered with a per-variant seed and kept in a small on-disk
+    cache of .npy files keyed by the parameter hash, so later starts skip the
+    synthesis; delete the cache directory (or pass cache_dir=None) to bypass
+    it. Mixer sounds are built straight from the NumPy buffers, so any
+    variation can be selected at runtime without reading WAV files.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = SOUND_CACHE_DIR, sample_rate: int = SAMPLE_RATE):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.sample_rate = sample_rate
+        self._samples: dict[str, np.ndarray] = {}
+        self._sounds: dict[str, object] = {}
+        self.cache_hits = 0
+        self.synthesised = 0
+
+    def samples(self, params: dict[str, Any]) -> np.ndarray:
+        key = params_key(params, self.sample_rate)
+        cached = self._samples.get(key)
+        if cached is not None:
+            return cached
+        path = self.cache_dir / f"{key}.npy" if self.cache_dir else None
+        if path and path.exists():
+            try:
+                cached = np.load(path)
+                self.cache_hits += 1
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable sound cache %s: %s", path, e)
+        if cached is None:
+            cached = render_variant(params, self.sample_rate)
+            self.synthesised += 1
+            if path:
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    np.save(path, cached)
+                except OSError as e:
+                    logger.warning("Could not write sound cache %s: %s", path, e)
+        self._samples[key] = cached
+        return cached
+
+    def sound(self, name: str | int):
+        """Mixer Sound for a variation; the mixer must be initialised."""
+        params = find_variation(name)
+        key = params["filename"]
+        sound = self._sounds.get(key)
+        if sound is None:
+            sound = self._sounds[key] = to_sound(self.samples(params))
+        return sound
+
+    def snapshot(self) -> dict:
+        return {"loaded": len(self._samples), "cache_hits": self.cache_hits, "synthesised": self.synthesised}
+
+
+def to_sound(samples: np.ndarray):
+    """Wrap mono int16 samples in a pygame Sound matching the mixer's channel count."""
+    import pygame
+
+    init = pygame.mixer.get_init()
+    if init is None:
+        raise pygame.error("mixer not initialised")
+    _frequency, _size, channels = init
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+
+
+def size_bucket(size: float) -> int:
+    """Quantised log10 trade size, clamped to the timbre range."""
+    low = round(math.log10(TIMBRE_MIN_SIZE) * TIMBRE_BUCKETS_PER_DECADE)
+    high = round(math.log10(TIMBRE_MAX_SIZE) * TIMBRE_BUCKETS_PER_DECADE)
+    if size <= 0:
+        return low
+    return min(max(round(math.log10(size) * TIMBRE_BUCKETS_PER_DECADE), low), high)
+
+
+def timbre_params(base: dict[str, Any], side: str, bucket: int) -> tuple[dict[str, Any], float]:
+    """Click parameters and gain for a size bucket: larger trades are lower, longer and louder."""
+    low, high = size_bucket(0), size_bucket(TIMBRE_MAX_SIZE)
+    t = (bucket - low) / (high - low)
+    frequency = base["frequency"] * (1.6 - 0.9 * t)
+    if side == "sell":
+        frequency *= SELL_PITCH
+    params = {
+        **base,
+        "frequency": round(frequency, 1),
+        "decay": round(base["decay"] * (1.5 - t), 3),
+        "duration": round(base["duration"] * (0.75 + 1.5 * t), 5),
+    }
+    return params, 0.35 + 0.65 * t
+
+
+class TimbreCache:
+    """Bounded LRU of click sounds rendered per (side, trade size bucket).
+
+    Pitch, decay, duration and gain follow the trade size (see
+    `timbre_params`), starting from the variation selected for each side.
+    Only a miss synthesises; hits, misses and the time spent rendering are
+    counted so the steady state can be checked to be allocation free.
+    """
+
+    def __init__(self, variations: dict[str, str], maxsize: int = TIMBRE_CACHE_SIZE,
+                 sample_rate: int = SAMPLE_RATE, build=to_sound):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.sample_rate = sample_rate
+        self._build = build
+        self._variations = {side: find_variation(name) for side, name in variations.items()}
+        self._entries: OrderedDict[tuple[str, int], object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.synth_seconds = 0.0
+
+    def set_variation(self, side: str, name: str) -> None:
+        """Base `side` on another variation, dropping the sounds rendered from the old one."""
+        params = find_variation(name)
+        with self._lock:
+            self._variations[side] = params
+            for key in [key for key in self._entries if key[0] == side]:
+                del self._entries[key]
+
+    def get(self, side: str, size: float):
+        side = "sell" if side == "sell" else "buy"
+        key = (side, size_bucket(size))
+        with self._lock:
+            sound = self._entries.get(key)
+            if sound is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sound
+            self.misses += 1
+            base = self._variations.get(side)
+        if base is None:
+            return None
+        start = time.perf_counter()
+        params, gain = timbre_params(base, side, key[1])
+        samples = (render_variant(params, self.sample_rate) * gain).astype(np.int16)
+        sound = self._build(samples)
+        with self._lock:
+            self.synth_seconds += time.perf_counter() - start
+            self._entries[key] = sound
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return sound
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "synth_ms": self.synth_seconds * 1000,
+            "synth_ms_per_miss": self.synth_seconds * 1000 / self.misses if self.misses else 0.0,
+        }
@@ -0,0 +1,60 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Timeline of startup phases and one-off milestones, relative to `origin`.
+
+    Phases (`with profile.phase("name"):`) record when they started and how
+    long they took, and on which thread, so work run concurrently shows as
+    overlapping. Milestones (`profile.mark("name")`) record only the first
+    time they are reached. Safe to use from any thread.
+    """
+
+    def __init__(self, origin: float | None = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self._lock = threading.Lock()
+        self.phases: list[tuple[str, float, float, str]] = []
+        self.marks: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, start - self.origin, end - start, threading.current_thread().name))
+
+    def mark(self, name: str) -> bool:
+        """Record milestone `name` unless it was already reached; returns whether it was recorded."""
+        now = time.perf_counter() - self.origin
+        with self._lock:
+            if name in self.marks:
+                return False
+            self.marks[name] = now
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "phases": [
+                    {"name": name, "start_ms": start * 1000, "ms": duration * 1000, "thread": thread}
+                    for name, start, duration, thread in self.phases
+                ],
+                "marks": {name: at * 1000 for name, at in self.marks.items()},
+            }
+
+    def report(self) -> str:
+        snapshot = self.snapshot()
+        events = [(p["start_ms"], p["start_ms"] + p["ms"], p["name"], p["thread"]) for p in snapshot["phases"]]
+        events += [(at, None, name, "") for name, at in snapshot["marks"].items()]
+        lines = [f"{'startup':<28} {'start ms':>9} {'end ms':>9} {'took ms':>9}  thread"]
+        for start, end, name, thread in sorted(events, key=lambda e: e[0]):
+            if end is None:
+                lines.append(f"{name:<28} {start:>9.1f} {'':>9} {'':>9}")
+            else:
+                lines.append(f"{name:<28} {start:>9.1f} {end:>9.1f} {end - start:>9.1f}  {thread}")
+        return "\n".join(lines)
@@ -0,0 +1,272 @@
+import bisect
+from collections import deque
+
+
+def _empty_level() -> dict:
+    return {
+        "total_trades": 0,
+        "session_volume": 0.0,
+        "avg_trade_size": 0.0,
+        "largest_trade": None,
+        "session_high": None,
+        "session_low": None,
+        "volume_usd": 0.0,
+        "buy_volume": 0.0,
+        "sell_volume": 0.0,
+    }
+
+
+class FilterLevelStats:
+    """Session stats kept for every size-filter threshold at once.
+
+    Level k accumulates trades with size >= thresholds[k]. A trade is binned
+    once with bisect and then folded into each level it passes, so switching
+    filters is a dict lookup instead of a rescan. Each level dict uses the same
+    keys as BTCBeeperApp.stats and can be merged into it directly.
+    """
+
+    def __init__(self, thresholds: list[float]):
+        self.thresholds = list(thresholds)
+        self._levels = [_empty_level() for _ in self.thresholds]
+
+    def add(self, price: float, size: float, side: str) -> int:
+        """Fold a trade into every level it passes; returns how many levels that was."""
+        passed = bisect.bisect_right(self.thresholds, size)
+        largest = None
+        usd = price * size
+        is_buy = side == "buy"
+        for level in self._levels[:passed]:
+            count = level["total_trades"] + 1
+            volume = level["session_volume"] + size
+            level["total_trades"] = count
+            level["session_volume"] = volume
+            level["avg_trade_size"] = volume / count
+            level["volume_usd"] += usd
+            if is_buy:
+                level["buy_volume"] += size
+            else:
+                level["sell_volume"] += size
+            high = level["session_high"]
+            if high is None or price > high:
+                level["session_high"] = price
+            low = level["session_low"]
+            if low is None or price < low:
+                level["session_low"] = price
+            current = level["largest_trade"]
+            if not current or size > current["size"]:
+                if largest is None:
+                    largest = {"price": price, "size": size, "side": side}
+                level["largest_trade"] = largest
+        return passed
+
+    def level(self, index: int) -> dict:
+        return self._levels[index]
+
+    def reset(self) -> None:
+        self._levels = [_empty_level() for _ in self.thresholds]
+
+
+class BotDetector:
+    """Sliding-window counts of repeated (rounded) trade sizes.
+
+    The window is bounded by trade count, by age in seconds, or both. Sizes are
+    also indexed by their current count, so the dominant size is available in
+    O(1) no matter how large the window grows.
+    """
+
+    def __init__(self, max_trades: int | None = None, max_age: float | None = None, precision: int = 4):
+        if max_trades is None and max_age is None:
+            raise ValueError("BotDetector needs max_trades and/or max_age")
+        self.max_trades = max_trades
+        self.max_age = max_age
+        self.precision = precision
+        self._window: deque[tuple[float, float]] = deque()
+        self._counts: dict[float, int] = {}
+        self._last_price: dict[float, float] = {}
+        # count -> sizes currently at that count, in the order they reached it
+        self._by_count: dict[int, dict[float, None]] = {}
+        self._max_count = 0
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def add(self, size: float, price: float, now: float) -> None:
+        size = round(size, self.precision)
+        self._window.append((now, size))
+        self._last_price[size] = price
+        count = self._counts.get(size, 0)
+        if count:
+            del self._by_count[count][size]
+        count += 1
+        self._counts[size] = count
+        self._by_count.setdefault(count, {})[size] = None
+        if count > self._max_count:
+            self._max_count = count
+        if self.max_trades is not None and len(self._window) > self.max_trades:
+            self._evict()
+        self.expire(now)
+
+    def expire(self, now: float) -> None:
+        if self.max_age is None:
+            return
+        cutoff = now - self.max_age
+        while self._window and self._window[0][0] < cutoff:
+            self._evict()
+
+    def _evict(self) -> None:
+        _, size = self._window.popleft()
+        count = self._counts[size]
+        del self._by_count[count][size]
+        if count == self._max_count and not self._by_count[count]:
+            self._max_count -= 1
+        count -= 1
+        if count:
+            self._counts[size] = count
+            self._by_count[count][size] = None
+        else:
+            del self._counts[size]
+            del self._last_price[size]
+
+    def dominant(self) -> tuple[float, int, float] | None:
+        """(size, count, last price) of the most repeated size in the window."""
+        if not self._max_count:
+            return None
+        size = next(iter(self._by_count[self._max_count]))
+        return size, self._max_count, self._last_price[size]
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._counts.clear()
+        self._last_price.clear()
+        self._by_count.clear()
+        self._max_count = 0
+
+
+class BatchCounters:
+    """Counts ingest batches and bins their sizes by power of two (1, 2-3, 4-7, ...)."""
+
+    def __init__(self):
+        self.batches = 0
+        self.frames = 0
+        self.max_batch = 0
+        self.size_histogram: list[int] = []
+
+    def record(self, size: int) -> None:
+        self.batches += 1
+        self.frames += size
+        if size > self.max_batch:
+            self.max_batch = size
+        bucket = size.bit_length() - 1
+        if bucket >= len(self.size_histogram):
+            self.size_histogram.extend([0] * (bucket + 1 - len(self.size_histogram)))
+        self.size_histogram[bucket] += 1
+
+    @property
+    def mean_batch(self) -> float:
+        return self.frames / self.batches if self.batches else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "max_batch": self.max_batch,
+            "mean_batch": self.mean_batch,
+            "size_histogram": list(self.size_histogram),
+        }
+
+
+SEQ_OK = "ok"
+SEQ_GAP = "gap"
+SEQ_LATE = "late"
+SEQ_DUPLICATE = "duplicate"
+
+
+class SequenceTracker:
+    """Accounts for numbers that should rise by exactly one per message, such as a product's trade IDs.
+
+    A jump counts as a gap of the skipped numbers. The last `max_open_gaps`
+    gaps are remembered so a frame that later fills one counts as late (out
+    of order) rather than as a duplicate; anything else at or below the
+    highest number seen is a duplicate. `reset` drops the baseline, e.g. on
+    reconnect, without clearing the session counts.
+    """
+
+    def __init__(self, max_open_gaps: int = 64):
+        self.last: int | None = None
+        self.received = 0
+        self.gaps = 0
+        self.missing = 0
+        self.last_gap = 0
+        self.largest_gap = 0
+        self.late = 0
+        self.duplicates = 0
+        self.max_open_gaps = max_open_gaps
+        # [first, last] missing sequence numbers, oldest first
+        self._open: list[list[int]] = []
+
+    def observe(self, sequence: int) -> str:
+        self.received += 1
+        last = self.last
+        if last is None or sequence == last + 1:
+            self.last = sequence
+            return SEQ_OK
+        if sequence > last:
+            size = sequence - last - 1
+            self.gaps += 1
+            self.missing += size
+            self.last_gap = size
+            if size > self.largest_gap:
+                self.largest_gap = size
+            self._open.append([last + 1, sequence - 1])
+            self._trim()
+            self.last = sequence
+            return SEQ_GAP
+        for i, span in enumerate(self._open):
+            first, end = span
+            if first <= sequence <= end:
+                if first == end:
+                    del self._open[i]
+                elif sequence == first:
+                    span[0] += 1
+                elif sequence == end:
+                    span[1] -= 1
+                else:
+                    span[1] = sequence - 1
+                    self._open.insert(i + 1, [sequence + 1, end])
+                    self._trim()
+                self.late += 1
+                self.missing -= 1
+                return SEQ_LATE
+        self.duplicates += 1
+        return SEQ_DUPLICATE
+
+    def _trim(self) -> None:
+        # Numbers in gaps forgotten here can no longer be told apart from duplicates
+        if len(self._open) > self.max_open_gaps:
+            del self._open[0]
+
+    def reset(self) -> None:
+        self.last = None
+        self._open.clear()
+
+    def counts(self) -> dict:
+        return {
+            "seq_gaps": self.gaps,
+            "seq_missing": self.missing,
+            "seq_last_gap": self.last_gap,
+            "seq_largest_gap": self.largest_gap,
+            "seq_late": self.late,
+            "seq_duplicates": self.duplicates,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "received": self.received,
+            "gaps": self.gaps,
+            "missing": self.missing,
+            "last_gap": self.last_gap,
+            "largest_gap": self.largest_gap,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "open_gaps": len(self._open),
+        }
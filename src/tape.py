@@ -0,0 +1,329 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+if __package__:
+    from .trade_ring import NO_TRADE_ID, SIDE_BUY, SIDE_SELL, SIDE_UNKNOWN
+else:
+    from trade_ring import NO_TRADE_ID, SIDE_BUY, SIDE_SELL, SIDE_UNKNOWN
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_IDS = [p.strip() for p in os.getenv("BTCBEEPER_PRODUCTS", "BTC-USD").split(",") if p.strip()]
+PRODUCT_ID = PRODUCT_IDS[0]
+# Trade size steps: the engine's size filter levels and the bins of the size heatmap and tape queries
+SIZE_BINS = [0.0001, 0.001, 0.01, 0.1, 1]
+
+TAPE_DIR = os.getenv("BTCBEEPER_TAPE_DIR")
+# Oldest segments are deleted once the whole tape, every product, is over this
+TAPE_MAX_BYTES = int(float(os.getenv("BTCBEEPER_TAPE_MAX_BYTES", str(2 * 1024**3))))
+# A segment is closed and a new one started for the same day past this size
+TAPE_SEGMENT_BYTES = int(float(os.getenv("BTCBEEPER_TAPE_SEGMENT_BYTES", str(64 * 1024**2))))
+TAPE_FLUSH_INTERVAL = float(os.getenv("BTCBEEPER_TAPE_FLUSH_INTERVAL", "1"))
+# Trades held for the writer thread before new ones are dropped
+TAPE_MAX_PENDING = int(os.getenv("BTCBEEPER_TAPE_MAX_PENDING", "1000000"))
+TAPE_INDEX_EVERY = 1024
+TAPE_MAGIC = b"BTCTAPE1"
+TAPE_VERSION = 1
+SEGMENT_SUFFIX = ".tape"
+INDEX_SUFFIX = ".idx"
+
+# Explicit offsets and itemsize, so the layout on disk never depends on numpy's alignment rules
+RECORD_DTYPE = np.dtype({
+    "names": ["time", "price", "size", "trade_id", "side"],
+    "formats": ["<f8", "<f8", "<f8", "<i8", "u1"],
+    "offsets": [0, 8, 16, 24, 32],
+    "itemsize": 40,
+})
+HEADER_DTYPE = np.dtype({
+    "names": ["magic", "version", "record_size", "index_every", "product_id", "created"],
+    "formats": ["S8", "<u4", "<u4", "<u4", "S20", "<f8"],
+    "offsets": [0, 8, 12, 16, 20, 40],
+    "itemsize": 64,
+})
+# One entry per TAPE_INDEX_EVERY records: where the block starts and the time range inside it
+INDEX_DTYPE = np.dtype([("first", "<i8"), ("min_time", "<f8"), ("max_time", "<f8")])
+SIDE_CODES = {"buy": SIDE_BUY, "sell": SIDE_SELL}
+DAY = 86400
+
+
+def segment_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+class TapeFormatError(ValueError):
+    """A segment file is not a tape or was written by an incompatible version."""
+
+
+def read_header(path: str | Path) -> dict:
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_DTYPE.itemsize)
+    if len(raw) < HEADER_DTYPE.itemsize:
+        raise TapeFormatError(f"{path}: truncated header")
+    header = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if header["magic"] != TAPE_MAGIC:
+        raise TapeFormatError(f"{path}: not a trade tape")
+    if header["version"] != TAPE_VERSION or header["record_size"] != RECORD_DTYPE.itemsize:
+        raise TapeFormatError(f"{path}: unsupported tape version {header['version']}")
+    return {
+        "product_id": header["product_id"].decode("ascii"),
+        "created": float(header["created"]),
+        "index_every": int(header["index_every"]),
+    }
+
+
+def read_records(path: str | Path) -> np.ndarray:
+    """Memory-map a segment's records; a record cut short by a crash is left out."""
+    read_header(path)
+    count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+
+def read_index(path: str | Path) -> np.ndarray:
+    """The sparse time index next to segment `path` (empty if it has none yet)."""
+    index_path = Path(path).with_suffix(INDEX_SUFFIX)
+    if not index_path.exists():
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    raw = index_path.read_bytes()
+    return np.frombuffer(raw[: len(raw) // INDEX_DTYPE.itemsize * INDEX_DTYPE.itemsize], dtype=INDEX_DTYPE)
+
+
+def segment_paths(root: str | Path, product_id: str) -> list[Path]:
+    """Segments for `product_id`, oldest first."""
+    return sorted((Path(root) / product_id).glob(f"*{SEGMENT_SUFFIX}"))
+
+
+class _Segment:
+    """One open segment file and the index block currently being filled."""
+
+    def __init__(self, path: Path, product_id: str, day: str):
+        self.path = path
+        self.day = day
+        self.records = 0
+        self._block_min = math.inf
+        self._block_max = -math.inf
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (TAPE_MAGIC, TAPE_VERSION, RECORD_DTYPE.itemsize, TAPE_INDEX_EVERY,
+                     product_id.encode("ascii", "replace"), time.time())
+        self._file = open(path, "xb", buffering=1024 * 1024)
+        self._file.write(header.tobytes())
+        self._index = open(path.with_suffix(INDEX_SUFFIX), "xb")
+        self.bytes = HEADER_DTYPE.itemsize
+
+    def write(self, records: np.ndarray) -> None:
+        self._file.write(records.tobytes())
+        self.bytes += records.nbytes
+        times = records["time"]
+        entries = []
+        offset = 0
+        while offset < len(records):
+            take = min(TAPE_INDEX_EVERY - self.records % TAPE_INDEX_EVERY, len(records) - offset)
+            block = times[offset:offset + take]
+            self._block_min = min(self._block_min, float(block.min()))
+            self._block_max = max(self._block_max, float(block.max()))
+            self.records += take
+            offset += take
+            if self.records % TAPE_INDEX_EVERY == 0:
+                entries.append(self._close_block())
+        if entries:
+            self._index.write(np.array(entries, dtype=INDEX_DTYPE).tobytes())
+
+    def _close_block(self) -> tuple:
+        first = (self.records - 1) // TAPE_INDEX_EVERY * TAPE_INDEX_EVERY
+        entry = (first, self._block_min, self._block_max)
+        self._block_min, self._block_max = math.inf, -math.inf
+        return entry
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        # The last, partial block gets an entry too, so a closed segment is fully indexed
+        if self.records % TAPE_INDEX_EVERY:
+            self._index.write(np.array([self._close_block()], dtype=INDEX_DTYPE).tobytes())
+        self._file.close()
+        self._index.close()
+
+
+class TapeWriter:
+    """Appends every trade to fixed-width binary records, one directory per product.
+
+    `append` only adds a tuple to the product's deque, with no lock, since
+    deque appends and pops are atomic, so the feed pays well under a
+    microsecond per trade. Every `flush_interval` seconds a background
+    thread pops whatever each deque holds, packs it into a NumPy record
+    array and writes it with one buffered write. Records go to daily segment files
+    (`<root>/<product>/<YYYY-MM-DD>-<n>.tape`, UTC day of the trade), each
+    with a 64-byte header and a sparse `.idx` of (first record, min time,
+    max time) per TAPE_INDEX_EVERY records. Every session starts a new
+    segment, as does a segment reaching `segment_bytes`. After each new
+    segment, the oldest closed ones are deleted until the tape fits in
+    `max_bytes`. If the writer falls more than `max_pending` trades behind,
+    new trades are dropped and counted rather than growing memory.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = TAPE_MAX_BYTES,
+        segment_bytes: int = TAPE_SEGMENT_BYTES,
+        flush_interval: float = TAPE_FLUSH_INTERVAL,
+        max_pending: int = TAPE_MAX_PENDING,
+    ):
+        if segment_bytes <= HEADER_DTYPE.itemsize or max_bytes < segment_bytes:
+            raise ValueError("segment_bytes must fit a record and max_bytes must fit a segment")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # One queue per product; deque appends and pops are atomic, so the feed never takes a lock
+        self._pending: dict[str, deque] = {}
+        self._wake = threading.Event()
+        # Completed writer passes, so flush() can wait for one that started after it was called
+        self._passes = 0
+        self._passed = threading.Condition()
+        self._stopping = False
+        self._segments: dict[str, _Segment] = {}
+        self.records_written = 0
+        self.bytes_written = 0
+        self.segments_opened = 0
+        self.segments_deleted = 0
+        self.dropped = 0
+        self.error: OSError | None = None
+        self._thread = threading.Thread(target=self._run, name="btcbeeper-tape", daemon=True)
+        self._thread.start()
+
+    def append(self, product_id: str, ts: float, price: float, size: float, side: str,
+               trade_id: int = NO_TRADE_ID) -> None:
+        queue = self._pending.get(product_id)
+        if queue is None:
+            queue = self._pending.setdefault(product_id, deque())
+        if len(queue) >= self.max_pending:
+            self.dropped += 1
+            return
+        queue.append((ts, price, size, trade_id, SIDE_CODES.get(side, SIDE_UNKNOWN)))
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_pending()
+            with self._passed:
+                self._passes += 1
+                self._passed.notify_all()
+        self._write_pending()
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+
+    def _write_pending(self) -> None:
+        try:
+            for product_id, queue in list(self._pending.items()):
+                # Only what is queued now; trades appended meanwhile wait for the next pass
+                popleft = queue.popleft
+                rows = [popleft() for _ in range(len(queue))]
+                if rows and self.error is None:
+                    self._write_product(product_id, np.array(rows, dtype=RECORD_DTYPE))
+            if self.error is None:
+                for segment in self._segments.values():
+                    segment.flush()
+        except OSError as e:
+            # Disk full or gone: stop taping and discard from here on, but keep the feed running
+            self.error = e
+            logger.error("Trade tape stopped: %s", e)
+
+    def _write_product(self, product_id: str, records: np.ndarray) -> None:
+        days = (records["time"] // DAY).astype(np.int64)
+        # Trades are in time order, bar a late frame or two; split wherever the UTC day changes
+        cuts = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for chunk in np.split(records, cuts):
+            day = segment_day(float(chunk["time"][0]))
+            current = self._segments.get(product_id)
+            if current is not None and day < current.day:
+                # A late trade from before midnight stays in today's segment
+                day = current.day
+            while len(chunk):
+                segment = self._segment_for(product_id, day)
+                room = max((self.segment_bytes - segment.bytes) // RECORD_DTYPE.itemsize, 1)
+                part, chunk = chunk[:room], chunk[room:]
+                segment.write(part)
+                self.records_written += len(part)
+                self.bytes_written += part.nbytes
+
+    def _segment_for(self, product_id: str, day: str) -> _Segment:
+        segment = self._segments.get(product_id)
+        if segment is not None and segment.day == day and segment.bytes < self.segment_bytes:
+            return segment
+        if segment is not None:
+            segment.close()
+        directory = self.root / product_id
+        directory.mkdir(exist_ok=True)
+        number = len(list(directory.glob(f"{day}-*{SEGMENT_SUFFIX}")))
+        while (directory / f"{day}-{number:03d}{SEGMENT_SUFFIX}").exists():
+            number += 1
+        segment = _Segment(directory / f"{day}-{number:03d}{SEGMENT_SUFFIX}", product_id, day)
+        self._segments[product_id] = segment
+        self.segments_opened += 1
+        self._enforce_budget()
+        return segment
+
+    def _enforce_budget(self) -> None:
+        open_paths = {segment.path for segment in self._segments.values()}
+        segments = sorted(
+            (path.stat().st_mtime, path) for path in self.root.glob(f"*/*{SEGMENT_SUFFIX}")
+            if path not in open_paths
+        )
+        total = sum(path.stat().st_size for _, path in segments) + sum(
+            segment.bytes for segment in self._segments.values()
+        )
+        for _, path in segments:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+            path.with_suffix(INDEX_SUFFIX).unlink(missing_ok=True)
+            self.segments_deleted += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write and flush everything appended so far; False if the writer did not get to it in time."""
+        deadline = time.monotonic() + timeout
+        with self._passed:
+            # A pass already under way may have taken its batch before the latest appends
+            target = self._passes + 2
+            while self._passes < target and self._thread.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._wake.set()
+                self._passed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def snapshot(self) -> dict:
+        pending = sum(len(queue) for queue in list(self._pending.values()))
+        return {
+            "root": str(self.root),
+            "records": self.records_written,
+            "bytes": self.bytes_written,
+            "pending": pending,
+            "dropped": self.dropped,
+            "segments_opened": self.segments_opened,
+            "segments_deleted": self.segments_deleted,
+            "error": str(self.error) if self.error else None,
+        }
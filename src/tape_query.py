@@ -0,0 +1,296 @@
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+if __package__:
+    from .tape import (
+        DAY,
+        PRODUCT_ID,
+        RECORD_DTYPE,
+        SIZE_BINS,
+        TAPE_DIR,
+        TAPE_INDEX_EVERY,
+        read_index,
+        read_records,
+        segment_paths,
+    )
+    from .trade_ring import SIDE_BUY, SIDE_SELL, SIDE_UNKNOWN, format_exchange_time
+else:
+    from tape import (
+        DAY,
+        PRODUCT_ID,
+        RECORD_DTYPE,
+        SIZE_BINS,
+        TAPE_DIR,
+        TAPE_INDEX_EVERY,
+        read_index,
+        read_records,
+        segment_paths,
+    )
+    from trade_ring import SIDE_BUY, SIDE_SELL, SIDE_UNKNOWN, format_exchange_time
+
+SIDE_NAMES = {SIDE_BUY: "buy", SIDE_SELL: "sell", SIDE_UNKNOWN: "unknown"}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": DAY}
+_LAST_DURATION = re.compile(r"^(?:last|past)\s+(\d+(?:\.\d+)?)\s*([smhd])$")
+_HOURS = re.compile(r"(?:^|\s)(\d{1,2})(?::(\d{2}))?\s*(?:-|–|—|to)\s*(\d{1,2})(?::(\d{2}))?$")
+
+
+def _segment_slice(path: Path, start: float, end: float) -> np.ndarray | None:
+    """Records of one segment with start <= time < end."""
+    records = read_records(path)
+    if not len(records):
+        return None
+    index = read_index(path)
+    firsts = index["first"]
+    mins, maxes = index["min_time"], index["max_time"]
+    covered = int(firsts[-1]) + TAPE_INDEX_EVERY if len(index) else 0
+    if covered < len(records):
+        # A segment still being written has a tail of records the index does not cover yet
+        tail = records["time"][covered:]
+        firsts = np.append(firsts, covered)
+        mins = np.append(mins, tail.min())
+        maxes = np.append(maxes, tail.max())
+    # Times are in order bar the odd late trade, so search running bounds rather than raw ones:
+    # blocks before `lo` end before `start`, blocks from `hi` on begin at or after `end`
+    lo = int(np.searchsorted(np.maximum.accumulate(maxes), start, "left"))
+    hi = int(np.searchsorted(np.minimum.accumulate(mins[::-1])[::-1], end, "left"))
+    if lo >= hi:
+        return None
+    span = records[firsts[lo]:firsts[hi] if hi < len(firsts) else len(records)]
+    times = span["time"]
+    if len(times) < 2 or not (times[1:] < times[:-1]).any():
+        # In order: a view into the memory map, nothing copied
+        return span[np.searchsorted(times, start, "left"):np.searchsorted(times, end, "left")]
+    return span[(times >= start) & (times < end)]
+
+
+@dataclass(slots=True)
+class TapeRange:
+    """Trades with start <= time < end, as one record array per segment, oldest first.
+
+    Each part is a view into its segment's memory map unless a late trade
+    put that segment's times out of order, in which case it is a filtered
+    copy. Aggregations work part by part, so nothing is concatenated
+    unless `column` is asked for.
+    """
+
+    start: float
+    end: float
+    parts: list[np.ndarray]
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self.parts)
+
+    def column(self, name: str) -> np.ndarray:
+        if len(self.parts) == 1:
+            return self.parts[0][name]
+        return np.concatenate([part[name] for part in self.parts]) if self.parts else np.zeros(0)
+
+    def volume(self) -> float:
+        return float(sum(part["size"].sum() for part in self.parts))
+
+    def notional(self) -> float:
+        return float(sum(np.dot(part["price"], part["size"]) for part in self.parts))
+
+    def vwap(self) -> float | None:
+        volume = self.volume()
+        return self.notional() / volume if volume else None
+
+    def price_range(self) -> tuple[float, float] | None:
+        if not len(self):
+            return None
+        return (float(min(part["price"].min() for part in self.parts if len(part))),
+                float(max(part["price"].max() for part in self.parts if len(part))))
+
+    def volume_by_side(self) -> dict[str, float]:
+        totals = np.zeros(len(SIDE_NAMES))
+        for part in self.parts:
+            sides = np.minimum(part["side"], SIDE_UNKNOWN)
+            totals += np.bincount(sides, weights=part["size"], minlength=len(SIDE_NAMES))
+        return {name: float(totals[code]) for code, name in SIDE_NAMES.items()}
+
+    def size_histogram(self, bins: list[float] = SIZE_BINS) -> list[int]:
+        """Trade counts per size bucket, the size heatmap's bins: bucket i counts sizes in [bins[i-1], bins[i])."""
+        counts = np.zeros(len(bins) + 1, dtype=np.int64)
+        for part in self.parts:
+            counts += np.bincount(np.searchsorted(bins, part["size"], "right"), minlength=len(bins) + 1)
+        return counts.tolist()
+
+    def top(self, n: int, by: str = "size") -> np.ndarray:
+        """The `n` trades with the largest `by` column, largest first (a copy)."""
+        if n <= 0 or not self.parts:
+            return np.zeros(0, dtype=self.parts[0].dtype if self.parts else RECORD_DTYPE)
+        candidates = []
+        for part in self.parts:
+            keep = min(n, len(part))
+            if keep < len(part):
+                part = part[np.argpartition(part[by], len(part) - keep)[-keep:]]
+            candidates.append(np.asarray(part))
+        merged = np.concatenate(candidates)
+        return merged[np.argsort(merged[by], kind="stable")[::-1][:n]]
+
+    def summary(self, top_n: int = 10) -> dict:
+        """JSON-serialisable digest of the range."""
+        price_range = self.price_range()
+        return {
+            "start": self.start,
+            "end": self.end,
+            "trades": len(self),
+            "volume": self.volume(),
+            "notional": self.notional(),
+            "vwap": self.vwap(),
+            "low": price_range[0] if price_range else None,
+            "high": price_range[1] if price_range else None,
+            "volume_by_side": self.volume_by_side(),
+            "size_bins": list(SIZE_BINS),
+            "size_histogram": self.size_histogram(),
+            "top": [
+                {"time": format_exchange_time(float(r["time"])), "price": float(r["price"]),
+                 "size": float(r["size"]), "side": SIDE_NAMES.get(int(r["side"]), "unknown"),
+                 "trade_id": int(r["trade_id"])}
+                for r in self.top(top_n)
+            ],
+        }
+
+
+def query(root: str | Path, product_id: str, start: float, end: float) -> TapeRange:
+    """Trades for `product_id` with start <= time < end from the tape under `root`."""
+    parts = []
+    for path in segment_paths(root, product_id):
+        # A segment only holds trades from before the end of its UTC day, so whole days can be skipped by name
+        try:
+            day_end = datetime.strptime(path.name[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() + DAY
+        except ValueError:
+            day_end = float("inf")
+        if day_end <= start:
+            continue
+        part = _segment_slice(path, start, end)
+        if part is not None and len(part):
+            parts.append(part)
+    return TapeRange(start, end, parts)
+
+
+def _at(day: date, hour: int, minute: int, utc: bool) -> datetime:
+    if not (0 <= hour <= 24 and 0 <= minute < 60):
+        raise ValueError(f"invalid time {hour}:{minute:02d}")
+    moment = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, minutes=minute)
+    # Naive local times are resolved with the UTC offset in force on that day
+    return moment.replace(tzinfo=timezone.utc) if utc else moment.astimezone()
+
+
+def parse_range(text: str, now: datetime | None = None, utc: bool = False) -> tuple[float, float]:
+    """(start, end) epoch seconds for expressions like "last tuesday 14:00-15:00".
+
+    The day part is empty (today), "today", "yesterday", a weekday ("tuesday"
+    is the latest one, today included; "last tuesday" the one before today)
+    or an ISO date. It may be followed by an hour range such as "14-15" or
+    "9:30–16:00"; without one the whole day is covered. "last 2h" (s, m, h or
+    d) means the span up to now. Times are local unless `utc`.
+    """
+    now = now or (datetime.now(timezone.utc) if utc else datetime.now().astimezone())
+    text = " ".join(text.lower().split())
+    duration = _LAST_DURATION.match(text)
+    if duration:
+        end = now.timestamp()
+        return end - float(duration.group(1)) * UNIT_SECONDS[duration.group(2)], end
+
+    hours = _HOURS.search(text)
+    day_text = text[: hours.start()].strip() if hours else text
+    today = now.date()
+    if day_text in ("", "today"):
+        day = today
+    elif day_text == "yesterday":
+        day = today - timedelta(days=1)
+    elif day_text.removeprefix("last ") in WEEKDAYS:
+        back = (today.weekday() - WEEKDAYS.index(day_text.removeprefix("last "))) % 7
+        if day_text.startswith("last ") and back == 0:
+            back = 7
+        day = today - timedelta(days=back)
+    else:
+        try:
+            day = date.fromisoformat(day_text)
+        except ValueError:
+            raise ValueError(f"don't know when {text!r} is") from None
+
+    if not hours:
+        return _at(day, 0, 0, utc).timestamp(), _at(day + timedelta(days=1), 0, 0, utc).timestamp()
+    h1, m1, h2, m2 = (int(g) if g else 0 for g in hours.groups())
+    start, end = _at(day, h1, m1, utc), _at(day, h2, m2, utc)
+    if end <= start:
+        # "23-01" runs past midnight
+        end = _at(day + timedelta(days=1), h2, m2, utc)
+    return start.timestamp(), end.timestamp()
+
+
+def _format_local(ts: float, utc: bool) -> str:
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    return (moment if utc else moment.astimezone()).strftime("%a %Y-%m-%d %H:%M:%S %Z")
+
+
+def _print_summary(summary: dict, product_id: str, utc: bool, elapsed: float) -> None:
+    print(f"{product_id}  {_format_local(summary['start'], utc)}  →  {_format_local(summary['end'], utc)}")
+    if not summary["trades"]:
+        print(f"no trades  ({elapsed * 1000:.1f} ms)")
+        return
+    sides = summary["volume_by_side"]
+    print(f"trades {summary['trades']:,}  volume {summary['volume']:,.4f}  notional ${summary['notional']:,.2f}")
+    print(f"vwap {summary['vwap']:,.2f}  low {summary['low']:,.2f}  high {summary['high']:,.2f}")
+    print(f"buy {sides['buy']:,.4f}  sell {sides['sell']:,.4f}" + (
+        f"  unknown {sides['unknown']:,.4f}" if sides["unknown"] else ""))
+    bins = summary["size_bins"]
+    labels = [f"< {bins[0]:g}"] + [f"{lo:g}–{hi:g}" for lo, hi in zip(bins, bins[1:])] + [f"≥ {bins[-1]:g}"]
+    for label, count in zip(labels, summary["size_histogram"]):
+        print(f"{label:>14}  {count:>10,}")
+    if summary["top"]:
+        print("largest trades")
+        for trade in summary["top"]:
+            print(f"  {trade['time']}  {trade['side']:<4}  {trade['size']:>12.8f} @ {trade['price']:,.2f}")
+    print(f"({elapsed * 1000:.1f} ms)")
+
+
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("must be 0 or more")
+    return number
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="tape_query", description="Summarise trades stored on the tape")
+    parser.add_argument("when", nargs="+",
+                        help='e.g. "last tuesday 14:00-15:00", "yesterday", "2024-01-15 9-17" or "last 2h"')
+    parser.add_argument("--tape", metavar="DIR", default=TAPE_DIR or "data/tape", help="tape directory")
+    parser.add_argument("--product", default=PRODUCT_ID)
+    parser.add_argument("--top", type=_non_negative_int, default=10, metavar="N", help="largest trades to list")
+    parser.add_argument("--utc", action="store_true", help="read and print times as UTC instead of local")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    try:
+        start, end = parse_range(" ".join(args.when), utc=args.utc)
+    except ValueError as e:
+        sys.exit(f"tape_query: {e}")
+    if not Path(args.tape, args.product).is_dir():
+        sys.exit(f"tape_query: no tape for {args.product} under {args.tape}")
+    began = time.perf_counter()
+    summary = query(args.tape, args.product, start, end).summary(args.top)
+    elapsed = time.perf_counter() - began
+    if args.json:
+        print(json.dumps({"product_id": args.product, **summary, "elapsed": elapsed}))
+    else:
+        _print_summary(summary, args.product, args.utc, elapsed)
+
+
+if __name__ == "__main__":
+    main()
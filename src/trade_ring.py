@@ -0,0 +1,217 @@
+import bisect
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+SIDE_BUY = 0
+SIDE_SELL = 1
+SIDE_UNKNOWN = 2
+MAX_SIDE_CODES = 256
+NO_TRADE_ID = -1
+ORDER_ID_WIDTH = 36
+
+
+def parse_exchange_time(value: str) -> float:
+    """Convert a Coinbase ISO-8601 timestamp to epoch seconds (NaN if unparseable)."""
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def format_exchange_time(ts: float) -> str:
+    if math.isnan(ts):
+        return ""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+@dataclass(slots=True)
+class TradeView:
+    """Column arrays for a contiguous run of trades, oldest first.
+
+    `seq` is the absolute sequence number of the first row; row i has seq + i.
+    Arrays are views into the ring when the run does not wrap, copies otherwise.
+    """
+
+    seq: int
+    price: np.ndarray
+    size: np.ndarray
+    side: np.ndarray
+    time: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+
+class TradeRing:
+    """Fixed-capacity, array-backed ring of trades.
+
+    Each trade is stored across parallel columns (float64 price/size/time,
+    uint8 side code, int64 trade id, fixed-width bytes order ids), so appending
+    never allocates and 100k rows fit in roughly 10 MB. Every appended trade gets
+    a monotonically increasing sequence number that stays valid until the slot
+    is overwritten.
+
+    When `size_bins` is given the ring also keeps a size histogram (bucket i
+    counts sizes in [bins[i-1], bins[i]) as with bisect_right) that is updated
+    on append and eviction, so reading it never rescans the buffer.
+    """
+
+    def __init__(self, capacity: int, size_bins: list[float] | None = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.side = np.zeros(capacity, dtype=np.uint8)
+        self.time = np.full(capacity, np.nan, dtype=np.float64)
+        self.trade_id = np.full(capacity, NO_TRADE_ID, dtype=np.int64)
+        self.maker_order_id = np.zeros(capacity, dtype=f"S{ORDER_ID_WIDTH}")
+        self.taker_order_id = np.zeros(capacity, dtype=f"S{ORDER_ID_WIDTH}")
+        self._side_names = ["buy", "sell", "unknown"]
+        self._side_codes = {"buy": SIDE_BUY, "sell": SIDE_SELL, "unknown": SIDE_UNKNOWN}
+        self._size_bins = list(size_bins) if size_bins else None
+        self._size_bucket = np.zeros(capacity, dtype=np.uint8)
+        self._bucket_counts = [0] * (len(self._size_bins) + 1) if self._size_bins else []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def total_appended(self) -> int:
+        return self._count
+
+    @property
+    def first_seq(self) -> int:
+        return self._count - len(self)
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.capacity
+
+    def side_code(self, side: str) -> int:
+        code = self._side_codes.get(side)
+        if code is None:
+            # Unusual sides are interned into the code table so they still round-trip
+            if len(self._side_names) >= MAX_SIDE_CODES:
+                return SIDE_UNKNOWN
+            code = len(self._side_names)
+            self._side_names.append(side)
+            self._side_codes[side] = code
+        return code
+
+    def side_name(self, code: int) -> str:
+        return self._side_names[code]
+
+    def append(
+        self,
+        price: float,
+        size: float,
+        side: str = "unknown",
+        time: float = math.nan,
+        trade_id: int = NO_TRADE_ID,
+        maker_order_id: str = "",
+        taker_order_id: str = "",
+    ) -> int:
+        seq = self._count
+        slot = seq % self.capacity
+        self.price[slot] = price
+        self.size[slot] = size
+        self.side[slot] = self.side_code(side)
+        self.time[slot] = time
+        self.trade_id[slot] = trade_id
+        self.maker_order_id[slot] = maker_order_id.encode("ascii", "replace")
+        self.taker_order_id[slot] = taker_order_id.encode("ascii", "replace")
+        if self._size_bins:
+            if seq >= self.capacity:
+                self._bucket_counts[self._size_bucket[slot]] -= 1
+            bucket = bisect.bisect_right(self._size_bins, size)
+            self._size_bucket[slot] = bucket
+            self._bucket_counts[bucket] += 1
+        self._count = seq + 1
+        return seq
+
+    def clear(self) -> None:
+        self._count = 0
+        self._bucket_counts = [0] * len(self._bucket_counts)
+
+    def bucket_counts(self) -> list[int]:
+        """Snapshot of the size histogram over the retained trades."""
+        return list(self._bucket_counts)
+
+    def _slot(self, seq: int) -> int | None:
+        if seq < self.first_seq or seq >= self._count:
+            return None
+        return seq % self.capacity
+
+    def get(self, seq: int) -> dict | None:
+        """Materialize the trade with sequence number `seq`, or None if evicted."""
+        slot = self._slot(seq)
+        if slot is None:
+            return None
+        trade_id = int(self.trade_id[slot])
+        return {
+            "seq": seq,
+            "price": float(self.price[slot]),
+            "size": float(self.size[slot]),
+            "side": self._side_names[self.side[slot]],
+            "trade_id": "" if trade_id == NO_TRADE_ID else trade_id,
+            "maker_order_id": self.maker_order_id[slot].decode("ascii"),
+            "taker_order_id": self.taker_order_id[slot].decode("ascii"),
+            "time": format_exchange_time(float(self.time[slot])),
+        }
+
+    def __getitem__(self, index: int) -> dict:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("trade ring index out of range")
+        return self.get(self.first_seq + index)
+
+    def _tail_slices(self, n: int) -> list[slice]:
+        if n <= 0:
+            return []
+        end = (self._count - 1) % self.capacity + 1
+        start = end - n
+        if start >= 0:
+            return [slice(start, end)]
+        return [slice(start + self.capacity, self.capacity), slice(0, end)]
+
+    def _column_tail(self, column: np.ndarray, slices: list[slice]) -> np.ndarray:
+        if not slices:
+            return column[:0]
+        if len(slices) == 1:
+            return column[slices[0]]
+        return np.concatenate([column[s] for s in slices])
+
+    def tail(self, n: int | None = None) -> TradeView:
+        """Return the newest `n` trades (all retained trades if None) as columns."""
+        n = len(self) if n is None else min(max(n, 0), len(self))
+        slices = self._tail_slices(n)
+        return TradeView(
+            seq=self._count - n,
+            price=self._column_tail(self.price, slices),
+            size=self._column_tail(self.size, slices),
+            side=self._column_tail(self.side, slices),
+            time=self._column_tail(self.time, slices),
+        )
+
+    def tail_seqs_where_size_at_least(self, min_size: float, lookback: int) -> list[int]:
+        """Sequence numbers of trades with size >= `min_size` among the newest `lookback`."""
+        view = self.tail(lookback)
+        return (np.flatnonzero(view.size >= min_size) + view.seq).tolist()
+
+    def iter_rows(self, n: int | None = None):
+        """Yield (seq, price, size, side) tuples oldest first without building dicts."""
+        view = self.tail(n)
+        names = self._side_names
+        for offset, (price, size, code) in enumerate(
+            zip(view.price.tolist(), view.size.tolist(), view.side.tolist())
+        ):
+            yield view.seq + offset, price, size, names[code]
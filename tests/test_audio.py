@@ -0,0 +1,131 @@
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audio import PITCH_STEPS, AudioEngine, texture_volume
+
+
+class FakeChannel:
+    def __init__(self):
+        self.busy = False
+        self.played = []
+        self.volume = None
+
+    def get_busy(self):
+        return self.busy
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def play(self, sound):
+        self.played.append(sound)
+
+
+@pytest.fixture
+def engine():
+    buy, sell = MagicMock(name="buy"), MagicMock(name="sell")
+    engine = AudioEngine({"buy": buy, "sell": sell}, channels=4, tick=0.02, aggregate_tps=100)
+    engine._channels = [FakeChannel() for _ in range(4)]
+    # Pitch variants stand in for resampled sounds
+    for side, sound in (("buy", buy), ("sell", sell)):
+        for step in range(len(PITCH_STEPS)):
+            engine._pitched[(side, step)] = sound if step == 0 else (side, step)
+    return engine
+
+
+def played(engine):
+    return [sound for channel in engine._channels for sound in channel.played]
+
+
+class TestAudioEngine:
+    def test_low_rate_plays_each_click(self, engine):
+        engine.submit("buy", 0.1)
+        engine.submit("sell", 0.2)
+        engine.tick()
+        assert played(engine) == [engine.sounds["buy"], engine.sounds["sell"]]
+        assert engine.snapshot()["mode"] == "clicks"
+
+    def test_clicks_spread_round_robin_over_pool(self, engine):
+        for _ in range(4):
+            engine.submit("buy", 0.1)
+        engine.tick()
+        assert [len(channel.played) for channel in engine._channels] == [1, 1, 1, 1]
+
+    def test_busy_pool_drops_clicks(self, engine):
+        for channel in engine._channels:
+            channel.busy = True
+        engine.submit("buy", 0.1)
+        engine.tick()
+        assert engine.dropped == 1
+        assert engine.played == 0
+
+    def test_high_rate_merges_into_texture(self, engine):
+        engine.rate = 1000
+        for _ in range(8):
+            engine.submit("buy", 0.5)
+        for _ in range(2):
+            engine.submit("sell", 0.1)
+        engine.tick()
+
+        assert played(engine) == [("buy", 3), ("sell", 1)]
+        assert engine.aggregated == 10
+        assert engine.played == 2
+        assert engine.mode == "texture"
+
+    def test_texture_volume_scales_with_size(self):
+        assert texture_volume(0.01) < texture_volume(1.0) < texture_volume(10.0) <= 1.0
+
+    def test_rate_falls_back_to_clicks_when_quiet(self, engine):
+        engine.rate = 1000
+        for _ in range(30):
+            engine.tick()
+        assert engine.mode == "clicks"
+
+    def test_timbre_picks_click_by_size(self, engine):
+        engine.timbre = MagicMock()
+        engine.timbre.get.side_effect = lambda side, size: (side, size)
+        engine.submit("buy", 0.5)
+        engine.tick()
+        assert played(engine) == [("buy", 0.5)]
+        assert "timbre" in engine.snapshot()
+
+    def test_queue_is_bounded(self):
+        engine = AudioEngine({"buy": MagicMock()}, queue_size=3)
+        for _ in range(10):
+            engine.submit("buy", 0.1)
+        assert engine.snapshot()["queued"] == 3
+        assert engine.submitted == 10
+
+    def test_queue_overflow_counted_as_dropped(self):
+        engine = AudioEngine({"buy": MagicMock()}, queue_size=3)
+        for _ in range(10):
+            engine.submit("buy", 0.1)
+        snapshot = engine.snapshot()
+        assert snapshot["overflowed"] == 7
+        assert snapshot["dropped"] == 7
+
+    def test_missing_sell_sound_skipped(self):
+        engine = AudioEngine({"buy": MagicMock(), "sell": None}, channels=1)
+        engine._channels = [FakeChannel()]
+        engine.submit("sell", 0.1)
+        engine.tick()
+        assert engine.dropped == 1
+
+
+class TestAppAudioRouting:
+    def test_click_submitted_to_running_engine(self, btc_app):
+        btc_app._click_sound = MagicMock()
+        btc_app.audio_engine = MagicMock()
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app.audio_engine.submit.assert_called_once_with("buy", 0.5)
+        btc_app._click_sound.play.assert_not_called()
+
+    def test_engine_not_used_when_audio_disabled(self, btc_app):
+        btc_app.audio_engine = MagicMock()
+        btc_app.audio_enabled = False
+        btc_app._play_click("buy", 0.5)
+        btc_app.audio_engine.submit.assert_not_called()
@@ -15,66 +15,77 @@ import cli as cli_module
 
 class TestProcessMessage:
     def test_valid_json_match_message(self, btc_app, sample_trade_match):
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message(json.dumps(sample_trade_match))
-        btc_app._handle_trade.assert_called_once_with(sample_trade_match)
+        from decoder import Trade
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message(json.dumps(sample_trade_match))
+        btc_app.engine.handle_trade.assert_called_once_with(Trade(
+            price=50000.0,
+            size=0.5,
+            side="buy",
+            product_id="BTC-USD",
+            time="2024-01-15T12:00:00.000000Z",
+            trade_id=12345,
+            maker_order_id="abc123",
+            taker_order_id="def456",
+            sequence=1,
+        ))
 
     def test_valid_json_last_match_message(self, btc_app, sample_trade_match):
         sample_trade_match["type"] = "last_match"
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message(json.dumps(sample_trade_match))
-        btc_app._handle_trade.assert_called_once()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message(json.dumps(sample_trade_match))
+        btc_app.engine.handle_trade.assert_called_once()
 
     def test_ticker_message_updates_price(self, btc_app, sample_ticker_message):
-        btc_app._process_message(json.dumps(sample_ticker_message))
+        btc_app.engine.process_message(json.dumps(sample_ticker_message))
         assert btc_app.stats["last_price"] == 50500.00
 
     def test_ticker_message_zero_price_ignored(self, btc_app):
         btc_app.stats["last_price"] = 50000.0
         ticker = {"type": "ticker", "product_id": "BTC-USD", "price": "0"}
-        btc_app._process_message(json.dumps(ticker))
+        btc_app.engine.process_message(json.dumps(ticker))
         assert btc_app.stats["last_price"] == 50000.0
 
     def test_error_message_updates_widget(self, btc_app, sample_error_message):
-        btc_app._process_message(json.dumps(sample_error_message))
+        btc_app.engine.process_message(json.dumps(sample_error_message))
         assert "[Error]:" in btc_app.status_header.feed_status
         assert "Test error message" in btc_app.status_header.feed_status
 
     def test_invalid_json_tracked_as_parse_error(self, btc_app):
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message("{invalid json")
-        btc_app._handle_trade.assert_not_called()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message("{invalid json")
+        btc_app.engine.handle_trade.assert_not_called()
         assert btc_app.stats["parse_errors"] == 1
 
     def test_empty_message_tracked_as_parse_error(self, btc_app):
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message("")
-        btc_app._handle_trade.assert_not_called()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message("")
+        btc_app.engine.handle_trade.assert_not_called()
         assert btc_app.stats["parse_errors"] == 1
 
     def test_wrong_product_id_ignored(self, btc_app, sample_trade_match):
         sample_trade_match["product_id"] = "ETH-USD"
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message(json.dumps(sample_trade_match))
-        btc_app._handle_trade.assert_not_called()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message(json.dumps(sample_trade_match))
+        btc_app.engine.handle_trade.assert_not_called()
 
     def test_heartbeat_message_ignored(self, btc_app):
         heartbeat = {"type": "heartbeat", "sequence": 123, "last_trade_id": 456}
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message(json.dumps(heartbeat))
-        btc_app._handle_trade.assert_not_called()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message(json.dumps(heartbeat))
+        btc_app.engine.handle_trade.assert_not_called()
 
     def test_subscriptions_message_ignored(self, btc_app):
         subscriptions = {"type": "subscriptions", "channels": []}
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message(json.dumps(subscriptions))
-        btc_app._handle_trade.assert_not_called()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message(json.dumps(subscriptions))
+        btc_app.engine.handle_trade.assert_not_called()
 
     def test_null_product_id_allowed(self, btc_app, sample_trade_match):
         del sample_trade_match["product_id"]
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message(json.dumps(sample_trade_match))
-        btc_app._handle_trade.assert_called_once()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message(json.dumps(sample_trade_match))
+        btc_app.engine.handle_trade.assert_called_once()
 
 
 class TestHandleTrade:
@@ -86,7 +97,7 @@ class TestHandleTrade:
             "side": "buy",
             "product_id": "BTC-USD"
         }
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
 
         assert btc_app.stats["total_trades"] == 1
         assert btc_app.stats["last_price"] == 50000.0
@@ -101,7 +112,7 @@ class TestHandleTrade:
             {"price": "50050.00", "size": "0.7", "side": "buy"},
         ]
         for t in trades:
-            btc_app._handle_trade(t)
+            btc_app.engine.handle_trade(t)
 
         assert btc_app.stats["total_trades"] == 3
         assert btc_app.stats["session_volume"] == pytest.approx(1.5, rel=1e-6)
@@ -112,7 +123,7 @@ class TestHandleTrade:
     def test_trade_below_filter_ignored(self, btc_app):
         btc_app.filter_index = 3  # 0.1 BTC min
         trade_data = {"price": "50000.00", "size": "0.05", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
 
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["session_volume"] == 0.0
@@ -120,33 +131,33 @@ class TestHandleTrade:
     def test_trade_at_filter_boundary_included(self, btc_app):
         btc_app.filter_index = 2  # 0.01 BTC min
         trade_data = {"price": "50000.00", "size": "0.01", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
 
         assert btc_app.stats["total_trades"] == 1
 
     def test_trade_adds_to_recent_trades(self, btc_app):
         trade_data = {"price": "50000.00", "size": "0.5", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
 
-        assert len(btc_app.recent_trades) == 1
-        assert btc_app.recent_trades[0]["price"] == 50000.0
-        assert btc_app.recent_trades[0]["size"] == 0.5
-        assert btc_app.recent_trades[0]["side"] == "buy"
+        assert len(btc_app.engine.recent_trades) == 1
+        assert btc_app.engine.recent_trades[0]["price"] == 50000.0
+        assert btc_app.engine.recent_trades[0]["size"] == 0.5
+        assert btc_app.engine.recent_trades[0]["side"] == "buy"
 
     def test_recent_trades_capped_at_max(self, btc_app):
-        from cli import MAX_RECENT_TRADES
+        from engine import MAX_RECENT_TRADES
 
         # Add more than max trades
         for i in range(MAX_RECENT_TRADES + 50):
-            btc_app._handle_trade({
+            btc_app.engine.handle_trade({
                 "price": str(50000 + i),
                 "size": "0.5",
                 "side": "buy"
             })
 
-        assert len(btc_app.recent_trades) == MAX_RECENT_TRADES
+        assert len(btc_app.engine.recent_trades) == MAX_RECENT_TRADES
         # First trades should have been removed
-        assert btc_app.recent_trades[0]["price"] == 50050.0
+        assert btc_app.engine.recent_trades[0]["price"] == 50050.0
 
     def test_largest_trade_tracked(self, btc_app):
         trades = [
@@ -155,7 +166,7 @@ class TestHandleTrade:
             {"price": "50050.00", "size": "0.3", "side": "buy"},
         ]
         for t in trades:
-            btc_app._handle_trade(t)
+            btc_app.engine.handle_trade(t)
 
         largest = btc_app.stats["largest_trade"]
         assert largest["size"] == 2.0
@@ -164,70 +175,74 @@ class TestHandleTrade:
 
     def test_price_up_animation_triggered(self, btc_app):
         btc_app.stats["last_price"] = 50000.0
-        btc_app._handle_trade({"price": "50100.00", "size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50100.00", "size": "0.5", "side": "buy"})
+        btc_app._present_price()
         btc_app.price_widget.animate.assert_called_with("up")
 
     def test_price_down_animation_triggered(self, btc_app):
         btc_app.stats["last_price"] = 50000.0
-        btc_app._handle_trade({"price": "49900.00", "size": "0.5", "side": "sell"})
+        btc_app.engine.handle_trade({"price": "49900.00", "size": "0.5", "side": "sell"})
+        btc_app._present_price()
         btc_app.price_widget.animate.assert_called_with("down")
 
     def test_no_animation_when_price_unchanged(self, btc_app):
         btc_app.stats["last_price"] = 50000.0
-        btc_app._handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app._present_price()
         btc_app.price_widget.animate.assert_not_called()
 
     def test_no_animation_on_first_trade(self, btc_app):
         btc_app.stats["last_price"] = 0
-        btc_app._handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app._present_price()
         btc_app.price_widget.animate.assert_not_called()
 
     def test_missing_side_defaults_to_unknown(self, btc_app):
         trade_data = {"price": "50000.00", "size": "0.5"}
-        btc_app._handle_trade(trade_data)
-        assert btc_app.recent_trades[0]["side"] == "unknown"
+        btc_app.engine.handle_trade(trade_data)
+        assert btc_app.engine.recent_trades[0]["side"] == "unknown"
 
     def test_zero_size_trade_filtered(self, btc_app):
         trade_data = {"price": "50000.00", "size": "0", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 0
 
     def test_buy_sell_volumes_tracked_separately(self, btc_app):
-        btc_app._handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
-        btc_app._handle_trade({"price": "50100.00", "size": "0.3", "side": "sell"})
-        btc_app._handle_trade({"price": "50050.00", "size": "0.2", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50100.00", "size": "0.3", "side": "sell"})
+        btc_app.engine.handle_trade({"price": "50050.00", "size": "0.2", "side": "buy"})
         assert btc_app.stats["buy_volume"] == pytest.approx(0.7, rel=1e-6)
         assert btc_app.stats["sell_volume"] == pytest.approx(0.3, rel=1e-6)
 
     def test_non_buy_side_goes_to_sell_volume(self, btc_app):
-        btc_app._handle_trade({"price": "50000.00", "size": "1.0", "side": "unknown"})
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "1.0", "side": "unknown"})
         assert btc_app.stats["buy_volume"] == 0.0
         assert btc_app.stats["sell_volume"] == pytest.approx(1.0, rel=1e-6)
 
     def test_click_played_on_trade(self, btc_app):
         with patch.object(btc_app, '_play_click') as mock_click:
-            btc_app._handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+            btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
             mock_click.assert_called_once()
 
 
 class TestUpdateTPS:
     def test_tps_calculation_basic(self, btc_app, frozen_time):
-        from cli import TPS_WINDOW
+        from engine import TPS_WINDOW
 
         with patch('time.time', return_value=frozen_time):
             # Add 5 trades
             for _ in range(5):
-                btc_app.trade_timestamps.append(frozen_time)
+                btc_app.engine.trade_timestamps.append(frozen_time)
 
-            btc_app._update_tps()
+            btc_app.engine.update_tps()
 
             expected_tps = 5 / TPS_WINDOW
             assert btc_app.stats["tps"] == pytest.approx(expected_tps, rel=1e-6)
 
     def test_old_timestamps_removed(self, btc_app, frozen_time):
-        from cli import TPS_WINDOW
+        from engine import TPS_WINDOW
 
-        btc_app.trade_timestamps = deque([
+        btc_app.engine.trade_timestamps = deque([
             frozen_time - TPS_WINDOW - 5,
             frozen_time - TPS_WINDOW - 3,
             frozen_time - TPS_WINDOW - 1,
@@ -236,37 +251,37 @@ class TestUpdateTPS:
         ])
 
         with patch('time.time', return_value=frozen_time):
-            btc_app._update_tps()
+            btc_app.engine.update_tps()
 
         # Only recent timestamps should remain
-        assert len(btc_app.trade_timestamps) == 2
+        assert len(btc_app.engine.trade_timestamps) == 2
         expected_tps = 2 / TPS_WINDOW
         assert btc_app.stats["tps"] == pytest.approx(expected_tps, rel=1e-6)
 
     def test_empty_timestamps_zero_tps(self, btc_app, frozen_time):
-        btc_app.trade_timestamps = deque()
+        btc_app.engine.trade_timestamps = deque()
 
         with patch('time.time', return_value=frozen_time):
-            btc_app._update_tps()
+            btc_app.engine.update_tps()
 
         assert btc_app.stats["tps"] == 0.0
 
     def test_highest_tps_tracked(self, btc_app, frozen_time):
-        from cli import TPS_WINDOW
+        from engine import TPS_WINDOW
 
         with patch('time.time', return_value=frozen_time):
             # First batch: 5 trades
-            btc_app.trade_timestamps = deque([frozen_time - i for i in range(5)])
-            btc_app._update_tps()
+            btc_app.engine.trade_timestamps = deque([frozen_time - i for i in range(5)])
+            btc_app.engine.update_tps()
             first_tps = btc_app.stats["tps"]
 
             # Second batch: 10 trades (higher)
-            btc_app.trade_timestamps = deque([frozen_time - i * 0.5 for i in range(10)])
-            btc_app._update_tps()
+            btc_app.engine.trade_timestamps = deque([frozen_time - i * 0.5 for i in range(10)])
+            btc_app.engine.update_tps()
 
             # Third batch: 3 trades (lower)
-            btc_app.trade_timestamps = deque([frozen_time - i for i in range(3)])
-            btc_app._update_tps()
+            btc_app.engine.trade_timestamps = deque([frozen_time - i for i in range(3)])
+            btc_app.engine.update_tps()
 
         # Highest should be from second batch
         expected_highest = 10 / TPS_WINDOW
@@ -274,39 +289,39 @@ class TestUpdateTPS:
 
     def test_timestamps_exactly_at_boundary(self, btc_app, frozen_time):
         # The check is `> TPS_WINDOW`, so exactly 10s old is kept (not > 10)
-        from cli import TPS_WINDOW
+        from engine import TPS_WINDOW
 
         # Timestamp exactly at the boundary (10 seconds old)
-        btc_app.trade_timestamps = deque([frozen_time - TPS_WINDOW])
+        btc_app.engine.trade_timestamps = deque([frozen_time - TPS_WINDOW])
 
         with patch('time.time', return_value=frozen_time):
-            btc_app._update_tps()
+            btc_app.engine.update_tps()
 
-        assert len(btc_app.trade_timestamps) == 1
+        assert len(btc_app.engine.trade_timestamps) == 1
         expected_tps = 1 / TPS_WINDOW
         assert btc_app.stats["tps"] == pytest.approx(expected_tps, rel=1e-6)
 
     def test_timestamps_just_outside_boundary(self, btc_app, frozen_time):
-        from cli import TPS_WINDOW
-        btc_app.trade_timestamps = deque([frozen_time - TPS_WINDOW - 0.001])
+        from engine import TPS_WINDOW
+        btc_app.engine.trade_timestamps = deque([frozen_time - TPS_WINDOW - 0.001])
 
         with patch('time.time', return_value=frozen_time):
-            btc_app._update_tps()
+            btc_app.engine.update_tps()
 
-        assert len(btc_app.trade_timestamps) == 0
+        assert len(btc_app.engine.trade_timestamps) == 0
         assert btc_app.stats["tps"] == 0.0
 
 
 class TestFilterControls:
     def test_get_min_trade_size_default(self, btc_app):
         assert btc_app.filter_index == 0
-        assert btc_app.get_min_trade_size() == 0.0001
+        assert btc_app.engine.min_trade_size() == 0.0001
 
     def test_get_min_trade_size_all_levels(self, btc_app):
         expected = [0.0001, 0.001, 0.01, 0.1, 1]
         for i, expected_size in enumerate(expected):
             btc_app.filter_index = i
-            assert btc_app.get_min_trade_size() == expected_size
+            assert btc_app.engine.min_trade_size() == expected_size
 
     def test_filter_up_increments(self, btc_app):
         initial = btc_app.filter_index
@@ -328,6 +343,20 @@ class TestFilterControls:
         btc_app.action_filter_down()
         assert btc_app.filter_index == 0
 
+    def test_filter_change_shows_exact_stats_for_new_level(self, btc_app):
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.005", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "51000.00", "size": "0.5", "side": "sell"})
+        btc_app.action_filter_up()
+        btc_app.action_filter_up()
+        btc_app.action_filter_up()  # 0.1 BTC
+        assert btc_app.stats["total_trades"] == 1
+        assert btc_app.stats["session_volume"] == pytest.approx(0.5)
+        assert btc_app.stats["session_low"] == 51000.0
+        btc_app.action_filter_down()
+        btc_app.action_filter_down()  # 0.001 BTC
+        assert btc_app.stats["total_trades"] == 2
+        assert btc_app.stats["buy_volume"] == pytest.approx(0.005)
+
     def test_filter_change_triggers_refresh(self, btc_app):
         with patch.object(btc_app, 'refresh_stats') as mock_refresh:
             btc_app.action_filter_up()
@@ -353,6 +382,11 @@ class TestAudioToggle:
             mock_refresh.assert_called_once()
 
 
+def _feed_trades(app, trades):
+    for t in trades:
+        app.engine.handle_trade({"price": str(t["price"]), "size": str(t["size"]), "side": t["side"]})
+
+
 class TestBotDetection:
     def test_no_bot_detected_varied_sizes(self, btc_app):
         trades = [
@@ -361,7 +395,8 @@ class TestBotDetection:
             {"price": 50000.0, "size": 0.3, "side": "buy"},
             {"price": 50000.0, "size": 0.4, "side": "buy"},
         ]
-        btc_app._check_bot_activity(trades)
+        _feed_trades(btc_app, trades)
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         btc_app.bot_banner.add_class.assert_not_called()
 
     def test_bot_detected_repeated_sizes(self, btc_app):
@@ -372,7 +407,8 @@ class TestBotDetection:
             {"price": 50000.0, "size": 0.1234, "side": "buy"},
             {"price": 50000.0, "size": 0.1234, "side": "buy"},
         ]
-        btc_app._check_bot_activity(trades)
+        _feed_trades(btc_app, trades)
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         btc_app.bot_banner.add_class.assert_called_with("active")
         btc_app.bot_banner.update.assert_called()
         call_args = btc_app.bot_banner.update.call_args[0][0]
@@ -386,7 +422,8 @@ class TestBotDetection:
             {"price": 50000.0, "size": 0.1234, "side": "buy"},
             {"price": 50000.0, "size": 0.1234, "side": "buy"},
         ]
-        btc_app._check_bot_activity(trades)
+        _feed_trades(btc_app, trades)
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         btc_app.bot_banner.add_class.assert_not_called()
 
     def test_bot_detection_multiple_bots_shows_highest(self, btc_app):
@@ -396,7 +433,8 @@ class TestBotDetection:
             # 7 trades of size 0.2 (more frequent)
             *[{"price": 50000.0, "size": 0.2, "side": "sell"} for _ in range(7)],
         ]
-        btc_app._check_bot_activity(trades)
+        _feed_trades(btc_app, trades)
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         call_args = btc_app.bot_banner.update.call_args[0][0]
         assert "0.2" in call_args
 
@@ -409,15 +447,25 @@ class TestBotDetection:
             {"price": 50000.0, "size": 0.12351, "side": "buy"},
             {"price": 50000.0, "size": 0.12354, "side": "buy"},
         ]
-        btc_app._check_bot_activity(trades)
+        _feed_trades(btc_app, trades)
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
+        btc_app.bot_banner.add_class.assert_called_with("active")
+
+    def test_bot_detection_follows_filter_level(self, btc_app):
+        _feed_trades(btc_app, [{"price": 50000.0, "size": 0.005, "side": "buy"} for _ in range(5)])
+        btc_app.filter_index = 2  # 0.01 BTC, repeated trades are below it
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
+        btc_app.bot_banner.add_class.assert_not_called()
+        btc_app.filter_index = 0
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         btc_app.bot_banner.add_class.assert_called_with("active")
 
     def test_empty_trades_no_crash(self, btc_app):
-        btc_app._check_bot_activity([])
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         btc_app.bot_banner.update.assert_called_with("")
 
     def test_banner_hidden_when_no_bot(self, btc_app):
-        btc_app._check_bot_activity([])
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
         btc_app.bot_banner.remove_class.assert_called_with("active")
 
 
@@ -425,6 +473,7 @@ class TestRefreshStats:
     def test_refresh_updates_price_widget(self, btc_app):
         btc_app.stats["last_price"] = 50000.0
         btc_app.refresh_stats()
+        btc_app._present_price()
         btc_app.price_widget.update_price.assert_called_with(50000.0)
 
     def test_refresh_updates_session_widget(self, btc_app):
@@ -433,7 +482,8 @@ class TestRefreshStats:
         btc_app.refresh_stats()
         btc_app.session_widget.update_session.assert_called_once()
         call = btc_app.session_widget.update_session.call_args[0]
-        assert call[0] is btc_app.stats
+        # A copy, so the widget never reads stats the engine is still updating
+        assert call[0] == btc_app.stats and call[0] is not btc_app.stats
         assert isinstance(call[1], int)
 
     def test_refresh_updates_trade_stats_widget(self, btc_app):
@@ -456,17 +506,81 @@ class TestRefreshStats:
 
     def test_refresh_filters_trades_table(self, btc_app):
         btc_app.filter_index = 2  # 0.01 BTC
-        btc_app.recent_trades = [
-            {"price": 50000.0, "size": 0.005, "side": "buy"},  # Filtered
-            {"price": 50000.0, "size": 0.02, "side": "sell"},  # Included
-            {"price": 50000.0, "size": 0.01, "side": "buy"},   # Included
-        ]
-        btc_app._trades_dirty = True
+        btc_app.engine.recent_trades.append(50000.0, 0.005, "buy")   # Filtered
+        btc_app.engine.recent_trades.append(50000.0, 0.02, "sell")   # Included
+        btc_app.engine.recent_trades.append(50000.0, 0.01, "buy")    # Included
+        btc_app.engine.trades_dirty = True
         btc_app.refresh_stats()
 
         assert btc_app.trades_table.add_row.call_count == 2
 
 
+class TestActivityWidget:
+    def _lines(self, **stats):
+        widget = cli_module.ActivityWidget()
+        widget.update = MagicMock()
+        widget.update_activity({"tps": 1.0, "highest_tps": 2.0, **stats}, 0.0001, True)
+        return widget.update.call_args[0][0]
+
+    def test_sequence_gaps_shown(self):
+        text = self._lines(seq_gaps=2, seq_missing=7, seq_last_gap=3, seq_largest_gap=4, seq_late=1, seq_duplicates=0)
+        assert "Gaps" in text and "7 missing" in text and "max[/] 4" in text
+        assert "1 late  0 dup" in text
+
+    def test_clean_feed_shows_no_gap_lines(self):
+        text = self._lines(seq_gaps=0, seq_missing=0, seq_last_gap=0, seq_largest_gap=0, seq_late=0, seq_duplicates=0)
+        assert "Gaps" not in text and "late" not in text
+
+    def test_gap_change_redraws_activity(self, btc_app):
+        btc_app.refresh_stats()
+        btc_app.engine.process_batch([
+            json.dumps({"type": "match", "price": "1", "size": "0.5", "side": "buy", "product_id": "BTC-USD",
+                        "sequence": seq, "trade_id": seq}) for seq in (1, 5)
+        ])
+        btc_app.refresh_stats()
+        assert btc_app.activity_widget.update_activity.call_count == 2
+
+
+class TestRenderSkipping:
+    def test_quiet_refresh_skips_widgets(self, btc_app):
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        with patch("time.time", return_value=btc_app.stats["session_start"] + 5):
+            btc_app.refresh_stats()
+            btc_app.refresh_stats()
+        btc_app.session_widget.update_session.assert_called_once()
+        btc_app.trade_stats_widget.update_trade_stats.assert_called_once()
+        btc_app.activity_widget.update_activity.assert_called_once()
+        btc_app.heatmap_widget.update_heatmap.assert_called_once()
+        assert btc_app.render_scheduler.snapshot()["trade_stats"]["skips"] == 1
+
+    def test_new_trade_redraws_dependent_widgets(self, btc_app):
+        btc_app.refresh_stats()
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        btc_app.refresh_stats()
+        assert btc_app.trade_stats_widget.update_trade_stats.call_count == 2
+        assert btc_app.heatmap_widget.update_heatmap.call_count == 2
+
+    def test_external_status_change_is_overwritten(self, btc_app):
+        btc_app.refresh_stats()
+        btc_app.status_header.feed_status = "[bright_red]ERR 1/5[/]"
+        btc_app.refresh_stats()
+        assert btc_app.status_header.feed_status == "[dim]--[/]"
+
+
+class TestHeatmapBuckets:
+    def test_buckets_follow_trades(self, btc_app):
+        for size in ["0.00005", "0.005", "0.5", "2.0"]:
+            btc_app.engine.handle_trade({"price": "50000.00", "size": size, "side": "buy"})
+        assert btc_app.engine.heatmap_buckets() == [1, 0, 1, 0, 1, 1]
+
+    def test_buckets_drop_evicted_trades(self, btc_app):
+        from engine import MAX_RECENT_TRADES
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "2.0", "side": "buy"})
+        for _ in range(MAX_RECENT_TRADES):
+            btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        assert btc_app.engine.heatmap_buckets() == [0, 0, 0, 0, MAX_RECENT_TRADES, 0]
+
+
 class TestPlayClick:
     def test_click_played_when_enabled(self, btc_app):
         mock_sound = MagicMock()
@@ -517,12 +631,12 @@ class TestPriceWidget:
 
 class TestConstants:
     def test_tps_window_positive(self):
-        from cli import TPS_WINDOW
+        from engine import TPS_WINDOW
         assert TPS_WINDOW > 0
         assert isinstance(TPS_WINDOW, int)
 
     def test_max_recent_trades_positive(self):
-        from cli import MAX_RECENT_TRADES
+        from engine import MAX_RECENT_TRADES
         assert MAX_RECENT_TRADES > 0
         assert isinstance(MAX_RECENT_TRADES, int)
 
@@ -533,30 +647,30 @@ class TestConstants:
         assert all(s > 0 for s in sizes)
 
     def test_bot_detection_threshold_reasonable(self):
-        from cli import BOT_DETECTION_THRESHOLD
+        from engine import BOT_DETECTION_THRESHOLD
         assert 3 <= BOT_DETECTION_THRESHOLD <= 20
 
 
 class TestEdgeCasesAndBoundary:
     def test_negative_price_handled(self, btc_app):
         trade_data = {"price": "-100.00", "size": "0.5", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["last_price"] == -100.0
 
     def test_very_large_price(self, btc_app):
         trade_data = {"price": "999999999.99", "size": "0.001", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["last_price"] == 999999999.99
 
     def test_very_small_trade_size(self, btc_app):
         btc_app.filter_index = 0  # Smallest filter: 0.0001
         trade_data = {"price": "50000.00", "size": "0.0001", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 1
 
     def test_very_large_trade_size(self, btc_app):
         trade_data = {"price": "50000.00", "size": "1000.0", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["session_volume"] == 1000.0
         assert btc_app.stats["largest_trade"]["size"] == 1000.0
 
@@ -567,7 +681,7 @@ class TestEdgeCasesAndBoundary:
             {"price": "50000.00", "size": "0.3", "side": "buy"},
         ]
         for t in trades:
-            btc_app._handle_trade(t)
+            btc_app.engine.handle_trade(t)
         assert btc_app.stats["session_volume"] == pytest.approx(0.6, rel=1e-9)
 
     def test_rapid_filter_changes(self, btc_app):
@@ -578,12 +692,12 @@ class TestEdgeCasesAndBoundary:
 
     def test_trade_with_unicode_side(self, btc_app):
         trade_data = {"price": "50000.00", "size": "0.5", "side": "買い"}
-        btc_app._handle_trade(trade_data)
-        assert btc_app.recent_trades[0]["side"] == "買い"
+        btc_app.engine.handle_trade(trade_data)
+        assert btc_app.engine.recent_trades[0]["side"] == "買い"
 
     def test_scientific_notation_price(self, btc_app):
         trade_data = {"price": "5e4", "size": "0.5", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["last_price"] == 50000.0
 
     def test_largest_trade_with_same_size(self, btc_app):
@@ -592,38 +706,38 @@ class TestEdgeCasesAndBoundary:
             {"price": "51000.00", "size": "1.0", "side": "sell"},
         ]
         for t in trades:
-            btc_app._handle_trade(t)
+            btc_app.engine.handle_trade(t)
         assert btc_app.stats["largest_trade"]["price"] == 50000.0
 
 
 class TestInvalidInputHandling:
     def test_missing_price_field(self, btc_app):
         trade_data = {"size": "0.5", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["invalid_trades"] == 1
 
     def test_missing_size_field(self, btc_app):
         trade_data = {"price": "50000.00", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["invalid_trades"] == 1
 
     def test_non_numeric_price(self, btc_app):
         trade_data = {"price": "invalid", "size": "0.5", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["invalid_trades"] == 1
 
     def test_non_numeric_size(self, btc_app):
         trade_data = {"price": "50000.00", "size": "big", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["invalid_trades"] == 1
 
     def test_null_values_in_message(self, btc_app):
         message = '{"type": "match", "price": null, "size": "0.5", "product_id": "BTC-USD"}'
-        btc_app._process_message(message)
+        btc_app.engine.process_message(message)
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["invalid_trades"] == 1
 
@@ -636,7 +750,7 @@ class TestInvalidInputHandling:
             "product_id": "BTC-USD",
             "extra": {"nested": {"deep": {"value": 123}}}
         })
-        btc_app._process_message(message)
+        btc_app.engine.process_message(message)
         assert btc_app.stats["total_trades"] == 1
 
     def test_message_with_extra_fields(self, btc_app):
@@ -649,43 +763,51 @@ class TestInvalidInputHandling:
             "unknown_field": "should be ignored",
             "another_unknown": 12345
         })
-        btc_app._process_message(message)
+        btc_app.engine.process_message(message)
         assert btc_app.stats["total_trades"] == 1
 
     def test_empty_string_price(self, btc_app):
         trade_data = {"price": "", "size": "0.5", "side": "buy"}
-        btc_app._handle_trade(trade_data)
+        btc_app.engine.handle_trade(trade_data)
         assert btc_app.stats["total_trades"] == 0
         assert btc_app.stats["invalid_trades"] == 1
 
+    def test_invalid_trade_in_frame_tracked(self, btc_app):
+        btc_app.engine.process_message('{"type": "match", "price": "abc", "size": "0.5", "product_id": "BTC-USD"}')
+        assert btc_app.stats["invalid_trades"] == 1
+
+    def test_non_object_json_tracked_as_parse_error(self, btc_app):
+        btc_app.engine.process_message("[1, 2, 3]")
+        assert btc_app.stats["parse_errors"] == 1
+
     def test_whitespace_only_json(self, btc_app):
-        btc_app._handle_trade = MagicMock()
-        btc_app._process_message("   ")
-        btc_app._handle_trade.assert_not_called()
+        btc_app.engine.handle_trade = MagicMock()
+        btc_app.engine.process_message("   ")
+        btc_app.engine.handle_trade.assert_not_called()
 
 
 class TestErrorTracking:
     def test_parse_errors_tracked(self, btc_app):
-        btc_app._process_message("{invalid json}")
-        btc_app._process_message("not json at all")
-        btc_app._process_message("")
+        btc_app.engine.process_message("{invalid json}")
+        btc_app.engine.process_message("not json at all")
+        btc_app.engine.process_message("")
         assert btc_app.stats["parse_errors"] == 3
 
     def test_invalid_trades_missing_price_tracked(self, btc_app):
-        btc_app._handle_trade({"size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"size": "0.5", "side": "buy"})
         assert btc_app.stats["invalid_trades"] == 1
 
     def test_invalid_trades_missing_size_tracked(self, btc_app):
-        btc_app._handle_trade({"price": "50000", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50000", "side": "buy"})
         assert btc_app.stats["invalid_trades"] == 1
 
     def test_invalid_trades_bad_values_tracked(self, btc_app):
-        btc_app._handle_trade({"price": "bad", "size": "0.5", "side": "buy"})
-        btc_app._handle_trade({"price": "50000", "size": "bad", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "bad", "size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50000", "size": "bad", "side": "buy"})
         assert btc_app.stats["invalid_trades"] == 2
 
     def test_valid_trade_does_not_increment_errors(self, btc_app):
-        btc_app._handle_trade({"price": "50000", "size": "0.5", "side": "buy"})
+        btc_app.engine.handle_trade({"price": "50000", "size": "0.5", "side": "buy"})
         assert btc_app.stats["invalid_trades"] == 0
         assert btc_app.stats["parse_errors"] == 0
         assert btc_app.stats["total_trades"] == 1
@@ -697,6 +819,8 @@ class TestErrorTracking:
 
 class TestOutputVerification:
     def test_trade_stats_widget_receives_correct_stats(self, btc_app):
+        # Picking a filter level loads that level's stats, so pick it first
+        btc_app.filter_index = 2  # 0.01
         btc_app.stats = {
             "total_trades": 42,
             "last_price": 65432.10,
@@ -707,7 +831,6 @@ class TestOutputVerification:
             "highest_tps": 7.2,
         }
         btc_app.audio_enabled = False
-        btc_app.filter_index = 2  # 0.01
 
         btc_app.refresh_stats()
 
@@ -746,12 +869,10 @@ class TestOutputVerification:
         assert btc_app.status_header.audio_status == "[bright_red]OFF[/]"
 
     def test_trades_table_row_format(self, btc_app):
-        btc_app.recent_trades = [
-            {"price": 50000.0, "size": 0.123456, "side": "buy"},
-            {"price": 49999.99, "size": 1.0, "side": "sell"},
-        ]
+        btc_app.engine.recent_trades.append(50000.0, 0.123456, "buy")
+        btc_app.engine.recent_trades.append(49999.99, 1.0, "sell")
         btc_app.filter_index = 0
-        btc_app._trades_dirty = True
+        btc_app.engine.trades_dirty = True
 
         btc_app.refresh_stats()
 
@@ -763,7 +884,8 @@ class TestOutputVerification:
 
     def test_bot_banner_message_format(self, btc_app):
         trades = [{"price": 50000.0, "size": 0.5, "side": "buy"} for _ in range(6)]
-        btc_app._check_bot_activity(trades)
+        _feed_trades(btc_app, trades)
+        btc_app._check_bot_activity(btc_app.engine.bot_activity())
 
         call_args = btc_app.bot_banner.update.call_args[0][0]
         assert "Possible bot" in call_args
@@ -773,36 +895,184 @@ class TestOutputVerification:
 
     def test_error_message_format(self, btc_app):
         error_msg = {"type": "error", "message": "Rate limit exceeded"}
-        btc_app._process_message(json.dumps(error_msg))
+        btc_app.engine.process_message(json.dumps(error_msg))
 
         assert "[Error]:" in btc_app.status_header.feed_status
         assert "Rate limit exceeded" in btc_app.status_header.feed_status
 
 
+class TestTradesTableUpdater:
+    @staticmethod
+    def _trades(btc_app, sizes):
+        for size in sizes:
+            btc_app.engine.recent_trades.append(50000.0, size, "buy")
+        return btc_app.engine.recent_filtered(cli_module.TRADES_TABLE_SIZE)
+
+    def test_unchanged_trades_leave_table_alone(self, btc_app):
+        updater = btc_app.table_updater
+        trades = self._trades(btc_app, [0.1, 0.2])
+        updater.update(trades)
+        btc_app.trades_table.reset_mock()
+        updater.update(trades)
+        assert btc_app.trades_table.method_calls == []
+
+    def test_new_trade_adds_one_row(self, btc_app):
+        updater = btc_app.table_updater
+        updater.update(self._trades(btc_app, [0.1, 0.2, 0.3]))
+        built = updater.cells_built
+        btc_app.trades_table.reset_mock()
+
+        updater.update(self._trades(btc_app, [0.4]))
+
+        table = btc_app.trades_table
+        table.clear.assert_not_called()
+        table.update_cell_at.assert_not_called()
+        assert updater.cells_built == built + 1
+        assert [c.plain for c in table.add_row.call_args.args] == ["Buy", "$50000.00", "0.400000"]
+        table.remove_row.assert_not_called()
+        table.sort.assert_called_once()
+
+    def test_full_table_costs_one_row_pair_per_trade(self, btc_app):
+        updater = btc_app.table_updater
+        updater.update(self._trades(btc_app, [0.1] * cli_module.TRADES_TABLE_SIZE))
+        btc_app.trades_table.reset_mock()
+
+        updater.update(self._trades(btc_app, [0.2]))
+
+        table = btc_app.trades_table
+        assert table.add_row.call_count == 1
+        assert table.remove_row.call_count == 1
+        table.update_cell_at.assert_not_called()
+        assert len(updater.row_map) == cli_module.TRADES_TABLE_SIZE
+
+    async def test_real_table_shows_newest_first(self, btc_app):
+        from textual.app import App
+        from textual.widgets import DataTable
+
+        class TableApp(App):
+            def compose(self):
+                yield DataTable()
+
+        async with TableApp().run_test() as pilot:
+            table = pilot.app.query_one(DataTable)
+            table.add_columns("Side", "Price", "Size (BTC)")
+            updater = cli_module.TradesTableUpdater(table)
+            for sizes in ([0.1, 0.2], [0.3], [0.4, 0.5]):
+                updater.update(self._trades(btc_app, sizes))
+            assert [table.get_row_at(i)[2].plain for i in range(table.row_count)] == [
+                "0.500000", "0.400000", "0.300000", "0.200000", "0.100000",
+            ]
+            assert updater.rows_added == 5
+            # Selecting a row finds its trade through the RowKey table hands back
+            row_key = table.coordinate_to_cell_key((0, 0)).row_key
+            assert updater.row_map[row_key]["size"] == 0.5
+
+    def test_fewer_trades_removes_rows(self, btc_app):
+        updater = btc_app.table_updater
+        updater.update(self._trades(btc_app, [0.1, 0.2, 0.3]))
+        btc_app.engine.filter_index = 4  # 1 BTC hides all three
+        updater.update(btc_app.engine.recent_filtered(cli_module.TRADES_TABLE_SIZE))
+        assert btc_app.trades_table.remove_row.call_count == 3
+        assert updater.row_map == {}
+
+    def test_expanded_trade_rebuilds_with_detail_rows(self, btc_app):
+        updater = btc_app.table_updater
+        trades = self._trades(btc_app, [0.1, 0.2])
+        updater.update(trades, expanded_seq=trades[0]["seq"])
+        btc_app.trades_table.clear.assert_called_once()
+        assert len(updater.detail_keys) == 4
+        assert btc_app.trades_table.add_row.call_count == 6
+
+
+class TestProductSwitching:
+    @pytest.fixture
+    def multi_app(self, btc_app):
+        from engine import FeedEngine
+        btc_app.engine = FeedEngine(on_trade=btc_app._on_trade, on_price=btc_app._on_price_move,
+                                    products=["BTC-USD", "ETH-USD", "SOL-USD"])
+        btc_app.products_widget = MagicMock()
+        return btc_app
+
+    @staticmethod
+    def _match(product_id, price):
+        return json.dumps({"type": "match", "price": price, "size": "0.5", "side": "buy", "product_id": product_id})
+
+    def test_next_product_cycles_and_wraps(self, multi_app):
+        multi_app.action_next_product(1)
+        assert multi_app.engine.product_id == "ETH-USD"
+        multi_app.action_next_product(-1)
+        multi_app.action_next_product(-1)
+        assert multi_app.engine.product_id == "SOL-USD"
+
+    def test_switch_redraws_table_and_header(self, multi_app):
+        multi_app.engine.process_message(self._match("BTC-USD", "50000"))
+        multi_app.engine.process_message(self._match("ETH-USD", "3000"))
+        multi_app._expanded_seq = 0
+        multi_app.trades_table.reset_mock()
+
+        multi_app.action_next_product(1)
+
+        assert multi_app._expanded_seq is None
+        assert multi_app.status_header.product == "ETH-USD"
+        assert multi_app.stats["last_price"] == 3000.0
+        rows = [call.args for call in multi_app.trades_table.add_row.call_args_list]
+        rows += [call.args[1:] for call in multi_app.trades_table.update_cell_at.call_args_list]
+        assert any("$3000.00" in str(cell) for row in rows for cell in row)
+
+    def test_products_widget_shows_summaries(self, multi_app):
+        multi_app.engine.process_message(self._match("ETH-USD", "3000"))
+        multi_app.refresh_stats()
+        summaries, active = multi_app.products_widget.update_products.call_args.args
+        assert active == "BTC-USD"
+        assert [p["product_id"] for p in summaries] == ["BTC-USD", "ETH-USD", "SOL-USD"]
+        assert summaries[1]["last_price"] == 3000.0
+
+    def test_single_product_ignores_switch(self, btc_app):
+        btc_app.action_next_product(1)
+        assert btc_app.engine.product_id == "BTC-USD"
+        assert btc_app.products_widget is None
+
+
 class TestPriceWidgetAnimation:
     def test_animation_class_added(self, mock_pygame):
         from cli import PriceWidget
         widget = PriceWidget()
         widget.add_class = MagicMock()
-        widget.set_timer = MagicMock(return_value=MagicMock())
+        widget.remove_class = MagicMock()
+        widget.set_interval = MagicMock(return_value=MagicMock())
 
         widget.animate("up")
         widget.add_class.assert_called_with("price-up")
 
         widget.animate("down")
         widget.add_class.assert_called_with("price-down")
+        widget.remove_class.assert_called_with("price-up")
 
-    def test_previous_timer_stopped(self, mock_pygame):
+    def test_single_timer_reused(self, mock_pygame):
         from cli import PriceWidget
         widget = PriceWidget()
         widget.add_class = MagicMock()
-        old_timer = MagicMock()
-        widget.anim_timer = old_timer
-        widget.set_timer = MagicMock(return_value=MagicMock())
+        widget.remove_class = MagicMock()
+        timer = MagicMock()
+        widget.set_interval = MagicMock(return_value=timer)
 
-        widget.animate("up")
+        for direction in ["up", "down", "up"]:
+            widget.animate(direction)
+
+        widget.set_interval.assert_called_once()
+        assert timer.reset.call_count == 2
+        timer.stop.assert_not_called()
+
+    def test_reset_animation_pauses_timer(self, mock_pygame):
+        from cli import PriceWidget
+        widget = PriceWidget()
+        widget.remove_class = MagicMock()
+        widget.anim_timer = MagicMock()
+        widget._anim_direction = "up"
+
+        widget._reset_animation()
 
-        old_timer.stop.assert_called_once()
+        widget.anim_timer.pause.assert_called_once()
 
     def test_reset_animation_removes_correct_class(self, mock_pygame):
         from cli import PriceWidget
@@ -821,6 +1091,40 @@ class TestPriceWidgetAnimation:
         widget.remove_class.assert_called_with("price-down")
 
 
+class TestPricePresenter:
+    def test_trades_coalesced_into_one_frame(self, btc_app):
+        btc_app.stats["last_price"] = 49000.0
+        for price in ["50000.00", "49500.00", "50100.00"]:
+            btc_app.engine.handle_trade({"price": price, "size": "0.5", "side": "buy"})
+        btc_app.price_widget.update_price.assert_not_called()
+
+        btc_app._present_price()
+
+        btc_app.price_widget.update_price.assert_called_once_with(50100.0)
+        btc_app.price_widget.animate.assert_called_once_with("up")
+        assert btc_app.price_presenter.snapshot() == {"submitted": 3, "frames": 1}
+
+    def test_net_unchanged_frame_not_animated(self, btc_app):
+        btc_app.stats["last_price"] = 50000.0
+        for price in ["50100.00", "50000.00"]:
+            btc_app.engine.handle_trade({"price": price, "size": "0.5", "side": "buy"})
+        btc_app._present_price()
+        btc_app.price_widget.animate.assert_not_called()
+
+    def test_empty_frame_is_noop(self, btc_app):
+        btc_app._present_price()
+        btc_app.price_widget.update_price.assert_not_called()
+        assert btc_app.price_presenter.frames == 0
+
+    def test_unchanged_price_not_redrawn(self, btc_app):
+        btc_app.stats["last_price"] = 50000.0
+        btc_app.refresh_stats()
+        btc_app._present_price()
+        btc_app.refresh_stats()
+        btc_app._present_price()
+        btc_app.price_widget.update_price.assert_called_once_with(50000.0)
+
+
 class TestIntegration:
     def test_full_trade_flow(self, btc_app, frozen_time):
         with patch('time.time', return_value=frozen_time):
@@ -832,13 +1136,14 @@ class TestIntegration:
                 "product_id": "BTC-USD"
             })
 
-            btc_app._process_message(message)
+            btc_app.engine.process_message(message)
 
             assert btc_app.stats["total_trades"] == 1
             assert btc_app.stats["last_price"] == 50000.0
             assert btc_app.stats["session_volume"] == 0.5
-            assert len(btc_app.recent_trades) == 1
-            assert len(btc_app.trade_timestamps) == 1
+            assert len(btc_app.engine.recent_trades) == 1
+            assert len(btc_app.engine.trade_timestamps) == 1
+            btc_app._present_price()
             btc_app.price_widget.update_price.assert_called()
 
     def test_sequential_trades_accumulate(self, btc_app, frozen_time):
@@ -851,7 +1156,7 @@ class TestIntegration:
                     "side": "buy" if i % 2 == 0 else "sell",
                     "product_id": "BTC-USD"
                 })
-                btc_app._process_message(message)
+                btc_app.engine.process_message(message)
 
             assert btc_app.stats["total_trades"] == 10
             assert btc_app.stats["session_volume"] == pytest.approx(1.0, rel=1e-6)
@@ -867,7 +1172,7 @@ class TestIntegration:
         ]
 
         for msg in messages:
-            btc_app._process_message(json.dumps(msg))
+            btc_app.engine.process_message(json.dumps(msg))
 
         assert btc_app.stats["total_trades"] == 2
         assert btc_app.stats["last_price"] == 50020.0
@@ -880,12 +1185,12 @@ class TestIntegration:
                     "size": "0.01",
                     "side": "buy" if i % 2 == 0 else "sell"
                 }
-                btc_app._handle_trade(trade_data)
+                btc_app.engine.handle_trade(trade_data)
 
             assert btc_app.stats["total_trades"] == 500
             assert btc_app.stats["session_volume"] == pytest.approx(5.0, rel=1e-6)
-            from cli import MAX_RECENT_TRADES
-            assert len(btc_app.recent_trades) == min(500, MAX_RECENT_TRADES)
+            from engine import MAX_RECENT_TRADES
+            assert len(btc_app.engine.recent_trades) == min(500, MAX_RECENT_TRADES)
 
     def test_price_direction_changes(self, btc_app):
         prices = [50000, 50100, 50050, 50200, 49900]
@@ -895,11 +1200,12 @@ class TestIntegration:
 
         for price, expected in zip(prices, expected_animations):
             btc_app.price_widget.animate.reset_mock()
-            btc_app._handle_trade({
+            btc_app.engine.handle_trade({
                 "price": str(price),
                 "size": "0.5",
                 "side": "buy"
             })
+            btc_app._present_price()
 
             if expected:
                 btc_app.price_widget.animate.assert_called_with(expected)
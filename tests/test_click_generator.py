@@ -283,3 +283,69 @@ class TestIntegration:
         assert result.dtype == np.int16
         assert np.all(result >= -32768)
         assert np.all(result <= 32767)
+
+
+class TestBatchGeneration:
+    def test_batch_matches_individual_renders(self):
+        from click_generator import CLICK_VARIATIONS, generate_bank, render_variant
+        for params, samples in zip(CLICK_VARIATIONS, generate_bank(CLICK_VARIATIONS)):
+            np.testing.assert_array_equal(samples, render_variant(params))
+
+    def test_result_independent_of_worker_count(self):
+        from click_generator import generate_bank, parameter_grid
+        grid = parameter_grid([500, 2000], [4, 12], [0.002, 0.004])
+        single = generate_bank(grid)
+        pooled = generate_bank(grid, workers=2)
+        assert len(pooled) == len(grid)
+        for a, b in zip(single, pooled):
+            np.testing.assert_array_equal(a, b)
+
+    def test_result_independent_of_order(self):
+        from click_generator import generate_bank, parameter_grid
+        grid = parameter_grid([500, 2000, 4000], [8], [0.002, 0.004])
+        forward = generate_bank(grid)
+        backward = generate_bank(grid[::-1])[::-1]
+        for a, b in zip(forward, backward):
+            np.testing.assert_array_equal(a, b)
+
+    def test_variant_seeds_differ(self):
+        from click_generator import CLICK_VARIATIONS, variant_seed
+        seeds = {variant_seed(params) for params in CLICK_VARIATIONS}
+        assert len(seeds) == len(CLICK_VARIATIONS)
+
+    def test_grid_covers_product(self):
+        from click_generator import parameter_grid
+        grid = parameter_grid([500, 1000], [4, 8, 12], [0.002, 0.004])
+        assert len(grid) == 12
+        assert len({params["filename"] for params in grid}) == 12
+        assert {params["decay"] for params in grid} == {4, 8, 12}
+
+    def test_silent_variant_stays_silent(self):
+        from click_generator import generate_bank
+        params = {"filename": "quiet.wav", "duration": 0.002, "frequency": 1000,
+                  "sine_amp": 0.0, "noise_amp": 0.0, "decay": 10, "double": True}
+        (samples,) = generate_bank([params])
+        assert not np.any(samples)
+
+
+class TestPackedBank:
+    def test_round_trip(self, tmp_path):
+        from click_generator import CLICK_VARIATIONS, generate_bank, read_bank, write_bank
+        samples = generate_bank(CLICK_VARIATIONS)
+        path = tmp_path / "bank.npz"
+        write_bank(path, CLICK_VARIATIONS, samples, sample_rate=44100)
+
+        variants, loaded, sample_rate = read_bank(path)
+        assert variants == CLICK_VARIATIONS
+        assert sample_rate == 44100
+        for a, b in zip(samples, loaded):
+            np.testing.assert_array_equal(a, b)
+
+    def test_main_writes_grid_bank(self, tmp_path, capsys):
+        from click_generator import main, read_bank
+        path = tmp_path / "grid.npz"
+        main(["--grid", "--frequencies", "1000,2000", "--decays", "8", "--durations", "0.002,0.004",
+              "--bank", str(path)])
+        variants, samples, _ = read_bank(path)
+        assert len(variants) == len(samples) == 4
+        assert "Rendered 4 variants" in capsys.readouterr().out
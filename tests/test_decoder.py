@@ -0,0 +1,150 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from decoder import (
+    BookSnapshot,
+    BookUpdate,
+    Decoder,
+    FeedError,
+    FrameDecodeError,
+    InvalidTrade,
+    Ticker,
+    Trade,
+    available_backends,
+    sniff_type,
+    trade_from_dict,
+)
+
+
+class TestSniffType:
+    def test_compact_frame(self):
+        assert sniff_type('{"type":"heartbeat","sequence":1}') == "heartbeat"
+
+    def test_spaced_frame(self):
+        assert sniff_type('{"type": "match", "price": "1"}') == "match"
+
+    def test_bytes_frame(self):
+        assert sniff_type(b'{"type":"ticker"}') == "ticker"
+
+    def test_no_type(self):
+        assert sniff_type('{"price": "1"}') is None
+
+    def test_non_string_type(self):
+        assert sniff_type('{"type": 5}') is None
+
+    def test_garbage(self):
+        assert sniff_type('{"type"') is None
+
+
+class TestTradeFromDict:
+    def test_full_trade(self, sample_trade_match):
+        trade = trade_from_dict(sample_trade_match)
+        assert trade == Trade(50000.0, 0.5, "buy", "BTC-USD", "2024-01-15T12:00:00.000000Z",
+                              12345, "abc123", "def456", 1)
+
+    def test_defaults(self):
+        trade = trade_from_dict({"price": "1", "size": "2"})
+        assert trade.side == "unknown"
+        assert trade.trade_id == -1
+        assert trade.sequence is None
+
+    @pytest.mark.parametrize("data", [
+        {"size": "0.5"},
+        {"price": "50000"},
+        {"price": None, "size": "0.5"},
+        {"price": "", "size": "0.5"},
+        {"price": "50000", "size": "big"},
+    ])
+    def test_invalid(self, data):
+        with pytest.raises(InvalidTrade):
+            trade_from_dict(data)
+
+    def test_records_are_slotted(self):
+        assert not hasattr(Trade(1.0, 1.0), "__dict__")
+        assert not hasattr(Ticker(1.0), "__dict__")
+
+
+@pytest.fixture(params=available_backends())
+def decoder(request):
+    return Decoder(request.param)
+
+
+class TestDecoder:
+    def test_heartbeat_skipped_without_parse(self, decoder):
+        decoder._loads = None  # any parse attempt would fail loudly
+        assert decoder.decode('{"type":"heartbeat","sequence":90,"last_trade_id":20}') is None
+        assert decoder.skipped == 1
+
+    def test_subscriptions_skipped(self, decoder):
+        assert decoder.decode(json.dumps({"type": "subscriptions", "channels": []})) is None
+
+    def test_match_decoded(self, decoder, sample_trade_match):
+        trade = decoder.decode(json.dumps(sample_trade_match))
+        assert isinstance(trade, Trade)
+        assert trade.price == 50000.0
+        assert trade.product_id == "BTC-USD"
+
+    def test_last_match_decoded(self, decoder, sample_trade_match):
+        sample_trade_match["type"] = "last_match"
+        trade = decoder.decode(json.dumps(sample_trade_match))
+        assert isinstance(trade, Trade)
+        assert trade.sequence is None  # from before the subscription; not part of the stream
+
+    def test_sequences_decoded(self, decoder, sample_trade_match):
+        assert decoder.decode(json.dumps(sample_trade_match)).sequence == 1
+        ticker = decoder.decode('{"type": "ticker", "price": "1", "sequence": "42"}')
+        assert ticker.sequence == 42
+
+    def test_ticker_decoded(self, decoder, sample_ticker_message):
+        assert decoder.decode(json.dumps(sample_ticker_message)) == Ticker(50500.0, "BTC-USD")
+
+    def test_bad_ticker_price_is_zero(self, decoder):
+        assert decoder.decode('{"type": "ticker", "price": "n/a"}').price == 0.0
+
+    def test_error_decoded(self, decoder, sample_error_message):
+        assert decoder.decode(json.dumps(sample_error_message)) == FeedError("Test error message")
+
+    def test_unknown_type_ignored(self, decoder):
+        assert decoder.decode('{"type": "received"}') is None
+
+    def test_book_frames_decoded(self, decoder):
+        snapshot = decoder.decode(json.dumps({
+            "type": "snapshot", "product_id": "BTC-USD", "bids": [["100.00", "1.5"]], "asks": [["100.50", "2"]],
+        }))
+        assert snapshot == BookSnapshot("BTC-USD", [["100.00", "1.5"]], [["100.50", "2"]])
+        update = decoder.decode(json.dumps({
+            "type": "l2update", "product_id": "BTC-USD", "time": "2024-01-15T12:00:00.000000Z",
+            "changes": [["buy", "100.00", "0"]],
+        }))
+        assert update == BookUpdate("BTC-USD", [["buy", "100.00", "0"]])
+
+    @pytest.mark.parametrize("frame", ["", "   ", "{invalid json", "[1, 2]", b"\xff"])
+    def test_parse_errors(self, decoder, frame):
+        with pytest.raises(FrameDecodeError):
+            decoder.decode(frame)
+
+    @pytest.mark.parametrize("frame", ['{"type": "ticker"} trailing', '{"type": "ticker"}{}'])
+    def test_trailing_data_rejected(self, decoder, frame):
+        with pytest.raises(FrameDecodeError):
+            decoder.decode(frame)
+
+    def test_surrounding_whitespace_allowed(self, decoder):
+        assert decoder.decode(' {"type": "ticker", "price": "5"}\n').price == 5.0
+
+    def test_skipped_type_as_a_value_still_decoded(self, decoder):
+        trade = decoder.decode('{"type":"match","side":"heartbeat","price":"1","size":"2"}')
+        assert isinstance(trade, Trade)
+        assert decoder.skipped == 0
+
+    def test_invalid_trade_raises(self, decoder):
+        with pytest.raises(InvalidTrade):
+            decoder.decode('{"type": "match", "price": null, "size": "0.5"}')
+
+    def test_unavailable_backend(self):
+        with pytest.raises(ValueError):
+            Decoder("simdjson")
@@ -0,0 +1,147 @@
+import random
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from depth_heatmap import PALETTE, SHADES, DepthHistory, quantize
+from order_book import DepthLadder, OrderBook
+
+
+def _book(bucket_size=1.0, buckets=16):
+    book = OrderBook("BTC-USD", ladder=DepthLadder(bucket_size, buckets))
+    book.apply_snapshot(
+        bids=[["100.00", "1"], ["99.50", "2"], ["98.00", "4"]],
+        asks=[["100.50", "0.5"], ["101.00", "1.5"], ["103.00", "3.5"]],
+    )
+    return book
+
+
+def _rebuilt(book):
+    ladder = book.ladder
+    fresh = DepthLadder(ladder.bucket_size, ladder.buckets)
+    fresh.origin = ladder.origin
+    return fresh._totals(book.bids), fresh._totals(book.asks)
+
+
+class TestDepthLadder:
+    def test_snapshot_buckets_sizes_around_mid(self):
+        book = _book()
+        ladder = book.ladder
+        assert ladder.origin == 100 - 8
+        assert ladder.bids[ladder.bucket(99.5) - ladder.origin] == 2.0
+        assert ladder.bids[ladder.bucket(100.0) - ladder.origin] == 1.0
+        assert ladder.asks[ladder.bucket(100.5) - ladder.origin] == 0.5
+
+    def test_changes_update_buckets(self):
+        book = _book()
+        ladder = book.ladder
+        book.apply_changes([["buy", "99.50", "0"], ["buy", "99.25", "3"], ["sell", "101.00", "1"]])
+        assert ladder.bids[ladder.bucket(99.0) - ladder.origin] == 3.0
+        assert ladder.asks[ladder.bucket(101.0) - ladder.origin] == 1.0
+
+    def test_random_changes_match_rebuild(self):
+        rng = random.Random(3)
+        book = _book(bucket_size=0.5, buckets=32)
+        for _ in range(3000):
+            side = rng.choice(("buy", "sell"))
+            price = 100 - rng.randint(0, 20) * 0.25 if side == "buy" else 100.5 + rng.randint(0, 20) * 0.25
+            size = 0.0 if rng.random() < 0.3 else round(rng.uniform(0.001, 2), 8)
+            book.apply_changes([[side, f"{price:.2f}", f"{size}"]])
+        bids, asks = _rebuilt(book)
+        assert book.ladder.bids == pytest.approx(bids, abs=1e-9)
+        assert book.ladder.asks == pytest.approx(asks, abs=1e-9)
+
+    def test_recentre_when_mid_leaves_middle(self):
+        book = _book()
+        assert not book.ladder.needs_recentre(book.mid())
+        assert book.ladder.needs_recentre(book.mid() + 5)
+        assert book.ladder.needs_recentre(book.mid() - 5)
+
+    def test_clear_waits_for_snapshot(self):
+        book = _book()
+        book.clear()
+        assert book.ladder.origin is None
+        book.ladder.add(True, 100.0, 1.0)
+        assert sum(book.ladder.bids) == 0
+
+    def test_bucket_size_must_be_positive(self):
+        with pytest.raises(ValueError):
+            DepthLadder(0)
+
+
+class TestQuantize:
+    def test_largest_cell_is_densest_shade(self):
+        cells = quantize(np.array([[4.0, 1.0, 0.0]]), np.array([[0.0, 0.0, 0.0]]))
+        assert cells.tolist() == [[len(SHADES) - 1, 2, 0]]
+
+    def test_ask_heavy_cells_use_ask_colours(self):
+        cells = quantize(np.array([[1.0, 2.0]]), np.array([[2.0, 1.0]]))
+        assert cells[0, 0] >= len(SHADES)
+        assert cells[0, 1] < len(SHADES)
+        assert PALETTE[cells[0, 0]] != PALETTE[cells[0, 1]]
+
+    def test_float_residue_is_empty(self):
+        cells = quantize(np.array([[1e-15, 0.0]]), np.array([[0.0, 3e-16]]))
+        assert cells.tolist() == [[0, 0]]
+        assert PALETTE[0] == PALETTE[len(SHADES)] == " "
+
+
+class TestDepthHistory:
+    def test_capture_needs_ready_book(self):
+        history = DepthHistory(16, columns=4)
+        assert not history.capture(OrderBook("BTC-USD", ladder=DepthLadder(1.0, 16)))
+        assert history.captured == 0
+
+    def test_columns_oldest_first_and_wrap(self):
+        book = _book()
+        history = DepthHistory(16, columns=3)
+        row = book.ladder.bucket(99.5) - book.ladder.origin
+        for size in ("1", "2", "3", "4"):
+            book.apply_changes([["buy", "99.50", size]])
+            history.capture(book)
+        _, bids, _ = history.window(book.ladder.bucket(book.mid()), 16)
+        assert bids[row].tolist() == [2.0, 3.0, 4.0]
+        assert history.captured == 4
+
+    def test_recentre_shifts_old_columns_to_same_price(self):
+        book = _book()
+        history = DepthHistory(16, columns=2)
+        history.capture(book)
+        book.apply_changes([["sell", "100.50", "0"], ["sell", "101.00", "0"], ["sell", "103.00", "0"],
+                            ["buy", "104.00", "1"], ["sell", "106.00", "1"]])
+        history.capture(book)
+        assert book.ladder.recentres == 2
+        _, bids, _ = history.window(book.ladder.bucket(99.5), 1)
+        assert bids.tolist() == [[2.0, 2.0]]
+
+    def test_render_lines_have_labels_and_columns(self):
+        book = _book()
+        history = DepthHistory(16, columns=5)
+        assert history.render(book.mid(), 1.0) == []
+        history.capture(book)
+        lines = history.render(book.mid(), 1.0, rows=6)
+        assert len(lines) == 6
+        assert "[bold]" in "".join(lines)
+        assert "      102" in lines[0]
+        assert "       97" in lines[-1]
+
+    def test_columns_must_be_positive(self):
+        with pytest.raises(ValueError):
+            DepthHistory(16, columns=0)
+
+
+class TestDepthWidget:
+    def test_capture_depth_redraws_only_on_new_column(self, btc_app):
+        btc_app.engine.book = _book()
+        btc_app.depth_widget = MagicMock()
+        btc_app.depth_widget.history = DepthHistory(16, columns=4)
+        btc_app.capture_depth()
+        btc_app.depth_widget.update_depth.assert_called_once_with(100.25, 1.0)
+        btc_app.engine.book.clear()
+        btc_app.capture_depth()
+        assert btc_app.depth_widget.update_depth.call_count == 1
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from engine import FeedEngine
+from recorder import FrameRecorder, ReplaySource
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def _trade(price, size="0.5", side="buy"):
+    return json.dumps({"type": "match", "price": price, "size": size, "side": side, "product_id": "BTC-USD"})
+
+
+class TestFeedEngine:
+    def test_callbacks_for_trades_passing_filter(self):
+        on_trade, on_price = MagicMock(), MagicMock()
+        engine = FeedEngine(on_trade=on_trade, on_price=on_price)
+        engine.filter_index = 2  # 0.01 BTC
+        engine.process_message(_trade("50000.00", size="0.001"))
+        engine.process_message(_trade("50100.00", size="0.5"))
+
+        on_trade.assert_called_once()
+        assert on_trade.call_args[0][0].price == 50100.0
+        assert on_price.call_args_list[-1][0] == (0.0, 50100.0, 50100.0)
+        assert engine.stats["total_trades"] == 1
+
+    def test_batch_reports_one_net_price_move(self):
+        on_price = MagicMock()
+        engine = FeedEngine(on_price=on_price)
+        engine.stats["last_price"] = 49000.0
+        engine.process_batch([_trade("50000.00"), _trade("48000.00"), _trade("49500.00")])
+        on_price.assert_called_once_with(49000.0, 49500.0, 49500.0)
+
+    def test_runs_without_callbacks(self):
+        engine = FeedEngine()
+        engine.process_batch([_trade("50000.00"), json.dumps({"type": "error", "message": "boom"})])
+        assert engine.stats["total_trades"] == 1
+
+    def test_set_filter_switches_level_stats(self):
+        engine = FeedEngine()
+        engine.handle_trade({"price": "50000", "size": "0.005", "side": "buy"})
+        engine.handle_trade({"price": "51000", "size": "0.5", "side": "sell"})
+        engine.trades_dirty = False
+        engine.set_filter(3)
+        assert engine.stats["total_trades"] == 1
+        assert engine.min_trade_size() == 0.1
+        assert engine.trades_dirty
+
+    def test_bot_activity_threshold(self):
+        engine = FeedEngine()
+        for _ in range(4):
+            engine.handle_trade({"price": "50000", "size": "0.1234", "side": "buy"})
+        assert engine.bot_activity() is None
+        engine.handle_trade({"price": "50001", "size": "0.1234", "side": "buy"})
+        assert engine.bot_activity() == (0.1234, 5, 50001.0)
+
+    def test_snapshot_is_json_serialisable(self):
+        engine = FeedEngine()
+        for size in ("0.00005", "0.5", "0.5", "2"):
+            engine.handle_trade({"price": "50000", "size": size, "side": "buy"})
+        snapshot = json.loads(json.dumps(engine.snapshot()))
+        assert snapshot["total_trades"] == 3  # the 0.00005 trade is below the smallest filter
+        assert snapshot["vwap"] == pytest.approx(50000.0)
+        assert snapshot["heatmap"] == [1, 0, 0, 0, 2, 1]
+        assert snapshot["bot"] is None
+
+
+class TestSequenceGaps:
+    def _frame(self, sequence, frame_type="match", product_id="BTC-USD", trade_id=None):
+        return json.dumps({"type": frame_type, "price": "50000", "size": "0.5", "side": "buy",
+                           "product_id": product_id, "sequence": sequence,
+                           "trade_id": sequence if trade_id is None else trade_id})
+
+    def test_gaps_counted_per_product(self, caplog):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        with caplog.at_level("DEBUG", logger="engine"):
+            engine.process_batch([
+                self._frame(1), self._frame(2), self._frame(6),
+                self._frame(100, product_id="ETH-USD"), self._frame(101, product_id="ETH-USD"),
+            ])
+        assert engine.stats["seq_gaps"] == 1
+        assert engine.stats["seq_missing"] == 3
+        assert engine.stats["seq_last_gap"] == 3
+        assert engine.shards["ETH-USD"].sequence.gaps == 0
+        assert "BTC-USD trade ID gap: 3 missing before 6" in caplog.text
+
+    def test_gap_not_logged_at_info(self, caplog):
+        engine = FeedEngine()
+        with caplog.at_level("INFO", logger="engine"):
+            engine.process_batch([self._frame(1), self._frame(9)])
+        assert engine.stats["seq_gaps"] == 1
+        assert "trade ID gap" not in caplog.text
+
+    def test_skipping_match_sequence_is_not_a_gap(self):
+        # Coinbase match sequences skip frames sent on the product's other channels
+        engine = FeedEngine()
+        engine.process_batch([self._frame(10, trade_id=1), self._frame(14, trade_id=2), self._frame(31, trade_id=3)])
+        assert engine.stats["seq_gaps"] == 0
+        assert engine.shard.sequence.received == 3
+
+    def test_gap_summary_logged_at_info_when_counts_change(self, caplog):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_batch([self._frame(1), self._frame(5), self._frame(1, product_id="ETH-USD")])
+        with caplog.at_level("INFO", logger="engine"):
+            engine.log_gap_summary()
+            engine.log_gap_summary()
+        lines = [r.getMessage() for r in caplog.records]
+        assert lines == ["BTC-USD trade ID gaps: 1 (3 missing, largest 3), 0 late, 0 duplicates"]
+
+    def test_ticker_before_its_match(self):
+        engine = FeedEngine()
+        engine.process_batch([self._frame(1), self._frame(2, "ticker"), self._frame(2), self._frame(3)])
+        assert engine.stats["total_trades"] == 3
+        assert engine.stats["seq_duplicates"] == 0
+        assert engine.stats["seq_gaps"] == 0
+
+    def test_tickers_ignored_by_tracker(self):
+        engine = FeedEngine()
+        engine.process_batch([self._frame(1), self._frame(7, "ticker"), self._frame(2)])
+        assert engine.shard.sequence.received == 2
+        assert engine.stats["seq_gaps"] == 0
+
+    def test_repeated_sequence_kept_and_late_frames_kept(self):
+        engine = FeedEngine()
+        engine.process_batch([self._frame(1), self._frame(3), self._frame(3, trade_id=4), self._frame(2)])
+        assert engine.stats["total_trades"] == 4
+        assert engine.stats["seq_duplicates"] == 0
+        assert engine.stats["seq_late"] == 1
+        assert engine.stats["seq_missing"] == 0
+
+    def test_repeated_trade_id_dropped(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_batch([
+            self._frame(1), self._frame(1), self._frame(5, trade_id=1),
+            self._frame(1, product_id="ETH-USD"),
+        ])
+        assert engine.stats["total_trades"] == 1
+        assert engine.shards["ETH-USD"].stats["total_trades"] == 1
+
+    def test_trades_without_id_never_deduplicated(self):
+        engine = FeedEngine()
+        engine.process_batch([self._frame(None, trade_id=-1) for _ in range(3)])
+        assert engine.stats["total_trades"] == 3
+
+    def test_last_match_does_not_open_a_gap(self):
+        engine = FeedEngine()
+        engine.process_batch([
+            self._frame(5, "last_match", trade_id=900), self._frame(2000, "ticker"), self._frame(2001, trade_id=901),
+        ])
+        assert engine.stats["seq_gaps"] == 0
+
+    def test_snapshot_reports_sequence(self):
+        engine = FeedEngine()
+        engine.process_batch([self._frame(1), self._frame(4)])
+        sequence = json.loads(json.dumps(engine.snapshot()))["sequence"]
+        assert sequence["received"] == 2
+        assert sequence["gaps"] == 1
+        assert sequence["missing"] == 2
+
+    @pytest.mark.asyncio
+    async def test_reconnect_restarts_baseline(self):
+        engine = FeedEngine()
+        engine.process_message(self._frame(1))
+        connection = _FakeConnection([self._frame(500)])
+        engine._connect = lambda: connection
+        engine_task = asyncio.create_task(engine.run())
+        while engine.stats["total_trades"] < 2:
+            await asyncio.sleep(0.001)
+        engine_task.cancel()
+        assert engine.stats["seq_gaps"] == 0
+
+
+class _FakeConnection:
+    def __init__(self, frames):
+        self.frames = frames
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for frame in self.frames:
+            yield frame
+        # Stay connected until cancelled
+        await asyncio.Event().wait()
+
+
+class TestProducts:
+    def _match(self, product_id, price, size="0.5"):
+        return json.dumps({"type": "match", "price": price, "size": size, "side": "buy", "product_id": product_id})
+
+    def test_trades_routed_to_their_product_shard(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_batch([
+            self._match("BTC-USD", "50000"),
+            self._match("ETH-USD", "3000"),
+            self._match("ETH-USD", "3010"),
+        ])
+        assert engine.stats["total_trades"] == 1
+        eth = engine.shards["ETH-USD"]
+        assert eth.stats["total_trades"] == 2
+        assert eth.stats["last_price"] == 3010.0
+        assert len(eth.recent_trades) == 2
+
+    def test_background_products_fire_no_callbacks(self):
+        on_trade, on_price = MagicMock(), MagicMock()
+        engine = FeedEngine(on_trade=on_trade, on_price=on_price, products=["BTC-USD", "ETH-USD"])
+        engine.process_message(self._match("ETH-USD", "3000"))
+        engine.handle_trade({"price": "3000", "size": "0.5", "side": "buy", "product_id": "ETH-USD"})
+        on_trade.assert_not_called()
+        on_price.assert_not_called()
+        assert engine.shards["ETH-USD"].stats["total_trades"] == 2
+
+    def test_unsubscribed_products_dropped(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_message(self._match("SOL-USD", "150"))
+        assert all(shard.stats["total_trades"] == 0 for shard in engine.shards.values())
+
+    def test_set_product_switches_active_shard(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_message(self._match("ETH-USD", "3000", size="0.005"))
+        engine.process_message(self._match("ETH-USD", "3000", size="0.5"))
+        engine.set_filter(3)
+        engine.trades_dirty = False
+        engine.set_product("ETH-USD")
+        assert engine.product_id == "ETH-USD"
+        assert engine.stats["total_trades"] == 1  # at the 0.1 filter level
+        assert engine.recent_filtered(10)[0]["price"] == 3000.0
+
+    def test_filter_applies_to_background_products(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_batch([
+            self._match("ETH-USD", "3000", size="0.005"),
+            self._match("ETH-USD", "3010", size="0.5"),
+        ])
+        engine.set_filter(3)
+        eth = next(p for p in engine.snapshot()["products"] if p["product_id"] == "ETH-USD")
+        assert eth["total_trades"] == 1
+        assert eth["session_volume"] == 0.5
+        engine.set_filter(0)
+        assert engine.shards["ETH-USD"].stats["total_trades"] == 2
+        assert engine.trades_dirty
+        with pytest.raises(KeyError):
+            engine.set_product("SOL-USD")
+
+    def test_parse_errors_follow_active_product(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_message("not json")
+        engine.set_product("ETH-USD")
+        assert engine.stats["parse_errors"] == 1
+
+    def test_summaries_and_snapshot(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine.process_batch([self._match("BTC-USD", "50000"), self._match("ETH-USD", "3000")])
+        summaries = engine.product_summaries()
+        assert [s["product_id"] for s in summaries] == ["BTC-USD", "ETH-USD"]
+        assert summaries[1]["last_price"] == 3000.0
+        snapshot = json.loads(json.dumps(engine.snapshot()))
+        assert snapshot["product_id"] == "BTC-USD"
+        assert [p["total_trades"] for p in snapshot["products"]] == [1, 1]
+        assert "products" not in FeedEngine().snapshot()
+
+    @pytest.mark.asyncio
+    async def test_subscribes_to_every_product_on_one_connection(self):
+        connection = _FakeConnection([self._match("ETH-USD", "3000")])
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        engine._connect = lambda: connection
+        engine_task = asyncio.create_task(engine.run())
+        while not connection.sent or not engine.shards["ETH-USD"].stats["total_trades"]:
+            await asyncio.sleep(0.001)
+        engine_task.cancel()
+        assert len(connection.sent) == 1
+        assert json.loads(connection.sent[0])["product_ids"] == ["BTC-USD", "ETH-USD"]
+
+    @pytest.mark.asyncio
+    async def test_book_channel_subscribed_for_its_product(self):
+        from order_book import BOOK_CHANNEL, OrderBook
+        connection = _FakeConnection([])
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"], book=OrderBook("BTC-USD"))
+        engine._connect = lambda: connection
+        engine_task = asyncio.create_task(engine.run())
+        while not connection.sent:
+            await asyncio.sleep(0.001)
+        engine_task.cancel()
+        channels = json.loads(connection.sent[0])["channels"]
+        assert {"name": BOOK_CHANNEL, "product_ids": ["BTC-USD"]} in channels
+        assert "matches" in channels
+
+    def test_requires_a_product(self):
+        with pytest.raises(ValueError):
+            FeedEngine(products=[])
+        assert FeedEngine(products=None).products == ["BTC-USD"]
+
+
+class TestHeadless:
+    @pytest.mark.asyncio
+    async def test_run_headless_replays_and_emits_snapshots(self, tmp_path):
+        from src.main import run_headless
+        path = str(tmp_path / "feed.gz")
+        recorder = FrameRecorder(path)
+        recorder.write_many([_trade("50000.00"), _trade("50100.00")], 1.0)
+        recorder.close()
+        engine = FeedEngine(replay=ReplaySource(path, speed=0))
+        snapshots = []
+
+        await asyncio.wait_for(run_headless(engine, 0.01, snapshots.append), 5)
+
+        assert snapshots[-1]["total_trades"] == 2
+        assert snapshots[-1]["last_price"] == 50100.0
+
+    def test_headless_import_skips_ui_modules(self):
+        code = "import sys, src.main; print(sorted(m for m in ('textual', 'pygame') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
+
+    @pytest.mark.asyncio
+    async def test_on_connect_called_once_subscribed(self, tmp_path):
+        path = str(tmp_path / "feed.gz")
+        recorder = FrameRecorder(path)
+        recorder.write_many([_trade("50000.00")], 1.0)
+        recorder.close()
+        on_connect = MagicMock()
+        engine = FeedEngine(replay=ReplaySource(path, speed=0), on_connect=on_connect)
+
+        await asyncio.wait_for(engine.run(), 5)
+
+        on_connect.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_batch_counters_logged_when_replay_ends(self, tmp_path, caplog):
+        path = str(tmp_path / "feed.gz")
+        recorder = FrameRecorder(path)
+        recorder.write_many([_trade("50000.00"), _trade("50100.00")], 1.0)
+        recorder.close()
+        engine = FeedEngine(replay=ReplaySource(path, speed=0))
+
+        with caplog.at_level("INFO", logger="engine"):
+            await asyncio.wait_for(engine.run(), 5)
+
+        assert "Ingest batches: {" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_batch_counters_logged_when_cancelled(self, caplog):
+        engine = FeedEngine()
+        engine._connect = lambda: _FakeConnection([_trade("50000.00")])
+        with caplog.at_level("INFO", logger="engine"):
+            task = asyncio.create_task(engine.run())
+            while engine.stats["total_trades"] < 1:
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert "Ingest batches: {" in caplog.text
+
+    def test_products_argument(self):
+        from src.main import parse_args
+        assert parse_args(["--products", "btc-usd, ETH-USD,,BTC-USD"]).products == ["BTC-USD", "ETH-USD"]
+        assert parse_args([]).products == ["BTC-USD"]
+        with pytest.raises(SystemExit):
+            parse_args(["--products", " , "])
+
+    def test_ui_import_defers_pygame(self):
+        code = "import sys, src.cli; print('pygame' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "False"
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import websockets
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from decoder import Decoder, FrameDecodeError, InvalidTrade, Ticker, Trade
+from feed_server import BOT_SIZE, FeedProfile, FeedServer, FrameGenerator
+
+SUBSCRIBE = json.dumps({"type": "subscribe", "product_ids": ["BTC-USD"], "channels": ["matches", "ticker", "heartbeat"]})
+
+
+class TestFeedProfile:
+    def test_steady_rate(self):
+        assert FeedProfile(tps=100).rate_at(123.0) == 100
+
+    def test_bursty_repeats(self):
+        profile = FeedProfile(tps=10, burst="bursty", burst_factor=5, burst_period=10, burst_length=1)
+        assert profile.rate_at(0.5) == 50
+        assert profile.rate_at(5) == 10
+        assert profile.rate_at(20.5) == 50
+
+    def test_spike_fires_once(self):
+        profile = FeedProfile(tps=10, burst="spike", burst_factor=5, burst_period=10, burst_length=1)
+        assert profile.rate_at(0.5) == 10
+        assert profile.rate_at(10.5) == 50
+        assert profile.rate_at(20.5) == 10
+
+    def test_ramp_climbs_then_holds(self):
+        profile = FeedProfile(tps=10, burst="ramp", burst_factor=11, burst_period=10)
+        assert profile.rate_at(0) == 10
+        assert profile.rate_at(5) == 60
+        assert profile.rate_at(50) == 110
+
+    @pytest.mark.parametrize("kwargs", [{"burst": "wavy"}, {"sizes": "huge"}, {"tps": -1}, {"malformed_rate": 2},
+                                        {"drop_rate": 1}])
+    def test_invalid_profiles_rejected(self, kwargs):
+        with pytest.raises(ValueError):
+            FeedProfile(**kwargs)
+
+
+class TestFrameGenerator:
+    def test_frames_decode_as_trades_and_tickers(self):
+        gen = FrameGenerator(FeedProfile(ticker_every=5))
+        records = [Decoder("json").decode(frame) for frame in gen.frames(20)]
+        assert sum(isinstance(r, Trade) for r in records) == 20
+        assert sum(isinstance(r, Ticker) for r in records) == 4
+        sequences = [r.sequence for r in records if isinstance(r, Trade)]
+        assert sequences == list(range(1, 21))
+        # Each ticker repeats the sequence of the match before it
+        assert [r.sequence for r in records if isinstance(r, Ticker)] == [5, 10, 15, 20]
+
+    def test_frames_carry_generator_product(self):
+        gen = FrameGenerator(FeedProfile(ticker_every=1), product_id="ETH-USD", seed=3)
+        assert {json.loads(f)["product_id"] for f in gen.frames(5)} == {"ETH-USD"}
+
+    def test_same_seed_same_stream(self):
+        a = [json.loads(f)["size"] for f in FrameGenerator(FeedProfile(seed=7, ticker_every=0)).frames(50)]
+        b = [json.loads(f)["size"] for f in FrameGenerator(FeedProfile(seed=7, ticker_every=0)).frames(50)]
+        assert a == b
+
+    def test_malformed_rate(self):
+        gen = FrameGenerator(FeedProfile(malformed_rate=1.0, ticker_every=0))
+        decoder = Decoder("json")
+        for frame in gen.frames(30):
+            with pytest.raises((FrameDecodeError, InvalidTrade)):
+                decoder.decode(frame)
+        assert gen.malformed == 30
+
+    def test_drop_rate_leaves_sequence_gaps(self):
+        gen = FrameGenerator(FeedProfile(drop_rate=0.2, ticker_every=5))
+        frames = gen.frames(500)
+        sequences = [json.loads(f)["sequence"] for f in frames if json.loads(f)["type"] == "match"]
+        assert gen.dropped > 0
+        assert len(frames) + gen.dropped == 500 + 100
+        assert sequences == sorted(sequences)
+        assert sequences[-1] - sequences[0] + 1 > len(sequences)
+
+    def test_size_distributions(self):
+        fixed = FrameGenerator(FeedProfile(sizes="fixed", mean_size=0.25, ticker_every=0)).frames(10)
+        assert {float(json.loads(f)["size"]) for f in fixed} == {0.25}
+        bot = FrameGenerator(FeedProfile(sizes="bot", ticker_every=0)).frames(200)
+        assert sum(float(json.loads(f)["size"]) == BOT_SIZE for f in bot) > 20
+
+
+class TestFeedServer:
+    @pytest.mark.asyncio
+    async def test_subscribe_then_stream(self):
+        server = FeedServer(FeedProfile(tps=500, heartbeat_interval=0.05), port=0)
+        await server.start()
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{server.port}") as ws:
+                await ws.send(SUBSCRIBE)
+                first = json.loads(await ws.recv())
+                types = {json.loads(await ws.recv())["type"] for _ in range(60)}
+        finally:
+            await server.stop()
+        assert first["type"] == "subscriptions"
+        assert {"match", "ticker", "heartbeat"} <= types
+
+    @pytest.mark.asyncio
+    async def test_book_subscription_gets_snapshot_then_updates(self):
+        server = FeedServer(FeedProfile(tps=50, book_levels=20, book_updates=2), port=0)
+        await server.start()
+        subscribe = json.dumps({
+            "type": "subscribe", "product_ids": ["BTC-USD"],
+            "channels": ["matches", {"name": "level2_batch", "product_ids": ["BTC-USD"]}],
+        })
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{server.port}") as ws:
+                await ws.send(subscribe)
+                subscriptions = json.loads(await ws.recv())
+                snapshot = json.loads(await ws.recv())
+                types = {json.loads(await ws.recv())["type"] for _ in range(60)}
+        finally:
+            await server.stop()
+        assert [c["name"] for c in subscriptions["channels"]] == ["matches", "level2_batch"]
+        assert snapshot["type"] == "snapshot"
+        assert len(snapshot["bids"]) == len(snapshot["asks"]) == 20
+        assert "l2update" in types
+
+    @pytest.mark.asyncio
+    async def test_streams_every_subscribed_product(self):
+        server = FeedServer(FeedProfile(tps=300, book_levels=5), port=0)
+        await server.start()
+        subscribe = json.dumps({
+            "type": "subscribe", "product_ids": ["BTC-USD", "ETH-USD", "SOL-USD"],
+            "channels": ["matches", "heartbeat", {"name": "level2_batch", "product_ids": ["ETH-USD"]}],
+        })
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{server.port}") as ws:
+                await ws.send(subscribe)
+                await ws.recv()
+                snapshot = json.loads(await ws.recv())
+                frames = [json.loads(await ws.recv()) for _ in range(300)]
+        finally:
+            await server.stop()
+        assert snapshot["type"] == "snapshot" and snapshot["product_id"] == "ETH-USD"
+        matches = [f for f in frames if f["type"] == "match"]
+        assert {f["product_id"] for f in matches} == {"BTC-USD", "ETH-USD", "SOL-USD"}
+        assert {f["product_id"] for f in frames if f["type"] == "l2update"} == {"ETH-USD"}
+        for product_id in ("BTC-USD", "ETH-USD", "SOL-USD"):
+            sequences = [f["sequence"] for f in matches if f["product_id"] == product_id]
+            assert sequences == list(range(sequences[0], sequences[0] + len(sequences)))
+
+    @pytest.mark.asyncio
+    async def test_app_counts_trades_for_each_product(self, btc_app):
+        from engine import FeedEngine
+        btc_app.engine = FeedEngine(products=["BTC-USD", "ETH-USD"])
+        server = FeedServer(FeedProfile(tps=200, disconnect_after=0.2), port=0)
+        await server.start()
+        try:
+            with patch("engine.COINBASE_WS_URL", f"ws://127.0.0.1:{server.port}"), \
+                    patch("engine.RECONNECT_DELAY", 0.01), patch("engine.MAX_RECONNECT_ATTEMPTS", 1):
+                await asyncio.wait_for(btc_app.engine.run(), 5)
+        finally:
+            await server.stop()
+        assert all(shard.stats["total_trades"] > 0 for shard in btc_app.engine.shards.values())
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_subscribe(self):
+        server = FeedServer(FeedProfile(), port=0)
+        await server.start()
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{server.port}") as ws:
+                await ws.send(json.dumps({"type": "hello"}))
+                reply = json.loads(await ws.recv())
+        finally:
+            await server.stop()
+        assert reply["type"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_app_reconnects_after_forced_disconnect(self, btc_app):
+        server = FeedServer(FeedProfile(tps=200, disconnect_after=0.1), port=0)
+        await server.start()
+        try:
+            with patch("engine.COINBASE_WS_URL", f"ws://127.0.0.1:{server.port}"), \
+                    patch("engine.RECONNECT_DELAY", 0.01), patch("engine.MAX_RECONNECT_ATTEMPTS", 1):
+                await asyncio.wait_for(btc_app.engine.run(), 5)
+        finally:
+            await server.stop()
+        assert server.disconnects == 1
+        assert btc_app.stats["total_trades"] > 0
+        assert btc_app.status_header.feed_status == "[bright_red]DISCONNECTED[/]"
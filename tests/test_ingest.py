@@ -0,0 +1,100 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ingest import HandoffQueue, IngestThread
+
+
+class TestHandoffQueue:
+    def test_put_and_drain_in_order(self):
+        queue = HandoffQueue(4)
+        for i in range(3):
+            assert queue.put(i)
+        assert queue.drain() == [0, 1, 2]
+        assert len(queue) == 0
+
+    def test_drop_oldest_on_overflow(self):
+        queue = HandoffQueue(2, overflow="drop_oldest")
+        for i in range(5):
+            queue.put(i)
+        assert queue.drain() == [3, 4]
+        assert queue.dropped == 3
+
+    def test_drop_newest_on_overflow(self):
+        queue = HandoffQueue(2, overflow="drop_newest")
+        results = [queue.put(i) for i in range(4)]
+        assert results == [True, True, False, False]
+        assert queue.drain() == [0, 1]
+        assert queue.dropped == 2
+
+    def test_snapshot_metrics(self):
+        queue = HandoffQueue(3)
+        for i in range(5):
+            queue.put(i)
+        queue.drain()
+        queue.put("x")
+        assert queue.snapshot() == {"depth": 1, "high_water": 3, "published": 6, "dropped": 2}
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            HandoffQueue(0)
+        with pytest.raises(ValueError):
+            HandoffQueue(4, overflow="block")
+
+    def test_concurrent_producers(self):
+        queue = HandoffQueue(10_000)
+
+        def produce():
+            for i in range(1000):
+                queue.put(i)
+
+        threads = [threading.Thread(target=produce) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(queue.drain()) == 4000
+        assert queue.dropped == 0
+
+
+class TestIngestThread:
+    def test_runs_coroutine_on_own_loop(self):
+        seen = {}
+
+        async def work():
+            seen["thread"] = threading.current_thread().name
+            seen["loop"] = asyncio.get_running_loop()
+
+        thread = IngestThread(work)
+        thread.start()
+        thread.join(2)
+        assert seen["thread"] == "btcbeeper-ingest"
+        assert not thread.is_alive()
+        assert thread.error is None
+
+    def test_stop_cancels_long_running_coroutine(self):
+        started = threading.Event()
+
+        async def forever():
+            started.set()
+            await asyncio.sleep(3600)
+
+        thread = IngestThread(forever)
+        thread.start()
+        assert started.wait(2)
+        thread.stop(timeout=2)
+        assert not thread.is_alive()
+
+    def test_error_recorded(self):
+        async def boom():
+            raise RuntimeError("feed exploded")
+
+        thread = IngestThread(boom)
+        thread.start()
+        thread.join(2)
+        assert isinstance(thread.error, RuntimeError)
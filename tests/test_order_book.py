@@ -0,0 +1,169 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from engine import FeedEngine
+from feed_server import FeedProfile, FrameGenerator
+from order_book import BookSide, OrderBook
+
+
+def _book(depth_levels=3):
+    book = OrderBook("BTC-USD", depth_levels=depth_levels)
+    book.apply_snapshot(
+        bids=[["100.00", "1"], ["99.50", "2"], ["99.00", "3"], ["98.00", "4"]],
+        asks=[["100.50", "0.5"], ["101.00", "1.5"], ["102.00", "2.5"], ["103.00", "3.5"]],
+    )
+    return book
+
+
+class TestBookSide:
+    def test_best_is_highest_bid_and_lowest_ask(self):
+        book = _book()
+        assert book.best_bid() == (100.0, 1.0)
+        assert book.best_ask() == (100.5, 0.5)
+        assert book.bids.levels(2) == [(100.0, 1.0), (99.5, 2.0)]
+        assert book.asks.levels(2) == [(100.5, 0.5), (101.0, 1.5)]
+
+    def test_depth_and_totals(self):
+        book = _book()
+        assert book.bids.depth == 6.0
+        assert book.asks.depth == 4.5
+        assert book.bids.total == 10.0
+
+    def test_remove_inside_depth_pulls_next_level_up(self):
+        book = _book()
+        book.apply_changes([["buy", "99.50", "0"]])
+        assert book.bids.depth == 8.0  # 1 + 3 + 4
+        assert len(book.bids) == 3
+
+    def test_insert_inside_depth_pushes_last_level_out(self):
+        book = _book()
+        book.apply_changes([["sell", "100.25", "2"]])
+        assert book.best_ask() == (100.25, 2.0)
+        assert book.asks.depth == 4.0  # 2 + 0.5 + 1.5
+
+    def test_changes_outside_depth_leave_it_alone(self):
+        book = _book()
+        book.apply_changes([["buy", "98.00", "10"], ["buy", "90.00", "1"]])
+        assert book.bids.depth == 6.0
+        assert book.bids.total == 17.0
+
+    def test_removing_missing_level_is_ignored(self):
+        book = _book()
+        book.apply_changes([["sell", "150.00", "0"]])
+        assert len(book.asks) == 4
+
+    def test_random_changes_match_brute_force(self):
+        rng = random.Random(7)
+        side = BookSide(is_ask=True, depth_levels=5)
+        reference: dict[float, float] = {}
+        for _ in range(5000):
+            price = round(100 + rng.randint(0, 40) * 0.01, 2)
+            size = 0.0 if rng.random() < 0.35 else round(rng.uniform(0.001, 3), 8)
+            side.set(price, size)
+            if size:
+                reference[price] = size
+            else:
+                reference.pop(price, None)
+            top = sorted(reference.items())[:5]
+            assert side.depth == pytest.approx(sum(s for _, s in top))
+            assert side.best() == (top[0] if top else None)
+        assert side.total == pytest.approx(sum(reference.values()))
+        assert side.levels() == sorted(reference.items())
+
+    def test_depth_levels_must_be_positive(self):
+        with pytest.raises(ValueError):
+            BookSide(is_ask=False, depth_levels=0)
+
+
+class TestOrderBook:
+    def test_spread_mid_imbalance(self):
+        book = _book()
+        assert book.spread() == 0.5
+        assert book.mid() == 100.25
+        assert book.imbalance() == pytest.approx((6.0 - 4.5) / 10.5)
+
+    def test_changes_before_snapshot_ignored(self):
+        book = OrderBook("BTC-USD")
+        book.apply_changes([["buy", "100", "1"]])
+        assert book.best_bid() is None
+        assert book.spread() is None
+        assert book.imbalance() is None
+
+    def test_snapshot_replaces_book(self):
+        book = _book()
+        book.apply_snapshot(bids=[["50", "1"], ["49", "0"]], asks=[])
+        assert book.bids.levels() == [(50.0, 1.0)]
+        assert book.best_ask() is None
+        assert book.snapshots == 2
+
+    def test_clear_waits_for_next_snapshot(self):
+        book = _book()
+        book.clear()
+        assert not book.ready
+        assert len(book.bids) == 0
+        book.apply_changes([["buy", "100", "1"]])
+        assert len(book.bids) == 0
+
+    def test_crossing_change_marks_book_stale_until_snapshot(self):
+        book = _book()
+        book.apply_changes([["buy", "100.75", "1"]])
+        assert book.crossed == 1
+        assert book.stale and book.snapshot()["stale"]
+        book.apply_changes([["buy", "101.25", "1"]])
+        assert book.crossed == 1
+        book.apply_snapshot(bids=[["100", "1"]], asks=[["101", "1"]])
+        assert not book.stale
+        assert book.snapshot()["crossed"] == 1
+
+    def test_touching_book_counts_as_crossed(self):
+        book = _book()
+        book.apply_changes([["sell", "100.00", "1"]])
+        assert book.stale
+
+    def test_snapshot_is_json_serialisable(self):
+        snapshot = json.loads(json.dumps(_book().snapshot()))
+        assert snapshot["best_bid"] == [100.0, 1.0]
+        assert snapshot["bid_levels"] == 4
+
+
+class TestEngineBook:
+    def test_book_frames_for_book_product_applied(self):
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"], book=OrderBook("BTC-USD"))
+        engine.process_batch([
+            json.dumps({"type": "snapshot", "product_id": "BTC-USD", "bids": [["100", "1"]], "asks": [["101", "1"]]}),
+            json.dumps({"type": "l2update", "product_id": "BTC-USD", "changes": [["buy", "100.5", "2"]]}),
+            json.dumps({"type": "l2update", "product_id": "ETH-USD", "changes": [["buy", "100.7", "2"]]}),
+        ])
+        assert engine.book.best_bid() == (100.5, 2.0)
+        assert engine.snapshot()["book"]["updates"] == 1
+
+    def test_book_frames_ignored_without_book(self):
+        engine = FeedEngine()
+        engine.process_message(json.dumps({"type": "snapshot", "product_id": "BTC-USD", "bids": [], "asks": []}))
+        assert engine.snapshot()["book"] is None
+
+    def test_synthetic_feed_keeps_book_uncrossed(self):
+        gen = FrameGenerator(FeedProfile(book_levels=50, ticker_every=0), book=True)
+        engine = FeedEngine(book=OrderBook("BTC-USD"))
+        engine.process_message(gen.book_snapshot_frame())
+        for _ in range(10):
+            engine.process_batch(gen.frames(20))
+            assert engine.book.spread() > 0
+        assert engine.book.updates == 10 * 20 * 5
+        assert engine.book.crossed == 0
+
+    def test_dropped_frames_never_cross_the_book(self):
+        gen = FrameGenerator(FeedProfile(book_levels=50, ticker_every=0, drop_rate=0.3), book=True)
+        engine = FeedEngine(book=OrderBook("BTC-USD"))
+        engine.process_message(gen.book_snapshot_frame())
+        for _ in range(10):
+            engine.process_batch(gen.frames(20))
+        assert gen.dropped > 0
+        assert engine.book.updates == 10 * 20 * 5
+        assert engine.book.crossed == 0 and not engine.book.stale
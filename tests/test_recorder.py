@@ -0,0 +1,152 @@
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from recorder import FrameRecorder, ReplaySource, parse_speed, read_frames
+
+
+def _trade(price):
+    return json.dumps({"type": "match", "price": price, "size": "0.5", "side": "buy", "product_id": "BTC-USD"})
+
+
+def _record(path, stamped_frames):
+    recorder = FrameRecorder(str(path))
+    for ts, frame in stamped_frames:
+        recorder.write(frame, ts)
+    recorder.close()
+
+
+async def _replay_all(source):
+    async with source.connect() as ws:
+        return [frame async for frame in ws]
+
+
+class TestFrameRecorder:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        frames = [(100.0, _trade("50000.00")), (100.5, _trade("50100.00"))]
+        _record(path, frames)
+        assert list(read_frames(str(path))) == frames
+
+    def test_write_many_shares_timestamp(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        recorder = FrameRecorder(str(path))
+        recorder.write_many([_trade("1"), _trade("2").encode()], 42.0)
+        recorder.close()
+        assert recorder.frames_written == 2
+        assert list(read_frames(str(path))) == [(42.0, _trade("1")), (42.0, _trade("2"))]
+
+    def test_sessions_append(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        _record(path, [(1.0, _trade("1"))])
+        _record(path, [(2.0, _trade("2"))])
+        assert [ts for ts, _ in read_frames(str(path))] == [1.0, 2.0]
+
+    def test_killed_session_repaired_before_append(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        recorder = FrameRecorder(str(path), flush_interval=0)
+        recorder.write(_trade("1"), 1.0)
+        recorder.write(_trade("2"), 2.0)
+        # A killed process leaves only what was flushed, with no gzip trailer
+        killed = path.read_bytes()
+        recorder.close()
+        path.write_bytes(killed)
+
+        _record(path, [(3.0, _trade("3"))])
+
+        assert [ts for ts, _ in read_frames(str(path))] == [1.0, 2.0, 3.0]
+
+    @pytest.mark.asyncio
+    async def test_killed_session_replays_after_append(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        _record(path, [(1.0, _trade("1"))])
+        recorder = FrameRecorder(str(path), flush_interval=0)
+        recorder.write(_trade("2"), 2.0)
+        killed = path.read_bytes()
+        recorder.close()
+        path.write_bytes(killed)
+        _record(path, [(3.0, _trade("3"))])
+
+        source = ReplaySource(str(path), speed=0)
+        replayed = await _replay_all(source)
+
+        assert replayed == [_trade("1"), _trade("2"), _trade("3")]
+        assert source.finished
+
+    def test_truncated_recording_stops_cleanly(self, tmp_path, caplog):
+        path = tmp_path / "feed.gz"
+        _record(path, [(float(i), _trade(str(i))) for i in range(50)])
+        data = path.read_bytes()
+        path.write_bytes(data[: len(data) - 12])
+
+        with caplog.at_level("WARNING", logger="recorder"):
+            frames = list(read_frames(str(path)))
+
+        assert [ts for ts, _ in frames] == [float(i) for i in range(len(frames))]
+        assert f"truncated after {len(frames)} frames" in caplog.text
+
+    def test_malformed_lines_skipped(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        with gzip.open(path, "wt") as f:
+            f.write("garbage\nnot-a-time\t{}\n1.5\t{}\n")
+        assert list(read_frames(str(path))) == [(1.5, "{}")]
+
+
+class TestReplaySource:
+    @pytest.mark.asyncio
+    async def test_max_speed_replays_everything(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        frames = [(1000.0 + i * 60, _trade(str(i))) for i in range(5)]
+        _record(path, frames)
+        source = ReplaySource(str(path), speed=0)
+
+        start = time.monotonic()
+        replayed = await _replay_all(source)
+
+        assert time.monotonic() - start < 1.0
+        assert replayed == [frame for _, frame in frames]
+        assert source.finished
+        assert source.frames_replayed == 5
+
+    @pytest.mark.asyncio
+    async def test_speed_scales_gaps(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        _record(path, [(0.0, _trade("1")), (2.0, _trade("2"))])
+        source = ReplaySource(str(path), speed=20)
+
+        start = time.monotonic()
+        await _replay_all(source)
+
+        assert 0.08 <= time.monotonic() - start < 1.0
+
+    @pytest.mark.asyncio
+    async def test_due_frames_are_buffered(self, tmp_path):
+        path = tmp_path / "feed.gz"
+        _record(path, [(5.0, _trade(str(i))) for i in range(4)])
+        async with ReplaySource(str(path), speed=0).connect() as ws:
+            await ws.send("subscribe")
+            frames = aiter(ws)
+            await anext(frames)
+            assert len(ws.messages) == 3
+            assert ws.sent == ["subscribe"]
+
+    def test_negative_speed_rejected(self):
+        with pytest.raises(ValueError):
+            ReplaySource("unused.gz", speed=-1)
+
+
+class TestParseSpeed:
+    @pytest.mark.parametrize("value,expected", [("1", 1.0), ("10x", 10.0), ("0.5", 0.5), ("max", 0.0), ("MAX", 0.0)])
+    def test_valid(self, value, expected):
+        assert parse_speed(value) == expected
+
+    @pytest.mark.parametrize("value", ["-2", "fast", "x"])
+    def test_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_speed(value)
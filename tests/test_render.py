@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from render import RenderScheduler
+
+
+class TestRenderScheduler:
+    def test_draws_only_when_inputs_change(self):
+        scheduler = RenderScheduler()
+        draw = MagicMock()
+        assert scheduler.render("price", (1.0,), draw)
+        assert not scheduler.render("price", (1.0,), draw)
+        assert scheduler.render("price", (2.0,), draw)
+        assert draw.call_count == 2
+
+    def test_widgets_tracked_independently(self):
+        scheduler = RenderScheduler()
+        scheduler.render("a", (1,), lambda: None)
+        assert scheduler.render("b", (1,), lambda: None)
+
+    def test_invalidate_forces_redraw(self):
+        scheduler = RenderScheduler()
+        draw = MagicMock()
+        scheduler.render("a", (), draw)
+        scheduler.render("b", (), draw)
+        scheduler.invalidate("a")
+        assert scheduler.render("a", (), draw)
+        assert not scheduler.render("b", (), draw)
+        scheduler.invalidate()
+        assert scheduler.render("b", (), draw)
+
+    def test_snapshot_counts(self):
+        scheduler = RenderScheduler()
+        for value in (1, 1, 1, 2):
+            scheduler.render("w", (value,), lambda: None)
+        snapshot = scheduler.snapshot()["w"]
+        assert snapshot["renders"] == 2
+        assert snapshot["skips"] == 2
+        assert snapshot["seconds"] >= 0
@@ -0,0 +1,173 @@
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from click_generator import CLICK_VARIATIONS, params_key
+from sound_bank import (
+    TIMBRE_MAX_SIZE, TIMBRE_MIN_SIZE, SoundBank, TimbreCache, find_variation, size_bucket, timbre_params, to_sound,
+    variation_names,
+)
+
+
+class TestFindVariation:
+    def test_by_stem_filename_and_index(self):
+        assert find_variation("geiger_click7") is CLICK_VARIATIONS[6]
+        assert find_variation("geiger_click7.wav") is CLICK_VARIATIONS[6]
+        assert find_variation(7) is CLICK_VARIATIONS[6]
+        assert find_variation("7") is CLICK_VARIATIONS[6]
+
+    def test_unknown_name_rejected(self):
+        with pytest.raises(ValueError, match="unknown sound"):
+            find_variation("cowbell")
+        with pytest.raises(ValueError):
+            find_variation(len(CLICK_VARIATIONS) + 1)
+
+    def test_names_follow_variations(self):
+        assert variation_names()[0] == "geiger_click1"
+        assert len(variation_names()) == len(CLICK_VARIATIONS)
+
+
+class TestParamsKey:
+    def test_filename_ignored(self):
+        params = dict(CLICK_VARIATIONS[0])
+        assert params_key(params) == params_key({**params, "filename": "other.wav"})
+
+    def test_shape_and_rate_change_key(self):
+        params = CLICK_VARIATIONS[0]
+        assert params_key(params) != params_key({**params, "decay": 1})
+        assert params_key(params) != params_key(params, sample_rate=48000)
+
+
+class TestSoundBank:
+    def test_samples_deterministic(self):
+        first = SoundBank(cache_dir=None).samples(CLICK_VARIATIONS[2])
+        second = SoundBank(cache_dir=None).samples(CLICK_VARIATIONS[2])
+        assert first.dtype == np.int16
+        np.testing.assert_array_equal(first, second)
+
+    def test_disk_cache_written_then_hit(self, tmp_path):
+        bank = SoundBank(cache_dir=tmp_path)
+        samples = bank.samples(CLICK_VARIATIONS[0])
+        assert (tmp_path / f"{params_key(CLICK_VARIATIONS[0])}.npy").exists()
+        assert bank.snapshot() == {"loaded": 1, "cache_hits": 0, "synthesised": 1}
+
+        again = SoundBank(cache_dir=tmp_path)
+        with patch("sound_bank.render_variant") as generate:
+            np.testing.assert_array_equal(again.samples(CLICK_VARIATIONS[0]), samples)
+        generate.assert_not_called()
+        assert again.cache_hits == 1
+
+    def test_corrupt_cache_resynthesised(self, tmp_path):
+        (tmp_path / f"{params_key(CLICK_VARIATIONS[0])}.npy").write_bytes(b"junk")
+        bank = SoundBank(cache_dir=tmp_path)
+        assert len(bank.samples(CLICK_VARIATIONS[0])) > 0
+        assert bank.synthesised == 1
+
+    def test_sound_built_once_per_variation(self):
+        bank = SoundBank(cache_dir=None)
+        with patch("sound_bank.to_sound", side_effect=lambda samples: MagicMock()) as build:
+            first = bank.sound("geiger_click3")
+            assert bank.sound(3) is first
+        build.assert_called_once()
+
+
+class TestToSound:
+    def test_stereo_mixer_gets_two_channels(self):
+        with patch("pygame.mixer.get_init", return_value=(44100, -16, 2)), \
+                patch("pygame.sndarray.make_sound") as make_sound:
+            to_sound(np.arange(5, dtype=np.int16))
+        assert make_sound.call_args[0][0].shape == (5, 2)
+
+    def test_uninitialised_mixer_raises(self):
+        import pygame
+        with patch("pygame.mixer.get_init", return_value=None):
+            with pytest.raises(pygame.error):
+                to_sound(np.zeros(5, dtype=np.int16))
+
+
+class TestTimbre:
+    @staticmethod
+    def cache(maxsize=8):
+        return TimbreCache({"buy": "geiger_click7", "sell": "geiger_click4"}, maxsize=maxsize, build=lambda s: s)
+
+    def test_buckets_are_log_spaced_and_clamped(self):
+        assert size_bucket(0.1) == size_bucket(0.11)
+        assert size_bucket(0.1) < size_bucket(1.0) < size_bucket(10.0)
+        assert size_bucket(0) == size_bucket(TIMBRE_MIN_SIZE / 100) == size_bucket(TIMBRE_MIN_SIZE)
+        assert size_bucket(TIMBRE_MAX_SIZE * 10) == size_bucket(TIMBRE_MAX_SIZE)
+
+    def test_larger_trades_lower_longer_louder(self):
+        base = find_variation("geiger_click7")
+        small, small_gain = timbre_params(base, "buy", size_bucket(0.001))
+        large, large_gain = timbre_params(base, "buy", size_bucket(10))
+        assert large["frequency"] < small["frequency"]
+        assert large["duration"] > small["duration"]
+        assert large["decay"] < small["decay"]
+        assert large_gain > small_gain
+
+    def test_sell_pitched_below_buy(self):
+        base = find_variation("geiger_click7")
+        bucket = size_bucket(0.5)
+        assert timbre_params(base, "sell", bucket)[0]["frequency"] < timbre_params(base, "buy", bucket)[0]["frequency"]
+
+    def test_hit_reuses_buffer(self):
+        cache = self.cache()
+        first = cache.get("buy", 0.5)
+        assert cache.get("buy", 0.52) is first
+        snapshot = cache.snapshot()
+        assert (snapshot["hits"], snapshot["misses"]) == (1, 1)
+        assert snapshot["hit_rate"] == 0.5
+        assert snapshot["synth_ms"] > 0
+
+    def test_size_changes_buffer(self):
+        cache = self.cache()
+        assert len(cache.get("buy", 5.0)) > len(cache.get("buy", 0.001))
+        assert np.abs(cache.get("buy", 5.0)).max() > np.abs(cache.get("buy", 0.001)).max()
+
+    def test_least_recently_used_evicted(self):
+        cache = self.cache(maxsize=2)
+        cache.get("buy", 0.001)
+        cache.get("buy", 1.0)
+        cache.get("buy", 0.001)
+        cache.get("buy", 10.0)
+        assert cache.evictions == 1
+        cache.get("buy", 0.001)
+        assert cache.hits == 2
+
+    def test_set_variation_drops_side(self):
+        cache = self.cache()
+        cache.get("buy", 1.0)
+        cache.get("sell", 1.0)
+        cache.set_variation("buy", "geiger_click1")
+        assert cache.snapshot()["entries"] == 1
+        cache.get("sell", 1.0)
+        assert cache.hits == 1
+
+
+class TestAppSoundSelection:
+    def test_next_sound_swaps_buy_click(self, btc_app):
+        btc_app.sound_bank = MagicMock()
+        btc_app.audio_engine = MagicMock()
+        btc_app.sound_names["buy"] = "geiger_click7"
+
+        btc_app.action_next_sound("buy")
+
+        btc_app.sound_bank.sound.assert_called_once_with("geiger_click8")
+        assert btc_app._click_sound is btc_app.sound_bank.sound.return_value
+        btc_app.audio_engine.set_sound.assert_called_once_with("buy", btc_app._click_sound)
+
+    def test_next_sound_wraps_around(self, btc_app):
+        btc_app.sound_bank = MagicMock()
+        btc_app.sound_names["sell"] = "geiger_click10"
+        btc_app.action_next_sound("sell")
+        assert btc_app.sound_names["sell"] == "geiger_click1"
+        assert btc_app._click_sound_sell is btc_app.sound_bank.sound.return_value
+
+    def test_no_bank_is_noop(self, btc_app):
+        btc_app.action_next_sound("buy")
+        assert btc_app.sound_names["buy"] == "geiger_click7"
@@ -0,0 +1,100 @@
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from startup import StartupProfile
+
+
+class TestStartupProfile:
+    def test_phase_records_offset_and_duration(self):
+        profile = StartupProfile()
+        with profile.phase("work"):
+            time.sleep(0.01)
+        (phase,) = profile.snapshot()["phases"]
+        assert phase["name"] == "work"
+        assert phase["ms"] >= 10
+        assert phase["thread"] == threading.current_thread().name
+
+    def test_phase_recorded_when_body_raises(self):
+        profile = StartupProfile()
+        try:
+            with profile.phase("broken"):
+                raise ValueError
+        except ValueError:
+            pass
+        assert profile.snapshot()["phases"][0]["name"] == "broken"
+
+    def test_mark_keeps_first_time_only(self):
+        profile = StartupProfile()
+        assert profile.mark("first trade")
+        first = profile.marks["first trade"]
+        assert not profile.mark("first trade")
+        assert profile.marks["first trade"] == first
+
+    def test_concurrent_phases_show_their_threads(self):
+        profile = StartupProfile()
+
+        def work():
+            with profile.phase("background"):
+                time.sleep(0.01)
+
+        thread = threading.Thread(target=work, name="audio-init")
+        thread.start()
+        with profile.phase("foreground"):
+            time.sleep(0.01)
+        thread.join()
+        threads = {p["name"]: p["thread"] for p in profile.snapshot()["phases"]}
+        assert threads["background"] == "audio-init"
+
+    def test_report_orders_phases_and_marks_by_start(self):
+        profile = StartupProfile(origin=0.0)
+        profile.phases = [("import ui", 0.2, 0.1, "MainThread"), ("import engine", 0.0, 0.1, "MainThread")]
+        profile.marks = {"first trade on screen": 0.5}
+        lines = profile.report().splitlines()
+        assert [line.split()[0] for line in lines[1:]] == ["import", "import", "first"]
+        assert "import engine" in lines[1]
+        assert "first trade on screen" in lines[3]
+
+
+class TestAppStartup:
+    def test_first_trade_marked_received_then_on_screen(self, btc_app):
+        btc_app.startup = StartupProfile()
+        btc_app.engine.handle_trade({"price": "50000.00", "size": "0.5", "side": "buy"})
+        assert "first trade received" in btc_app.startup.marks
+        assert "first trade on screen" not in btc_app.startup.marks
+
+        btc_app._present_price()
+
+        assert "first trade on screen" in btc_app.startup.marks
+
+    def test_audio_ready_installs_sounds_and_starts_engine(self, btc_app):
+        click, sell, bank = MagicMock(), MagicMock(), MagicMock()
+        future = Future()
+        future.set_result((click, sell, bank))
+        btc_app.startup = StartupProfile()
+        with patch.object(btc_app, "_start_audio_engine") as start:
+            btc_app._on_audio_ready(future)
+        assert (btc_app._click_sound, btc_app._click_sound_sell, btc_app.sound_bank) == (click, sell, bank)
+        assert "audio ready" in btc_app.startup.marks
+        start.assert_called_once()
+
+    def test_failed_audio_init_leaves_clicks_silent(self, btc_app):
+        future = Future()
+        future.set_exception(RuntimeError("no mixer"))
+        btc_app._on_audio_ready(future)
+        assert btc_app._click_sound is None
+        assert btc_app.audio_engine is None
+
+    def test_feed_status_before_compose_ignored(self, btc_app):
+        btc_app.status_header = None
+        btc_app._set_feed_status("[bright_red]ERR 1/5[/]")
+
+    def test_startup_report_flag(self):
+        from src.main import parse_args
+        assert parse_args(["--startup-report"]).startup_report
+        assert not parse_args([]).startup_report
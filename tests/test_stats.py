@@ -0,0 +1,214 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from stats import (
+    SEQ_DUPLICATE,
+    SEQ_LATE,
+    SEQ_OK,
+    BatchCounters,
+    BotDetector,
+    FilterLevelStats,
+    SequenceTracker,
+)
+
+FILTER_SIZES = [0.0001, 0.001, 0.01, 0.1, 1]
+
+
+class TestFilterLevelStats:
+    def test_trade_counted_in_every_passing_level(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        assert stats.add(50000.0, 0.05, "buy") == 3
+        assert [stats.level(i)["total_trades"] for i in range(5)] == [1, 1, 1, 0, 0]
+
+    def test_trade_below_smallest_threshold_ignored(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        assert stats.add(50000.0, 0.00001, "buy") == 0
+        assert stats.level(0)["total_trades"] == 0
+
+    def test_threshold_is_inclusive(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        stats.add(50000.0, 0.1, "buy")
+        assert stats.level(3)["total_trades"] == 1
+
+    def test_level_accumulates_volume_and_vwap_inputs(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        stats.add(50000.0, 0.5, "buy")
+        stats.add(51000.0, 0.002, "sell")
+        stats.add(49000.0, 1.5, "sell")
+        level = stats.level(3)
+        assert level["total_trades"] == 2
+        assert level["session_volume"] == pytest.approx(2.0)
+        assert level["avg_trade_size"] == pytest.approx(1.0)
+        assert level["volume_usd"] == pytest.approx(0.5 * 50000 + 1.5 * 49000)
+        assert level["buy_volume"] == pytest.approx(0.5)
+        assert level["sell_volume"] == pytest.approx(1.5)
+        assert level["session_high"] == 50000.0
+        assert level["session_low"] == 49000.0
+
+    def test_largest_trade_per_level(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        stats.add(50000.0, 0.5, "buy")
+        stats.add(50100.0, 0.005, "sell")
+        assert stats.level(0)["largest_trade"] == {"price": 50000.0, "size": 0.5, "side": "buy"}
+        stats.add(50200.0, 2.0, "sell")
+        assert stats.level(0)["largest_trade"]["size"] == 2.0
+        assert stats.level(4)["largest_trade"]["side"] == "sell"
+
+    def test_high_low_per_level(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        stats.add(60000.0, 0.0005, "buy")
+        stats.add(50000.0, 0.5, "buy")
+        assert stats.level(0)["session_high"] == 60000.0
+        assert stats.level(1)["session_high"] == 50000.0
+
+    def test_levels_match_rescan(self):
+        import random
+        rng = random.Random(3)
+        stats = FilterLevelStats(FILTER_SIZES)
+        trades = [(50000 + rng.uniform(-500, 500), 10 ** rng.uniform(-5, 1), rng.choice(["buy", "sell"]))
+                  for _ in range(2000)]
+        for t in trades:
+            stats.add(*t)
+        for i, threshold in enumerate(FILTER_SIZES):
+            passing = [t for t in trades if t[1] >= threshold]
+            level = stats.level(i)
+            assert level["total_trades"] == len(passing)
+            assert level["session_volume"] == pytest.approx(sum(t[1] for t in passing))
+            assert level["session_high"] == max(t[0] for t in passing)
+
+    def test_reset(self):
+        stats = FilterLevelStats(FILTER_SIZES)
+        stats.add(50000.0, 0.5, "buy")
+        stats.reset()
+        assert stats.level(0)["total_trades"] == 0
+
+
+class TestBotDetector:
+    def test_requires_a_window(self):
+        with pytest.raises(ValueError):
+            BotDetector()
+
+    def test_empty_has_no_dominant(self):
+        assert BotDetector(max_trades=10).dominant() is None
+
+    def test_dominant_size_count_and_price(self):
+        detector = BotDetector(max_trades=10)
+        for price in [50000.0, 50001.0, 50002.0]:
+            detector.add(0.1234, price, 0.0)
+        detector.add(0.5, 50003.0, 0.0)
+        assert detector.dominant() == (0.1234, 3, 50002.0)
+
+    def test_sizes_rounded(self):
+        detector = BotDetector(max_trades=10)
+        detector.add(0.12346, 50000.0, 0.0)
+        detector.add(0.12354, 50000.0, 0.0)
+        assert detector.dominant()[:2] == (0.1235, 2)
+
+    def test_count_window_evicts_oldest(self):
+        detector = BotDetector(max_trades=3)
+        for size in [0.1, 0.1, 0.2, 0.2]:
+            detector.add(size, 50000.0, 0.0)
+        assert len(detector) == 3
+        assert detector.dominant()[:2] == (0.2, 2)
+        detector.add(0.3, 50000.0, 0.0)
+        detector.add(0.3, 50000.0, 0.0)
+        assert detector.dominant()[:2] == (0.3, 2)
+
+    def test_time_window_expires(self):
+        detector = BotDetector(max_age=10.0)
+        detector.add(0.1, 50000.0, 100.0)
+        detector.add(0.1, 50000.0, 105.0)
+        detector.add(0.2, 50000.0, 112.0)
+        assert len(detector) == 2
+        assert detector.dominant()[1] == 1
+        detector.expire(200.0)
+        assert detector.dominant() is None
+
+    def test_dominant_matches_rescan(self):
+        import random
+        from collections import Counter
+        rng = random.Random(11)
+        detector = BotDetector(max_trades=500)
+        sizes = [rng.choice([0.01, 0.02, 0.05, 0.1, 0.25]) for _ in range(5000)]
+        for size in sizes:
+            detector.add(size, 50000.0, 0.0)
+        expected = Counter(sizes[-500:]).most_common(1)[0][1]
+        assert detector.dominant()[1] == expected
+
+    def test_clear(self):
+        detector = BotDetector(max_trades=5)
+        detector.add(0.1, 50000.0, 0.0)
+        detector.clear()
+        assert detector.dominant() is None
+        assert len(detector) == 0
+
+
+class TestBatchCounters:
+    def test_empty(self):
+        counters = BatchCounters()
+        assert counters.mean_batch == 0.0
+        assert counters.snapshot()["size_histogram"] == []
+
+    def test_power_of_two_histogram(self):
+        counters = BatchCounters()
+        for size in [1, 2, 3, 4, 7, 8, 100]:
+            counters.record(size)
+        assert counters.size_histogram == [1, 2, 2, 1, 0, 0, 1]
+        assert counters.max_batch == 100
+        assert counters.mean_batch == pytest.approx(125 / 7)
+
+
+class TestSequenceTracker:
+    def test_contiguous_sequence_is_clean(self):
+        tracker = SequenceTracker()
+        assert [tracker.observe(seq) for seq in range(100, 105)] == [SEQ_OK] * 5
+        assert tracker.counts() == {
+            "seq_gaps": 0, "seq_missing": 0, "seq_last_gap": 0,
+            "seq_largest_gap": 0, "seq_late": 0, "seq_duplicates": 0,
+        }
+
+    def test_gap_sizes(self):
+        tracker = SequenceTracker()
+        for seq in (1, 2, 5, 6, 16):
+            tracker.observe(seq)
+        assert tracker.gaps == 2
+        assert tracker.missing == 11
+        assert tracker.last_gap == 9
+        assert tracker.largest_gap == 9
+
+    def test_late_frame_fills_gap_and_repeat_is_duplicate(self):
+        tracker = SequenceTracker()
+        for seq in (1, 2, 7):
+            tracker.observe(seq)
+        assert tracker.observe(4) == SEQ_LATE
+        assert tracker.observe(3) == SEQ_LATE
+        assert tracker.observe(6) == SEQ_LATE
+        assert tracker.observe(4) == SEQ_DUPLICATE
+        assert tracker.observe(7) == SEQ_DUPLICATE
+        assert tracker.observe(1) == SEQ_DUPLICATE
+        assert tracker.observe(5) == SEQ_LATE
+        assert (tracker.missing, tracker.late, tracker.duplicates) == (0, 4, 3)
+        assert tracker.snapshot()["open_gaps"] == 0
+        assert tracker.observe(8) == SEQ_OK
+
+    def test_open_gaps_are_bounded(self):
+        tracker = SequenceTracker(max_open_gaps=2)
+        for seq in (1, 3, 5, 7):
+            tracker.observe(seq)
+        assert tracker.snapshot()["open_gaps"] == 2
+        # The oldest gap was forgotten, so its number can only be counted as a duplicate
+        assert tracker.observe(2) == SEQ_DUPLICATE
+        assert tracker.observe(6) == SEQ_LATE
+
+    def test_reset_keeps_session_counts(self):
+        tracker = SequenceTracker()
+        for seq in (1, 5):
+            tracker.observe(seq)
+        tracker.reset()
+        assert tracker.observe(1000) == SEQ_OK
+        assert tracker.observe(3) == SEQ_DUPLICATE
+        assert tracker.gaps == 1
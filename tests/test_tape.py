@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from engine import FeedEngine
+from tape import (
+    DAY, HEADER_DTYPE, RECORD_DTYPE, TAPE_INDEX_EVERY, TapeFormatError, TapeWriter, read_header, read_index,
+    read_records, segment_paths,
+)
+from trade_ring import NO_TRADE_ID, SIDE_BUY, SIDE_SELL, SIDE_UNKNOWN
+
+# 2024-01-15 00:00:00 UTC
+MIDNIGHT = 1705276800.0
+
+
+@pytest.fixture
+def tape(tmp_path):
+    writer = TapeWriter(tmp_path, flush_interval=60)
+    yield writer
+    writer.close()
+
+
+def _append(tape, count, start=MIDNIGHT + 3600, product_id="BTC-USD", step=0.5):
+    for i in range(count):
+        tape.append(product_id, start + i * step, 40000.0 + i, 0.01 * (i % 7 + 1), ("buy", "sell")[i % 2], i)
+
+
+class TestTapeWriter:
+    def test_records_round_trip(self, tape, tmp_path):
+        tape.append("BTC-USD", MIDNIGHT + 10, 42000.5, 0.25, "buy", 7)
+        tape.append("BTC-USD", MIDNIGHT + 11, 42001.0, 0.5, "sell")
+        tape.append("BTC-USD", MIDNIGHT + 12, 42002.0, 1.0, "weird", 9)
+        assert tape.flush()
+        [path] = segment_paths(tmp_path, "BTC-USD")
+        assert path.name == "2024-01-15-000.tape"
+        assert read_header(path)["product_id"] == "BTC-USD"
+        records = read_records(path)
+        assert records["price"].tolist() == [42000.5, 42001.0, 42002.0]
+        assert records["trade_id"].tolist() == [7, NO_TRADE_ID, 9]
+        assert records["side"].tolist() == [SIDE_BUY, SIDE_SELL, SIDE_UNKNOWN]
+        assert os.path.getsize(path) == HEADER_DTYPE.itemsize + 3 * RECORD_DTYPE.itemsize
+
+    def test_sparse_index_covers_every_block(self, tape, tmp_path):
+        count = TAPE_INDEX_EVERY * 2 + 10
+        _append(tape, count)
+        tape.flush()
+        [path] = segment_paths(tmp_path, "BTC-USD")
+        assert read_index(path)["first"].tolist() == [0, TAPE_INDEX_EVERY]
+        tape.close()
+        index = read_index(path)
+        assert index["first"].tolist() == [0, TAPE_INDEX_EVERY, 2 * TAPE_INDEX_EVERY]
+        times = read_records(path)["time"]
+        for entry in index:
+            block = times[entry["first"]:entry["first"] + TAPE_INDEX_EVERY]
+            assert (entry["min_time"], entry["max_time"]) == (block.min(), block.max())
+
+    def test_products_get_their_own_directories(self, tape, tmp_path):
+        _append(tape, 3, product_id="BTC-USD")
+        _append(tape, 5, product_id="ETH-USD")
+        tape.flush()
+        assert len(read_records(segment_paths(tmp_path, "BTC-USD")[0])) == 3
+        assert len(read_records(segment_paths(tmp_path, "ETH-USD")[0])) == 5
+
+    def test_new_utc_day_starts_new_segment(self, tape, tmp_path):
+        _append(tape, 4, start=MIDNIGHT - 1, step=0.5)
+        # A late trade from before midnight stays in the new day's segment
+        tape.append("BTC-USD", MIDNIGHT - 0.1, 40000.0, 0.01, "buy")
+        tape.flush()
+        first, second = segment_paths(tmp_path, "BTC-USD")
+        assert (first.name, second.name) == ("2024-01-14-000.tape", "2024-01-15-000.tape")
+        assert len(read_records(first)) == 2
+        assert len(read_records(second)) == 3
+
+    def test_each_session_starts_a_new_segment(self, tmp_path):
+        for _ in range(2):
+            writer = TapeWriter(tmp_path)
+            _append(writer, 3)
+            writer.close()
+        assert [p.name for p in segment_paths(tmp_path, "BTC-USD")] == ["2024-01-15-000.tape", "2024-01-15-001.tape"]
+
+    def test_segment_rotates_at_size_limit(self, tmp_path):
+        writer = TapeWriter(tmp_path, segment_bytes=HEADER_DTYPE.itemsize + 100 * RECORD_DTYPE.itemsize)
+        _append(writer, 250)
+        writer.close()
+        paths = segment_paths(tmp_path, "BTC-USD")
+        assert [len(read_records(p)) for p in paths] == [100, 100, 50]
+        assert np.concatenate([read_records(p)["trade_id"] for p in paths]).tolist() == list(range(250))
+
+    def test_oldest_segments_deleted_over_budget(self, tmp_path):
+        segment_bytes = HEADER_DTYPE.itemsize + 100 * RECORD_DTYPE.itemsize
+        writer = TapeWriter(tmp_path, max_bytes=3 * segment_bytes, segment_bytes=segment_bytes)
+        for day in range(6):
+            _append(writer, 100, start=MIDNIGHT + day * DAY)
+            writer.flush()
+        writer.close()
+        paths = segment_paths(tmp_path, "BTC-USD")
+        assert [p.name[:10] for p in paths] == ["2024-01-18", "2024-01-19", "2024-01-20"]
+        assert not any(p.suffix == ".idx" and not p.with_suffix(".tape").exists() for p in tmp_path.glob("*/*"))
+        assert writer.segments_deleted == 3
+
+    def test_drops_when_writer_falls_behind(self, tmp_path):
+        writer = TapeWriter(tmp_path, flush_interval=60, max_pending=10)
+        _append(writer, 15)
+        assert writer.snapshot()["dropped"] == 5
+        writer.close()
+        assert writer.records_written == 10
+
+    def test_budget_must_fit_a_segment(self, tmp_path):
+        with pytest.raises(ValueError):
+            TapeWriter(tmp_path, max_bytes=1000, segment_bytes=2000)
+
+
+class TestReadSegment:
+    def test_partial_record_left_out(self, tape, tmp_path):
+        _append(tape, 3)
+        tape.close()
+        [path] = segment_paths(tmp_path, "BTC-USD")
+        with open(path, "ab") as f:
+            f.write(b"\0" * 17)
+        assert len(read_records(path)) == 3
+
+    def test_not_a_tape(self, tmp_path):
+        path = tmp_path / "junk.tape"
+        path.write_bytes(b"x" * 100)
+        with pytest.raises(TapeFormatError):
+            read_records(path)
+
+
+class TestEngineTape:
+    def test_every_product_taped_regardless_of_filter(self, tmp_path):
+        writer = TapeWriter(tmp_path, flush_interval=60)
+        engine = FeedEngine(products=["BTC-USD", "ETH-USD"], tape=writer)
+        engine.set_filter(len(engine.FILTER_SIZES) - 1)
+        for trade_id, (product_id, size) in enumerate((("BTC-USD", 0.001), ("ETH-USD", 2.0), ("BTC-USD", 1.5))):
+            engine.process_message(json.dumps({
+                "type": "match", "product_id": product_id, "price": "40000", "size": str(size),
+                "side": "buy", "trade_id": trade_id, "time": "2024-01-15T12:00:00.000000Z",
+            }))
+        writer.close()
+        btc = read_records(segment_paths(tmp_path, "BTC-USD")[0])
+        assert btc["size"].tolist() == [0.001, 1.5]
+        assert btc["time"][0] == MIDNIGHT + 12 * 3600
+        assert len(read_records(segment_paths(tmp_path, "ETH-USD")[0])) == 1
+        assert engine.snapshot()["tape"]["records"] == 3
+
+    def test_missing_exchange_time_uses_arrival(self, tmp_path):
+        writer = TapeWriter(tmp_path, flush_interval=60)
+        engine = FeedEngine(tape=writer)
+        before = time.time()
+        engine.handle_trade({"price": "40000", "size": "0.1", "side": "sell", "product_id": "BTC-USD"})
+        writer.close()
+        [stamp] = read_records(segment_paths(tmp_path, "BTC-USD")[0])["time"].tolist()
+        assert not math.isnan(stamp) and stamp >= before
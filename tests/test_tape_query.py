@@ -0,0 +1,188 @@
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import tape_query
+from engine import FeedEngine
+from tape import HEADER_DTYPE, RECORD_DTYPE, TapeWriter, segment_paths
+from tape_query import TapeRange, parse_range, query
+from trade_ring import TradeRing
+
+# 2024-01-15 00:00:00 UTC, a Monday
+MIDNIGHT = 1705276800.0
+
+
+def _fill(root, times, seed=5, **kwargs):
+    rng = np.random.default_rng(seed)
+    prices = 40000 + rng.normal(0, 50, len(times))
+    sizes = rng.lognormal(-5, 2, len(times))
+    writer = TapeWriter(root, flush_interval=60, **kwargs)
+    for i, (ts, price, size) in enumerate(zip(times, prices.tolist(), sizes.tolist())):
+        writer.append("BTC-USD", ts, price, size, ("buy", "sell", "unknown")[i % 3], i)
+    writer.close()
+    return np.array(times), prices, sizes
+
+
+def _brute(times, start, end):
+    return np.flatnonzero((times >= start) & (times < end))
+
+
+class TestQuery:
+    def test_matches_brute_force_across_segments_and_late_trades(self, tmp_path):
+        rng = np.random.default_rng(1)
+        times = np.sort(MIDNIGHT - 600 + rng.uniform(0, 2 * 86400, 20000))
+        # A few late trades, a little behind the trades around them
+        late = rng.choice(len(times), 40, replace=False)
+        times[late] -= rng.uniform(0, 30, 40)
+        times, prices, sizes = _fill(tmp_path, times.tolist(),
+                                     segment_bytes=HEADER_DTYPE.itemsize + 3000 * RECORD_DTYPE.itemsize)
+        assert len(segment_paths(tmp_path, "BTC-USD")) > 4
+        for start, end in ((MIDNIGHT, MIDNIGHT + 3600), (MIDNIGHT + 50000, MIDNIGHT + 90000),
+                           (MIDNIGHT - 1000, MIDNIGHT + 3 * 86400), (MIDNIGHT + 7, MIDNIGHT + 7.5)):
+            result = query(tmp_path, "BTC-USD", start, end)
+            expected = _brute(times, start, end)
+            assert sorted(result.column("trade_id").tolist()) == expected.tolist()
+            if len(expected):
+                assert result.vwap() == pytest.approx(np.dot(prices[expected], sizes[expected]) / sizes[expected].sum())
+
+    def test_in_order_segment_returns_view(self, tmp_path):
+        _fill(tmp_path, [MIDNIGHT + i for i in range(5000)])
+        result = query(tmp_path, "BTC-USD", MIDNIGHT + 1000, MIDNIGHT + 2000)
+        [part] = result.parts
+        assert not part.flags.owndata
+        assert isinstance(part.base, np.memmap)
+        assert part["trade_id"][[0, -1]].tolist() == [1000, 1999]
+
+    def test_unindexed_tail_of_live_segment(self, tmp_path):
+        writer = TapeWriter(tmp_path, flush_interval=60)
+        for i in range(3000):
+            writer.append("BTC-USD", MIDNIGHT + i, 40000.0, 0.1, "buy", i)
+        writer.flush()
+        try:
+            result = query(tmp_path, "BTC-USD", MIDNIGHT + 2990, MIDNIGHT + 5000)
+            assert result.column("trade_id").tolist() == list(range(2990, 3000))
+        finally:
+            writer.close()
+
+    def test_empty_range_and_missing_product(self, tmp_path):
+        _fill(tmp_path, [MIDNIGHT + i for i in range(10)])
+        empty = query(tmp_path, "BTC-USD", MIDNIGHT - 100, MIDNIGHT)
+        assert len(empty) == 0
+        assert empty.vwap() is None
+        assert empty.summary()["top"] == []
+        assert len(query(tmp_path, "ETH-USD", 0, 2e9)) == 0
+
+
+class TestAggregations:
+    @pytest.fixture
+    def result(self, tmp_path):
+        self.times, self.prices, self.sizes = _fill(tmp_path, [MIDNIGHT + i for i in range(3000)])
+        return query(tmp_path, "BTC-USD", 0, 2e9)
+
+    def test_histogram_matches_heatmap_buckets(self, result):
+        ring = TradeRing(len(self.sizes), size_bins=FeedEngine.FILTER_SIZES)
+        for price, size in zip(self.prices, self.sizes):
+            ring.append(price, size)
+        assert result.size_histogram() == ring.bucket_counts()
+
+    def test_volume_by_side(self, result):
+        by_side = result.volume_by_side()
+        assert by_side["buy"] == pytest.approx(self.sizes[0::3].sum())
+        assert by_side["sell"] == pytest.approx(self.sizes[1::3].sum())
+        assert by_side["unknown"] == pytest.approx(self.sizes[2::3].sum())
+        assert sum(by_side.values()) == pytest.approx(result.volume())
+
+    def test_top_trades_largest_first(self, result):
+        top = result.top(5)
+        assert top["size"].tolist() == sorted(self.sizes, reverse=True)[:5]
+        assert result.top(5, by="price")["price"][0] == self.prices.max()
+
+    def test_top_zero_is_empty(self, result):
+        assert len(result.top(0)) == 0
+        assert result.summary(top_n=0)["top"] == []
+
+    def test_top_more_than_range_returns_all(self, result):
+        top = result.top(10_000)
+        assert len(top) == 3000
+        assert top["size"].tolist() == sorted(self.sizes, reverse=True)
+
+    def test_top_merges_parts(self):
+        parts = [np.zeros(3, dtype=RECORD_DTYPE), np.zeros(2, dtype=RECORD_DTYPE)]
+        parts[0]["size"] = [1, 5, 3]
+        parts[1]["size"] = [4, 2]
+        assert TapeRange(0, 1, parts).top(3)["size"].tolist() == [5, 4, 3]
+
+    def test_summary_is_json_serialisable(self, result):
+        summary = json.loads(json.dumps(result.summary(top_n=3)))
+        assert summary["trades"] == 3000
+        assert len(summary["top"]) == 3
+        assert summary["low"] <= summary["vwap"] <= summary["high"]
+
+
+def _ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+class TestParseRange:
+    # Wednesday 2024-01-17 10:30 UTC
+    NOW = datetime(2024, 1, 17, 10, 30, tzinfo=timezone.utc)
+
+    def _parse(self, text):
+        return parse_range(text, now=self.NOW, utc=True)
+
+    def test_last_weekday_with_hours(self):
+        assert self._parse("last Tuesday 14:00–15:00") == (_ts(2024, 1, 16, 14), _ts(2024, 1, 16, 15))
+        assert self._parse("last tuesday 14-15") == self._parse("tuesday 14:00 to 15:00")
+
+    def test_last_weekday_is_before_today(self):
+        assert self._parse("last wednesday")[0] == _ts(2024, 1, 10)
+        assert self._parse("wednesday") == (_ts(2024, 1, 17), _ts(2024, 1, 18))
+
+    def test_relative_days_and_dates(self):
+        assert self._parse("yesterday") == (_ts(2024, 1, 16), _ts(2024, 1, 17))
+        assert self._parse("9:30-16") == (_ts(2024, 1, 17, 9, 30), _ts(2024, 1, 17, 16))
+        assert self._parse("2024-01-01 22-24") == (_ts(2024, 1, 1, 22), _ts(2024, 1, 2))
+        assert self._parse("2024-01-01") == (_ts(2024, 1, 1), _ts(2024, 1, 2))
+
+    def test_range_past_midnight(self):
+        assert self._parse("monday 23:00-01:00") == (_ts(2024, 1, 15, 23), _ts(2024, 1, 16, 1))
+
+    def test_last_duration(self):
+        assert self._parse("last 2h") == (self.NOW.timestamp() - 7200, self.NOW.timestamp())
+        assert self._parse("past 30m")[0] == self.NOW.timestamp() - 1800
+
+    @pytest.mark.parametrize("text", ["someday", "tuesday 25-26", "2024-13-01"])
+    def test_unknown_rejected(self, text):
+        with pytest.raises(ValueError):
+            self._parse(text)
+
+
+class TestCli:
+    def test_json_summary(self, tmp_path, capsys):
+        _fill(tmp_path, [MIDNIGHT + 14 * 3600 + i for i in range(100)])
+        tape_query.main(["2024-01-15", "14:00-15:00", "--tape", str(tmp_path), "--utc", "--json", "--top", "2"])
+        summary = json.loads(capsys.readouterr().out)
+        assert summary["trades"] == 100
+        assert len(summary["top"]) == 2
+        assert summary["start"] == MIDNIGHT + 14 * 3600
+
+    def test_text_summary(self, tmp_path, capsys):
+        _fill(tmp_path, [MIDNIGHT + 14 * 3600 + i for i in range(100)])
+        tape_query.main(["2024-01-15", "--tape", str(tmp_path), "--utc"])
+        out = capsys.readouterr().out
+        assert "trades 100" in out
+        assert "largest trades" in out
+
+    def test_negative_top_rejected(self, tmp_path):
+        with pytest.raises(SystemExit):
+            tape_query.main(["yesterday", "--tape", str(tmp_path), "--top", "-1"])
+
+    def test_missing_tape_exits(self, tmp_path):
+        with pytest.raises(SystemExit):
+            tape_query.main(["yesterday", "--tape", str(tmp_path)])
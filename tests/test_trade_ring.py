@@ -0,0 +1,175 @@
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from trade_ring import TradeRing, format_exchange_time, parse_exchange_time
+
+
+class TestAppend:
+    def test_append_returns_monotonic_seq(self):
+        ring = TradeRing(4)
+        assert [ring.append(50000.0, 0.1, "buy") for _ in range(6)] == [0, 1, 2, 3, 4, 5]
+
+    def test_len_capped_at_capacity(self):
+        ring = TradeRing(4)
+        for i in range(10):
+            ring.append(50000.0 + i, 0.1, "buy")
+        assert len(ring) == 4
+        assert ring.first_seq == 6
+        assert ring.full
+
+    def test_oldest_trades_evicted(self):
+        ring = TradeRing(3)
+        for i in range(5):
+            ring.append(50000.0 + i, 0.1, "buy")
+        assert ring[0]["price"] == 50002.0
+        assert ring[-1]["price"] == 50004.0
+        assert ring.get(1) is None
+        assert ring.get(4)["price"] == 50004.0
+
+    def test_index_out_of_range(self):
+        ring = TradeRing(3)
+        ring.append(50000.0, 0.1, "buy")
+        with pytest.raises(IndexError):
+            ring[1]
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            TradeRing(0)
+
+    def test_clear(self):
+        ring = TradeRing(3)
+        ring.append(50000.0, 0.1, "buy")
+        ring.clear()
+        assert len(ring) == 0
+
+
+class TestRecords:
+    def test_record_round_trips_fields(self):
+        ring = TradeRing(4)
+        ts = parse_exchange_time("2024-01-15T12:00:00.000000Z")
+        seq = ring.append(50000.0, 0.5, "sell", ts, 12345, "abc123", "def456")
+        trade = ring.get(seq)
+        assert trade == {
+            "seq": seq,
+            "price": 50000.0,
+            "size": 0.5,
+            "side": "sell",
+            "trade_id": 12345,
+            "maker_order_id": "abc123",
+            "taker_order_id": "def456",
+            "time": "2024-01-15T12:00:00.000000Z",
+        }
+
+    def test_missing_optional_fields(self):
+        ring = TradeRing(4)
+        trade = ring.get(ring.append(50000.0, 0.5))
+        assert trade["side"] == "unknown"
+        assert trade["trade_id"] == ""
+        assert trade["time"] == ""
+        assert trade["maker_order_id"] == ""
+
+    def test_unusual_side_interned(self):
+        ring = TradeRing(4)
+        ring.append(50000.0, 0.5, "買い")
+        ring.append(50000.0, 0.5, "買い")
+        assert ring[0]["side"] == "買い"
+        assert ring.side_code("買い") == ring.side[1]
+
+
+class TestTail:
+    def test_tail_is_view_when_contiguous(self):
+        ring = TradeRing(8)
+        for i in range(5):
+            ring.append(float(i), 0.1, "buy")
+        view = ring.tail(3)
+        assert view.seq == 2
+        assert view.price.tolist() == [2.0, 3.0, 4.0]
+        assert np.shares_memory(view.price, ring.price)
+
+    def test_tail_wraps(self):
+        ring = TradeRing(4)
+        for i in range(6):
+            ring.append(float(i), 0.1, "buy")
+        view = ring.tail()
+        assert view.seq == 2
+        assert view.price.tolist() == [2.0, 3.0, 4.0, 5.0]
+
+    def test_tail_larger_than_len(self):
+        ring = TradeRing(4)
+        ring.append(1.0, 0.1, "buy")
+        assert len(ring.tail(100)) == 1
+
+    def test_tail_empty(self):
+        assert len(TradeRing(4).tail(10)) == 0
+
+    def test_tail_seqs_where_size_at_least(self):
+        ring = TradeRing(8)
+        for size in [0.005, 0.02, 0.01, 0.001]:
+            ring.append(50000.0, size, "buy")
+        assert ring.tail_seqs_where_size_at_least(0.01, 100) == [1, 2]
+        assert ring.tail_seqs_where_size_at_least(0.01, 2) == [2]
+
+    def test_iter_rows_yields_tuples(self):
+        ring = TradeRing(2)
+        for i in range(3):
+            ring.append(float(i), 0.1, "sell")
+        assert list(ring.iter_rows()) == [(1, 1.0, 0.1, "sell"), (2, 2.0, 0.1, "sell")]
+
+
+class TestExchangeTime:
+    def test_round_trip(self):
+        value = "2024-01-15T12:00:00.123456Z"
+        assert format_exchange_time(parse_exchange_time(value)) == value
+
+    def test_unparseable_is_nan(self):
+        assert math.isnan(parse_exchange_time("yesterday"))
+        assert math.isnan(parse_exchange_time(""))
+
+
+class TestBucketCounts:
+    BINS = [0.0001, 0.001, 0.01, 0.1, 1]
+
+    def test_no_bins_no_counts(self):
+        ring = TradeRing(4)
+        ring.append(50000.0, 0.5, "buy")
+        assert ring.bucket_counts() == []
+
+    def test_counts_on_append(self):
+        ring = TradeRing(8, size_bins=self.BINS)
+        for size in [0.00005, 0.0001, 0.005, 0.5, 1.0, 3.0]:
+            ring.append(50000.0, size, "buy")
+        assert ring.bucket_counts() == [1, 1, 1, 0, 1, 2]
+
+    def test_counts_decrement_on_eviction(self):
+        ring = TradeRing(3, size_bins=self.BINS)
+        for size in [2.0, 2.0, 0.05, 0.05, 0.0005]:
+            ring.append(50000.0, size, "buy")
+        assert ring.bucket_counts() == [0, 1, 0, 2, 0, 0]
+
+    def test_counts_match_full_rescan(self):
+        rng = np.random.default_rng(7)
+        ring = TradeRing(50, size_bins=self.BINS)
+        for size in rng.lognormal(-5, 2.5, 500):
+            ring.append(50000.0, float(size), "buy")
+        expected = np.bincount(
+            np.searchsorted(self.BINS, ring.tail().size, side="right"), minlength=len(self.BINS) + 1
+        )
+        assert ring.bucket_counts() == expected.tolist()
+
+    def test_snapshot_is_a_copy(self):
+        ring = TradeRing(4, size_bins=self.BINS)
+        snapshot = ring.bucket_counts()
+        ring.append(50000.0, 0.5, "buy")
+        assert snapshot == [0] * 6
+
+    def test_clear_resets_counts(self):
+        ring = TradeRing(4, size_bins=self.BINS)
+        ring.append(50000.0, 0.5, "buy")
+        ring.clear()
+        assert ring.bucket_counts() == [0] * 6
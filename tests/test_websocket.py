@@ -1,5 +1,7 @@
 import asyncio
 import json
+import time
+from collections import deque
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -37,6 +39,19 @@ def create_mock_websocket(messages=None, send_capture=None):
     return mock_ws
 
 
+def create_buffered_websocket(messages):
+    # Mimics websockets' receive buffer: frames not yet read stay in ws.messages
+    mock_ws = MagicMock()
+    mock_ws.messages = deque(messages)
+
+    async def message_iter():
+        while mock_ws.messages:
+            yield mock_ws.messages.popleft()
+
+    mock_ws.__aiter__ = lambda self: message_iter()
+    return mock_ws
+
+
 class AsyncContextManagerMock:
     def __init__(self, mock_ws=None, exception=None):
         self.mock_ws = mock_ws
@@ -66,7 +81,7 @@ class TestWebSocketLoop:
 
         with patch('websockets.connect', side_effect=mock_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
         assert len(messages_sent) >= 1
         sub_msg = json.loads(messages_sent[0])
@@ -98,7 +113,7 @@ class TestWebSocketLoop:
 
         with patch('websockets.connect', side_effect=connect_once):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
         assert btc_app.stats["total_trades"] >= 1
 
@@ -112,9 +127,9 @@ class TestWebSocketLoop:
 
         with patch('websockets.connect', side_effect=failing_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
-        from cli import MAX_RECONNECT_ATTEMPTS
+        from engine import MAX_RECONNECT_ATTEMPTS
         assert connection_attempts[0] == MAX_RECONNECT_ATTEMPTS
 
     @pytest.mark.asyncio
@@ -133,7 +148,7 @@ class TestWebSocketLoop:
 
         with patch('websockets.connect', side_effect=connect_sequence):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
         assert connection_attempts[0] == 7
 
@@ -144,7 +159,7 @@ class TestWebSocketLoop:
 
         with patch('websockets.connect', side_effect=failing_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
         assert "DISCONNECTED" in btc_app.status_header.feed_status
 
@@ -155,7 +170,7 @@ class TestWebSocketLoop:
 
         with patch('websockets.connect', side_effect=failing_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
         assert "DISCONNECTED" in btc_app.status_header.feed_status
 
@@ -167,7 +182,7 @@ class TestWebSocketMessageTypes:
             raise OSError("System error")
         with patch('websockets.connect', side_effect=failing_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
     @pytest.mark.asyncio
     async def test_handles_connection_error(self, btc_app):
@@ -175,7 +190,7 @@ class TestWebSocketMessageTypes:
             raise ConnectionError("Connection refused")
         with patch('websockets.connect', side_effect=failing_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
 
 class TestSubscriptionMessage:
@@ -193,7 +208,7 @@ class TestSubscriptionMessage:
 
         with patch('websockets.connect', side_effect=mock_connect):
             with patch('asyncio.sleep', new_callable=AsyncMock):
-                await btc_app._ws_loop()
+                await btc_app.engine.run()
 
         assert len(messages_sent) >= 1
         sub_msg = json.loads(messages_sent[0])
@@ -204,3 +219,244 @@ class TestSubscriptionMessage:
         assert len(sub_msg["channels"]) > 0
         assert "BTC-USD" in sub_msg["product_ids"]
         assert "matches" in sub_msg["channels"]
+
+
+class TestBatchedIngestion:
+    @staticmethod
+    def _trade(price, size="0.5"):
+        return json.dumps({"type": "match", "price": price, "size": size, "side": "buy", "product_id": "BTC-USD"})
+
+    @pytest.mark.asyncio
+    async def test_buffered_frames_processed_as_one_batch(self, btc_app):
+        messages = [self._trade("50000.00"), self._trade("50100.00"), self._trade("50200.00")]
+        mock_ws = create_buffered_websocket(messages)
+        frames = aiter(mock_ws)
+        first = await anext(frames)
+
+        batch = await btc_app.engine.drain_batch(mock_ws, frames, first)
+
+        assert batch == messages
+
+    def test_batch_updates_price_widget_once(self, btc_app):
+        btc_app.stats["last_price"] = 49000.0
+        btc_app.engine.process_batch([self._trade("50000.00"), self._trade("49500.00"), self._trade("50100.00")])
+        btc_app._present_price()
+
+        assert btc_app.stats["total_trades"] == 3
+        btc_app.price_widget.update_price.assert_called_once_with(50100.0)
+        btc_app.price_widget.animate.assert_called_once_with("up")
+
+    def test_batch_net_unchanged_price_no_animation(self, btc_app):
+        btc_app.stats["last_price"] = 50000.0
+        btc_app.engine.process_batch([self._trade("50100.00"), self._trade("50000.00")])
+        btc_app._present_price()
+        btc_app.price_widget.animate.assert_not_called()
+
+    def test_batch_without_trades_skips_price_widget(self, btc_app):
+        btc_app.engine.process_batch([json.dumps({"type": "heartbeat", "sequence": 1})])
+        btc_app.price_widget.update_price.assert_not_called()
+
+    def test_batch_counters_recorded(self, btc_app):
+        btc_app.engine.process_batch([self._trade("50000.00")] * 3)
+        btc_app.engine.process_batch([self._trade("50000.00")])
+        snapshot = btc_app.engine.batch_counters.snapshot()
+        assert snapshot["batches"] == 2
+        assert snapshot["frames"] == 4
+        assert snapshot["max_batch"] == 3
+        assert snapshot["size_histogram"] == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_respected(self, btc_app):
+        mock_ws = create_buffered_websocket([self._trade("50000.00")] * 10)
+        frames = aiter(mock_ws)
+        first = await anext(frames)
+        with patch("engine.INGEST_MAX_BATCH", 4):
+            batch = await btc_app.engine.drain_batch(mock_ws, frames, first)
+        assert len(batch) == 4
+        assert len(mock_ws.messages) == 6
+
+
+class TestIngestThreadMode:
+    @staticmethod
+    def _trade(price):
+        return json.dumps({"type": "match", "price": price, "size": "0.5", "side": "buy", "product_id": "BTC-USD"})
+
+    def test_batch_leaves_price_to_presenter_instead_of_touching_widget(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app.stats["last_price"] = 49000.0
+        btc_app.engine.process_batch([self._trade("50000.00"), self._trade("50100.00")])
+
+        btc_app.price_widget.update_price.assert_not_called()
+        assert btc_app.ui_updates.drain() == []
+        btc_app._present_price()
+        btc_app.price_widget.update_price.assert_called_once_with(50100.0)
+        btc_app.price_widget.animate.assert_called_once_with("up")
+
+    def test_drain_applies_queued_updates(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app._set_feed_status("[bright_red]ERR 1/5[/]")
+
+        btc_app._drain_ui_updates()
+
+        assert btc_app.status_header.feed_status == "[bright_red]ERR 1/5[/]"
+
+    def test_queue_metrics_exposed_in_stats(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app._publish_view()
+        btc_app._drain_ui_updates()
+        stats = btc_app.activity_widget.update_activity.call_args[0][0]
+        assert stats["ui_queue_depth"] == 0
+        assert stats["ui_dropped"] == 0
+
+    def test_ui_renders_drained_view_without_engine_lock(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app.engine.process_batch([self._trade("50000.00")])
+        btc_app._publish_view()
+        btc_app.engine.process_batch([self._trade("50100.00")])
+        btc_app.engine.lock = MagicMock(side_effect=AssertionError("UI took the engine lock"))
+        btc_app.engine.lock.__enter__ = MagicMock(side_effect=AssertionError("UI took the engine lock"))
+
+        btc_app._drain_ui_updates()
+        btc_app.refresh_stats()
+
+        # Drawn from the view published after the first trade, not from live engine state
+        stats = btc_app.session_widget.update_session.call_args[0][0]
+        assert stats["total_trades"] == 1
+        assert btc_app.trades_table.add_row.call_count == 1
+
+    def test_refresh_before_first_view_draws_nothing(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app.refresh_stats()
+        btc_app.session_widget.update_session.assert_not_called()
+
+    def test_filter_change_runs_on_ingest_thread(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app.action_filter_up()
+        calls = btc_app._ingest_thread.call_soon.call_args_list
+        assert calls[0].args == (btc_app.engine.set_filter, 1)
+        assert calls[1].args == (btc_app._publish_view,)
+
+    def test_rapid_filter_presses_step_past_queued_change(self, btc_app):
+        btc_app._ingest_thread = MagicMock()
+        btc_app.action_filter_up()
+        btc_app.action_filter_up()
+        assert btc_app.filter_index == 2
+        # The engine itself is only changed on the ingest loop
+        assert btc_app.engine.filter_index == 0
+        assert btc_app._ingest_thread.call_soon.call_args_list[2].args == (btc_app.engine.set_filter, 2)
+
+    def test_changes_apply_directly_after_replay_ends(self, btc_app, tmp_path):
+        from ingest import IngestThread
+        from recorder import FrameRecorder, ReplaySource
+        path = str(tmp_path / "feed.gz")
+        recorder = FrameRecorder(path)
+        recorder.write_many([self._trade("50000.00"), self._trade("50100.00")], time.time())
+        recorder.close()
+        btc_app.engine.replay = ReplaySource(path, speed=0)
+        btc_app._ingest_thread = IngestThread(btc_app._run_ingest)
+        btc_app._ingest_thread.start()
+        btc_app._ingest_thread.join(5)
+        assert not btc_app._ingest_thread.is_alive()
+        btc_app._drain_ui_updates()
+
+        btc_app.action_filter_up()
+
+        assert btc_app.engine.filter_index == 1
+        assert btc_app.filter_index == 1
+        assert btc_app._view is not None and btc_app._view.min_size == btc_app.FILTER_SIZES[1]
+        stats = btc_app.activity_widget.update_activity.call_args[0]
+        assert stats[1] == btc_app.FILTER_SIZES[1]
+
+    def test_ingest_crash_logged_and_shown(self, btc_app, caplog):
+        from ingest import IngestThread
+
+        async def crash():
+            raise RuntimeError("boom")
+
+        btc_app._ingest_thread = IngestThread(crash, on_error=btc_app._on_ingest_error)
+        with caplog.at_level("ERROR", logger="ingest"):
+            btc_app._ingest_thread.start()
+            btc_app._ingest_thread.join(5)
+        assert "Ingest loop failed" in caplog.text and "boom" in caplog.text
+        btc_app._drain_ui_updates()
+        assert "RuntimeError" in btc_app.status_header.feed_status
+
+    def test_depth_columns_drained_into_history(self, btc_app):
+        from depth_heatmap import DepthHistory
+        from order_book import DepthLadder, OrderBook
+        btc_app._ingest_thread = MagicMock()
+        book = btc_app.engine.book = OrderBook("BTC-USD", ladder=DepthLadder(1.0, 16))
+        book.apply_snapshot(bids=[["100.00", "1"]], asks=[["101.00", "2"]])
+        btc_app.depth_widget = MagicMock()
+        btc_app.depth_widget.history = DepthHistory(16, columns=4)
+        btc_app._publish_depth()
+        btc_app._publish_depth()
+        btc_app._drain_ui_updates()
+        assert btc_app.depth_widget.history.captured == 2
+        btc_app.depth_widget.update_depth.assert_called_once_with(100.5, 1.0)
+
+    @pytest.mark.asyncio
+    async def test_ws_loop_runs_on_ingest_thread(self, btc_app):
+        from ingest import IngestThread
+        messages = [self._trade("50000.00"), self._trade("50100.00")]
+        connection_count = [0]
+
+        def connect_once(*args, **kwargs):
+            connection_count[0] += 1
+            if connection_count[0] == 1:
+                return AsyncContextManagerMock(create_mock_websocket(messages=messages))
+            raise websockets.exceptions.WebSocketException("Test complete")
+
+        with patch('websockets.connect', side_effect=connect_once), \
+                patch('engine.RECONNECT_DELAY', 0), patch('engine.MAX_RECONNECT_ATTEMPTS', 2):
+            btc_app._ingest_thread = IngestThread(btc_app.engine.run)
+            btc_app._ingest_thread.start()
+            btc_app._ingest_thread.join(5)
+
+        assert btc_app.stats["total_trades"] == 2
+        kinds = [update[0] for update in btc_app.ui_updates.drain()]
+        assert kinds[-1] == "status"
+        assert btc_app.price_presenter.submitted > 0
+
+
+class TestRecordReplay:
+    @staticmethod
+    def _trade(price):
+        return json.dumps({"type": "match", "price": price, "size": "0.5", "side": "buy", "product_id": "BTC-USD"})
+
+    @pytest.mark.asyncio
+    async def test_live_frames_are_recorded(self, btc_app):
+        messages = [self._trade("50000.00"), self._trade("50100.00")]
+        btc_app.engine.recorder = MagicMock()
+        connection_count = [0]
+
+        def connect_once(*args, **kwargs):
+            connection_count[0] += 1
+            if connection_count[0] == 1:
+                return AsyncContextManagerMock(create_mock_websocket(messages=messages))
+            raise websockets.exceptions.WebSocketException("Test complete")
+
+        with patch('websockets.connect', side_effect=connect_once), \
+                patch('engine.RECONNECT_DELAY', 0), patch('engine.MAX_RECONNECT_ATTEMPTS', 2):
+            await btc_app.engine.run()
+
+        recorded = [frame for call in btc_app.engine.recorder.write_many.call_args_list for frame in call.args[0]]
+        assert recorded == messages
+
+    @pytest.mark.asyncio
+    async def test_replay_drives_ws_loop_and_stops(self, btc_app, tmp_path):
+        from recorder import FrameRecorder, ReplaySource
+        path = str(tmp_path / "feed.gz")
+        recorder = FrameRecorder(path)
+        recorder.write_many([self._trade("50000.00"), self._trade("50100.00")], 1.0)
+        recorder.write(json.dumps({"type": "heartbeat"}), 2.0)
+        recorder.close()
+        btc_app.engine.replay = ReplaySource(path, speed=0)
+
+        with patch('websockets.connect') as connect:
+            await btc_app.engine.run()
+
+        connect.assert_not_called()
+        assert btc_app.stats["total_trades"] == 2
+        assert btc_app.stats["last_price"] == 50100.0
+        assert btc_app.status_header.feed_status == "[bright_yellow]REPLAY END[/]"